@@ -0,0 +1,152 @@
+"""
+性能基准测试：分阶段计时 Excel 导入、批次分组、上下文构建、渲染与保存，结果写入 JSON
+
+需在项目根目录下运行（模板从 ./templates/ 读取）：
+    python -m benchmarks.run_benchmarks --rows 20000 --clients 40 --output bench_results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic_ledger import generate_ledger, write_ledger
+from database.batch_store import BatchStore
+from database.db_manager import connect
+from utils.excel_handler import ExcelHandler
+from utils.report_generator import ReportGenerator
+from utils.perf import summarize
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _sample_batches(batches, limit):
+    """按样品名称轮流挑选批次，保证每种模板都被覆盖"""
+    by_sample = {}
+    for key, count in batches:
+        by_sample.setdefault(key[1], []).append((key, count))
+    picked = []
+    while len(picked) < limit and any(by_sample.values()):
+        for sample in sorted(by_sample):
+            if by_sample[sample] and len(picked) < limit:
+                picked.append(by_sample[sample].pop(0))
+    return picked
+
+
+def run(rows, clients, render_batches, grouping_repeats=5, seed=0):
+    """执行一轮基准测试
+
+    Args:
+        rows: 合成台账行数
+        clients: 委托单位数量
+        render_batches: 参与渲染计时的批次数
+        grouping_repeats: 批次分组查询的重复次数
+        seed: 随机种子
+
+    Returns:
+        结果字典
+    """
+    stages = {}
+    errors = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        ledger_path = os.path.join(workdir, "ledger.xlsx")
+        db_path = os.path.join(workdir, "bench.db")
+        output_dir = os.path.join(workdir, "reports")
+        os.makedirs(output_dir)
+
+        df, elapsed = _timed(generate_ledger, rows, clients, seed)
+        stages["ledger_generate"] = summarize([elapsed])
+        _, elapsed = _timed(write_ledger, df, ledger_path)
+        stages["ledger_write_xlsx"] = summarize([elapsed])
+        del df
+
+        conn = connect(db_path)
+        result, elapsed = _timed(ExcelHandler(ledger_path, conn).handler)
+        stages["import_initial"] = summarize([elapsed])
+        _, elapsed = _timed(ExcelHandler(ledger_path, conn).handler)
+        stages["import_incremental_unchanged"] = summarize([elapsed])
+
+        store = BatchStore(conn)
+        grouping = []
+        for _ in range(grouping_repeats):
+            batches, elapsed = _timed(store.list_batches)
+            grouping.append(elapsed)
+        stages["batch_grouping"] = summarize(grouping)
+
+        load, context, render, save = [], [], [], []
+        for key, _ in _sample_batches(batches, render_batches):
+            value, elapsed = _timed(store.fetch_batch, key)
+            load.append(elapsed)
+            generator = ReportGenerator(key, value)
+            try:
+                ctx, elapsed = _timed(generator.build_context)
+                context.append(elapsed)
+                doc, elapsed = _timed(generator.render, ctx)
+                render.append(elapsed)
+                _, elapsed = _timed(doc.save, generator.get_report_path(output_dir))
+                save.append(elapsed)
+            except Exception as e:
+                errors.setdefault(key[1], str(e))
+        stages["batch_load"] = summarize(load)
+        stages["context_build"] = summarize(context)
+        stages["render"] = summarize(render)
+        stages["save"] = summarize(save)
+        conn.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "rows": rows,
+            "clients": clients,
+            "batches": len(batches),
+            "imported_rows": result.total,
+            "render_batches": len(load),
+        },
+        "stages": stages,
+        "render_errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="工器具报告系统性能基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="合成台账行数")
+    parser.add_argument("--clients", type=int, default=20, help="委托单位数量")
+    parser.add_argument("--render-batches", type=int, default=30, help="参与渲染计时的批次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default="bench_results.json", help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.clients, args.render_batches, seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"{'阶段':<30}{'次数':>6}{'总计(s)':>12}{'p50(ms)':>12}{'p95(ms)':>12}")
+    for name, stats in results["stages"].items():
+        print(f"{name:<30}{stats['count']:>6}{stats['total']:>12.3f}"
+              f"{stats['p50'] * 1000:>12.1f}{stats['p95'] * 1000:>12.1f}")
+    for sample, error in results["render_errors"].items():
+        print(f"渲染失败 {sample}: {error}")
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+合成台账生成器：按指定行数、委托单位数生成覆盖全部报告模板的 tools 数据
+
+示例：
+    python -m benchmarks.synthetic_ledger --rows 20000 --clients 40 --output 合成台账.xlsx
+"""
+import argparse
+import datetime
+import random
+import pandas as pd
+
+# 样品名称 -> (编号缩写, 试验电压, 试验数据生成函数)，覆盖 templates/ 下的全部模板
+SAMPLE_TYPES = {
+    "绝缘靴": ("jyx", "15kV", lambda rng: f"{rng.uniform(0.2, 2.8):.2f}"),
+    "绝缘手套": ("jyst", "8kV", lambda rng: f"{rng.uniform(2.8, 6.0):.2f}"),
+    # 验电器、脚扣各有两个试验项目，试验数据以列表字符串存储
+    "验电器": ("ydq", "10kV", lambda rng: f"[{rng.uniform(1.8, 3.2):.1f},{rng.uniform(1.8, 3.2):.1f}]"),
+    "脚扣": ("jk", None, lambda rng: f"[{rng.choice([1176, 1180, 1200])},{rng.choice([980, 1000])}]"),
+    "高压接地线": ("gyjdx", None, lambda rng: "[" + ",".join(f"{rng.uniform(1.0, 2.1):.2f}" for _ in range(6)) + "]"),
+    "低压接地线": ("dyjdx", None, lambda rng: "[" + ",".join(f"{rng.uniform(1.0, 2.1):.2f}" for _ in range(7)) + "]"),
+    "绝缘杆": ("jyg", None, lambda rng: None),
+}
+
+_DISTRICTS = ["密云", "怀柔", "平谷", "延庆", "顺义", "昌平", "房山", "门头沟"]
+_STATIONS = ["新城子", "石城", "溪翁庄", "城区", "太师屯", "高岭", "不老屯", "穆家峪", "河南寨", "十里堡"]
+_PEOPLE = ["郭玉峰", "张勇", "陈宝成", "王策", "李明", "赵磊", "刘洋", "孙伟"]
+
+
+def _format_date(date):
+    """按台账书写习惯格式化日期，如 2025.2.14"""
+    return f"{date.year}.{date.month}.{date.day}"
+
+
+def client_names(count):
+    """生成 count 个不重复的委托单位名称"""
+    names = []
+    for i in range(count):
+        district = _DISTRICTS[i % len(_DISTRICTS)]
+        station = _STATIONS[(i // len(_DISTRICTS)) % len(_STATIONS)]
+        suffix = "" if i < len(_DISTRICTS) * len(_STATIONS) else str(i)
+        names.append(f"{district}供电公司{station}{suffix}供电所")
+    return names
+
+
+def generate_ledger(rows, clients=10, seed=0, start_date=datetime.date(2025, 1, 2)):
+    """生成合成台账
+
+    每个批次（委托单位 + 样品名称 + 接收日期）包含 4~40 条记录，约 5% 的记录为不合格。
+
+    Args:
+        rows: 总行数
+        clients: 委托单位数量
+        seed: 随机种子，相同参数生成相同数据
+        start_date: 第一个批次的接收日期
+
+    Returns:
+        与 Excel 台账列结构一致的 DataFrame
+    """
+    rng = random.Random(seed)
+    units = client_names(clients)
+    samples = list(SAMPLE_TYPES)
+    records = []
+    batch_no = 0
+    while len(records) < rows:
+        batch_no += 1
+        unit = units[batch_no % len(units)]
+        sample = samples[rng.randrange(len(samples))]
+        abbr, voltage, make_data = SAMPLE_TYPES[sample]
+        received = start_date + datetime.timedelta(days=batch_no // len(units))
+        tested = received + datetime.timedelta(days=rng.randint(1, 3))
+        stamped = tested + datetime.timedelta(days=3)
+        report_no = f"SYN{_format_date(tested)}-YD{batch_no:05d}"
+        sender, receiver, deliverer, taker = (rng.choice(_PEOPLE) for _ in range(4))
+        temperature = f"{rng.uniform(15, 28):.1f}℃"
+        humidity = f"{rng.randint(30, 70)}%"
+        size = min(rng.randint(4, 40), rows - len(records))
+        for i in range(size):
+            passed = rng.random() >= 0.05
+            records.append({
+                "样品名称": sample,
+                "样品编号": f"syn-{batch_no:05d}-{abbr}-{i + 1:03d}",
+                "送检人": sender,
+                "接收人": receiver,
+                "接收日期": _format_date(received),
+                "试验电压": voltage,
+                "试验数据": make_data(rng),
+                "温度": temperature,
+                "湿度": humidity,
+                "检测日期": _format_date(tested),
+                "委托单位": unit,
+                "报告编号": report_no,
+                "外观检查": "符合",
+                "检测结论": "合格" if passed else "不合格",
+                "试验结果": "通过" if passed else "不通过",
+                "备注": None,
+                "报告盖章日期": _format_date(stamped),
+                "交付人": deliverer,
+                "领取人": taker,
+                "交付日期": _format_date(stamped),
+            })
+    return pd.DataFrame.from_records(records)
+
+
+def write_ledger(df, path):
+    """将合成台账写入 Excel 文件"""
+    df.to_excel(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成工器具台账")
+    parser.add_argument("--rows", type=int, default=10000, help="总行数")
+    parser.add_argument("--clients", type=int, default=20, help="委托单位数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default="合成台账.xlsx", help="输出的 Excel 文件")
+    args = parser.parse_args(argv)
+
+    df = generate_ledger(args.rows, args.clients, args.seed)
+    write_ledger(df, args.output)
+    print(f"已生成 {len(df)} 行、{df['委托单位'].nunique()} 个委托单位的合成台账: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+绝缘工器具检测系统命令行入口（无界面批量生成）
+
+示例：
+    python cli.py --import 工器具台账.xlsx
+    python cli.py --import 台账/2025-03/ --import-only
+    python cli.py --unit 密云供电公司石城供电所 --from 2025.3.1 --to 2025.3.31 --workers 8
+"""
+import argparse
+import datetime
+import multiprocessing
+import sys
+import time
+from database.db_manager import connect, ensure_schema, to_iso_date
+from database.batch_store import BatchStore
+from database.report_manifest import ReportManifest
+from utils.excel_handler import ExcelHandler, MultiExcelImporter, collect_excel_files
+from utils.batch_runner import BatchRunner, DEFAULT_MAX_WORKERS
+from utils.report_generator import REPORTS_DIR
+from utils.output_sinks import ZipBundleSink
+from utils.perf import recorder
+
+
+def ledger_date(value):
+    """argparse 的日期类型：接受 '2025.3.1'、'2025-03-01' 等台账写法，返回 ISO 日期"""
+    try:
+        return datetime.date.fromisoformat(to_iso_date(value)).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法识别的日期：{value}（应如 2025.3.1）")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="工器具试验报告批量生成（命令行模式）")
+    parser.add_argument("--db", default="my_database.db", help="数据库文件路径（默认 my_database.db）")
+    parser.add_argument("--import", dest="import_files", nargs="+", metavar="PATH",
+                        help="生成前先导入的 Excel 台账，可为多个文件或文件夹（并行解析）")
+    parser.add_argument("--mode", choices=["incremental", "replace"], default="incremental",
+                        help="导入模式：增量更新或整表替换（默认增量）")
+    parser.add_argument("--unit", help="仅生成该委托单位的批次")
+    parser.add_argument("--sample", help="仅生成该样品名称的批次")
+    parser.add_argument("--from", dest="date_from", type=ledger_date, help="接收日期下限，如 2025.3.1")
+    parser.add_argument("--to", dest="date_to", type=ledger_date, help="接收日期上限，如 2025.3.31")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"并行工作进程数（默认 {DEFAULT_MAX_WORKERS}）")
+    parser.add_argument("--output", default=REPORTS_DIR, help="报告输出目录（默认 ./reports/）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="仅重新生成数据或模板有变化的批次（依据数据库中的生成清单）")
+    parser.add_argument("--bundle", action="store_true",
+                        help="按委托单位将报告打包为 ZIP（每个单位一个压缩包，不适用 --incremental）")
+    parser.add_argument("--import-only", action="store_true", help="只导入，不生成报告")
+    parser.add_argument("--perf", action="store_true", help="结束时打印各阶段耗时统计")
+    parser.add_argument("--perf-json", help="将各阶段耗时统计写入该 JSON 文件")
+    return parser.parse_args(argv)
+
+
+def report_perf(args):
+    """按命令行参数输出耗时统计"""
+    if args.perf:
+        print("\n" + recorder.format_table())
+    if args.perf_json:
+        recorder.export_json(args.perf_json)
+        print(f"耗时统计已写入 {args.perf_json}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        return run(args)
+    finally:
+        report_perf(args)
+
+
+def run(args):
+    conn = connect(args.db)
+    ensure_schema(conn)
+
+    if args.import_files:
+        start = time.perf_counter()
+        files = collect_excel_files(args.import_files)
+        if len(files) == 1:
+            result = ExcelHandler(files[0], conn).handler(mode=args.mode)
+        else:
+            importer = MultiExcelImporter(files, conn, max_workers=args.workers)
+            result = importer.handler(mode=args.mode)
+            for stats in importer.file_stats:
+                print(f"  {stats}")
+        print(f"导入完成：{len(files)} 个文件，{result}，耗时 {time.perf_counter() - start:.2f} 秒")
+        if args.import_only:
+            return 0
+
+    store = BatchStore(conn)
+    filters = dict(unit=args.unit, sample=args.sample, date_from=args.date_from, date_to=args.date_to)
+    batches = store.list_batches(**filters)
+    if not batches:
+        print("没有符合条件的批次")
+        return 0
+
+    row_total = sum(count for _, count in batches)
+    print(f"共 {len(batches)} 个批次、{row_total} 条记录，使用 {args.workers} 个工作进程")
+
+    def on_result(result, done, total):
+        if result.skipped:
+            print(f"[{done}/{total}] - 未变化，跳过 {result.report_path}")
+        elif result.success:
+            print(f"[{done}/{total}] ✓ {result.report_path}")
+        else:
+            print(f"[{done}/{total}] ✗ {result.batch_name}: {result.error}")
+
+    start = time.perf_counter()
+    manifest = ReportManifest(conn) if args.incremental else None
+    sink = ZipBundleSink(args.output) if args.bundle else None
+    runner = BatchRunner(max_workers=args.workers, output_dir=args.output, manifest=manifest, sink=sink)
+    # 批次数据由一条按批次键排序的查询流式读取，在途批次数有上限
+    try:
+        results, _ = runner.run(store.iter_batches(**filters), on_result, total=len(batches))
+    finally:
+        if sink is not None:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    if sink is not None:
+        for path in sink.bundle_paths:
+            print(f"已打包：{path}")
+
+    skipped = sum(1 for result in results if result.skipped)
+    success = sum(1 for result in results if result.success) - skipped
+    failed = len(results) - success - skipped
+    print(f"\n生成完成：成功 {success} 个，跳过 {skipped} 个，失败 {failed} 个，耗时 {elapsed:.2f} 秒")
+    if elapsed > 0:
+        print(f"吞吐量：{len(results) / elapsed:.2f} 报告/秒，{row_total / elapsed:.1f} 条记录/秒")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
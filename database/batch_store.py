@@ -0,0 +1,257 @@
+"""
+试验批次查询：在 SQL 端分组，按需加载批次数据
+"""
+from collections import OrderedDict
+from itertools import groupby
+import pandas as pd
+from database.db_manager import decode_measurements
+from database.tool_query import ToolFilter
+from database.summary import has_summary
+from utils.perf import span
+
+# 批次由相同单位、相同样品、相同接收日期的记录组成
+BATCH_COLUMNS = ['委托单位', '样品名称', '接收日期']
+
+# 按 id 查询测量项时每条 SQL 的参数个数上限
+MEASUREMENT_QUERY_SIZE = 500
+
+
+# 按批次键查询记录数时每条 SQL 的批次数上限（每个批次键占 3 个参数）
+KEY_QUERY_SIZE = 300
+
+
+class BatchChanges:
+    """一次导入引起的批次变化（变更集），各页面据此只更新受影响的批次，无需重新读取并分组整张表
+
+    Attributes:
+        added: 导入后新出现的批次键集合
+        changed: 导入前后都存在、其中记录有增改的批次键集合
+        removed: 记录全部移走（如修改了接收日期或整表替换）后不再存在的批次键集合
+        counts: 新增与变化批次在导入后的记录数 {批次键: 记录数}
+        unbatched: 是否写入了不属于任何批次的记录（委托单位、样品名称或接收日期为空），
+            这些记录只在数据预览中显示
+    """
+
+    def __init__(self, added=(), changed=(), removed=(), counts=None, unbatched=False):
+        self.added = set(added)
+        self.changed = set(changed)
+        self.removed = set(removed)
+        self.counts = counts or {}
+        self.unbatched = unbatched
+
+    @classmethod
+    def compare(cls, before, after, unbatched=False):
+        """根据涉及批次在导入前后的记录数得出变更集
+
+        Args:
+            before: 导入前的记录数 {批次键: 记录数}，不存在的批次可省略或为 0
+            after: 导入后的记录数，格式同上
+            unbatched: 是否写入了不属于任何批次的记录
+        """
+        before = {key for key, count in before.items() if count}
+        after = {key: count for key, count in after.items() if count}
+        return cls(added=after.keys() - before, changed=after.keys() & before,
+                   removed=before - after.keys(), counts=after, unbatched=unbatched)
+
+    @property
+    def keys(self):
+        """全部受影响的批次键"""
+        return self.added | self.changed | self.removed
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed or self.unbatched)
+
+    def __str__(self):
+        text = f"新增 {len(self.added)} 个批次，变化 {len(self.changed)} 个，移除 {len(self.removed)} 个"
+        return text + "，另有不属于任何批次的记录" if self.unbatched else text
+
+
+class BatchStore:
+    """试验批次仓库：批次列表来自 GROUP BY 查询，批次数据按需读取并保存在小型 LRU 缓存中"""
+
+    def __init__(self, conn, cache_size=8):
+        """初始化批次仓库
+
+        Args:
+            conn: sqlite3 数据库连接
+            cache_size: 最多缓存的批次数量
+        """
+        self.conn = conn
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def list_batches(self, unit=None, sample=None, date_from=None, date_to=None):
+        """查询批次及其记录数（读取批次索引 summary_batches，旧数据库退回对 tools 表分组）
+
+        Args:
+            unit: 仅返回该委托单位的批次
+            sample: 仅返回该样品名称的批次
+            date_from: 接收日期下限（ISO 格式，含）
+            date_to: 接收日期上限（ISO 格式，含）
+
+        Returns:
+            [(批次键, 记录数), ...]，按批次键排序
+        """
+        tool_filter = ToolFilter(unit, sample, date_from, date_to)
+        with span("batch.grouping"):
+            if has_summary(self.conn):
+                where, params = tool_filter.where()
+                sql = f"""
+                    SELECT 委托单位, 样品名称, 接收日期, 记录数
+                    FROM summary_batches
+                    {where}
+                    ORDER BY 委托单位, 样品名称, 接收日期
+                """
+            else:
+                where, params = tool_filter.where(
+                    ["委托单位 IS NOT NULL", "样品名称 IS NOT NULL", "接收日期 IS NOT NULL"])
+                sql = f"""
+                    SELECT 委托单位, 样品名称, 接收日期, COUNT(*)
+                    FROM tools
+                    {where}
+                    GROUP BY 委托单位, 样品名称, 接收日期
+                    ORDER BY 委托单位, 样品名称, 接收日期
+                """
+            rows = self.conn.execute(sql, params).fetchall()
+        return [((unit, sample, date), count) for unit, sample, date, count in rows]
+
+    def batch_counts(self, keys=None):
+        """查询批次的记录数
+
+        Args:
+            keys: 批次键列表，None 表示全部批次
+
+        Returns:
+            {批次键: 记录数}，不存在的批次不返回
+        """
+        if keys is None:
+            return dict(self.list_batches())
+        # 优先读取批次索引 summary_batches，旧数据库退回对 tools 表分组
+        if has_summary(self.conn):
+            source, count, group = "summary_batches", "记录数", ""
+        else:
+            source, count, group = "tools", "COUNT(*)", "GROUP BY 委托单位, 样品名称, 接收日期"
+        keys = list(keys)
+        counts = {}
+        for start in range(0, len(keys), KEY_QUERY_SIZE):
+            part = keys[start:start + KEY_QUERY_SIZE]
+            rows = self.conn.execute(f"""
+                SELECT 委托单位, 样品名称, 接收日期, {count}
+                FROM {source}
+                WHERE (委托单位, 样品名称, 接收日期) IN (VALUES {', '.join('(?, ?, ?)' for _ in part)})
+                {group}
+            """, [value for key in part for value in key]).fetchall()
+            counts.update(((unit, sample, date), number) for unit, sample, date, number in rows)
+        return counts
+
+    def batch_keys(self, ids):
+        """查询记录当前所在的批次
+
+        Args:
+            ids: tools 表的 id 列表
+
+        Returns:
+            {id: 批次键}，批次键中的字段可能为 None
+        """
+        ids = list(ids)
+        keys = {}
+        for start in range(0, len(ids), MEASUREMENT_QUERY_SIZE):
+            part = ids[start:start + MEASUREMENT_QUERY_SIZE]
+            rows = self.conn.execute(
+                f"SELECT id, 委托单位, 样品名称, 接收日期 FROM tools WHERE id IN ({', '.join('?' for _ in part)})",
+                part).fetchall()
+            keys.update((row[0], tuple(row[1:])) for row in rows)
+        return keys
+
+    def _to_batch_frame(self, rows, columns):
+        """将查询结果转换为批次 DataFrame（与 pd.read_sql 的类型推断一致），并附上解析好的试验数据"""
+        value = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        measurements = {}
+        if 'id' in value.columns:
+            ids = value['id'].tolist()
+            for start in range(0, len(ids), MEASUREMENT_QUERY_SIZE):
+                part = ids[start:start + MEASUREMENT_QUERY_SIZE]
+                measurements.update(decode_measurements(self.conn.execute(f"""
+                    SELECT tool_id, seq, value, text FROM measurements
+                    WHERE tool_id IN ({', '.join('?' for _ in part)})
+                    ORDER BY tool_id, seq
+                """, part)))
+        value.attrs['measurements'] = measurements
+        return value
+
+    def fetch_batch(self, key):
+        """直接从数据库读取一个批次的记录（不经过缓存）
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+
+        Returns:
+            批次数据 DataFrame，按导入顺序排列；导入时解析好的试验数据以 {id: 标量或列表}
+            的形式放在 attrs['measurements'] 中，随 DataFrame 一起传给渲染进程
+        """
+        with span("batch.load"):
+            cursor = self.conn.execute(
+                "SELECT * FROM tools WHERE 委托单位 = ? AND 样品名称 = ? AND 接收日期 = ? ORDER BY id",
+                list(key))
+            return self._to_batch_frame(cursor.fetchall(), [d[0] for d in cursor.description])
+
+    def iter_batches(self, unit=None, sample=None, date_from=None, date_to=None):
+        """流式读取符合条件的全部批次：一条按批次键排序的查询，逐批次分组产出
+
+        游标按 (委托单位, 样品名称, 接收日期) 复合索引的顺序读取，任一时刻只有当前批次的行在内存中，
+        整年的台账也只占用常量内存。参数含义同 list_batches。
+
+        Yields:
+            (批次键, 批次数据 DataFrame)
+        """
+        where, params = ToolFilter(unit, sample, date_from, date_to).where(
+            ["委托单位 IS NOT NULL", "样品名称 IS NOT NULL", "接收日期 IS NOT NULL"])
+        cursor = self.conn.execute(
+            f"SELECT * FROM tools {where} ORDER BY 委托单位, 样品名称, 接收日期, id", params)
+        columns = [d[0] for d in cursor.description]
+        positions = [columns.index(col) for col in BATCH_COLUMNS]
+        for key, rows in groupby(cursor, key=lambda row: tuple(row[i] for i in positions)):
+            with span("batch.load"):
+                value = self._to_batch_frame(list(rows), columns)
+            yield key, value
+
+    def iter_keys(self, keys):
+        """按给定的批次键逐个读取批次（惰性，调用方取用时才查询）
+
+        Yields:
+            (批次键, 批次数据 DataFrame)
+        """
+        for key in keys:
+            yield key, self.fetch_batch(key)
+
+    def load_batch(self, key):
+        """读取一个批次的记录，最近查看的批次保存在 LRU 缓存中
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+
+        Returns:
+            批次数据 DataFrame（调用方不应原地修改）
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+            return value
+
+        value = self.fetch_batch(key)
+        self._cache[key] = value
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def invalidate(self, keys=None):
+        """使缓存失效
+
+        Args:
+            keys: 需要失效的批次键，None 表示清空全部缓存
+        """
+        if keys is None:
+            self._cache.clear()
+            return
+        for key in keys:
+            self._cache.pop(key, None)
@@ -1,18 +1,507 @@
-from PySide6.QtWidgets import QApplication, QMainWindow, QTableView
-from PySide6.QtSql import QSqlDatabase, QSqlTableModel
-from PySide6.QtCore import Qt
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+import datetime
+import re
 import sys
 import sqlite3
+import threading
+from database.summary import create_summary_tables
+
+# 数据库结构版本，记录在 PRAGMA user_version 中
+SCHEMA_VERSION = 10
+
+# tools 表的受管结构：日期统一存储为 ISO 文本（YYYY-MM-DD），试验电压存储为千伏数值
+TOOLS_COLUMNS = [
+    ("样品名称", "TEXT"),
+    ("样品编号", "TEXT"),
+    ("送检人", "TEXT"),
+    ("接收人", "TEXT"),
+    ("接收日期", "TEXT"),
+    ("试验电压", "REAL"),
+    ("试验数据", "TEXT"),
+    ("温度", "TEXT"),
+    ("湿度", "TEXT"),
+    ("检测日期", "TEXT"),
+    ("委托单位", "TEXT"),
+    ("报告编号", "TEXT"),
+    ("外观检查", "TEXT"),
+    ("检测结论", "TEXT"),
+    ("试验结果", "TEXT"),
+    ("备注", "TEXT"),
+    ("报告盖章日期", "TEXT"),
+    ("交付人", "TEXT"),
+    ("领取人", "TEXT"),
+    ("交付日期", "TEXT"),
+]
+# 判定规则计算的结论列，不来自台账，导入时由 utils.rules.evaluate 填写
+VERDICT_COLUMNS = [
+    ("判定结论", "TEXT"),
+    ("判定说明", "TEXT"),
+    ("结论不符", "TEXT"),
+]
+DATE_COLUMNS = ["接收日期", "检测日期", "报告盖章日期", "交付日期"]
+VOLTAGE_COLUMN = "试验电压"
+
+TOOLS_INDEXES = {
+    "idx_tools_batch": "(委托单位, 样品名称, 接收日期)",
+    "idx_tools_sample_code": "(样品编号)",
+    "idx_tools_report_no": "(报告编号)",
+    "idx_tools_received": "(接收日期)",  # 数据预览按日期范围筛选
+}
+
+# 全文检索覆盖的文本列（tools_fts 为外部内容表，由触发器与 tools 表保持同步）
+FTS_COLUMNS = ["样品编号", "报告编号", "委托单位", "样品名称", "送检人", "接收人", "备注"]
+
+_DATE_PATTERN = re.compile(r"^\s*(\d{4})\s*[./\-年]\s*(\d{1,2})\s*[./\-月]\s*(\d{1,2})\s*日?\s*$")
+_VOLTAGE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(kv|v)?\s*$", re.IGNORECASE)
+_INT_PATTERN = re.compile(r"^[+-]?\d+$")
+_FLOAT_PATTERN = re.compile(r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$")
+_LIST_SEPARATOR = re.compile(r"[,，]")
+
+
+def quote_identifier(name):
+    """为 SQL 标识符加双引号"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def to_iso_date(value):
+    """将台账中的日期（如 '2025.2.14'、datetime）转换为 ISO 格式 '2025-02-14'
+
+    无法识别的值原样返回，避免导入时丢失数据。
+    """
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str):
+        match = _DATE_PATTERN.match(value)
+        if match:
+            year, month, day = (int(part) for part in match.groups())
+            try:
+                return datetime.date(year, month, day).isoformat()
+            except ValueError:
+                return value
+    return value
+
+
+def format_ledger_date(value):
+    """将 ISO 日期还原为台账/报告中使用的格式 '2025.2.14'"""
+    if isinstance(value, str):
+        try:
+            date = datetime.date.fromisoformat(value)
+        except ValueError:
+            return value
+        return f"{date.year}.{date.month}.{date.day}"
+    return value
+
+
+def parse_voltage(value):
+    """将试验电压（如 '15kV'）转换为千伏数值，无法识别的值原样返回"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _VOLTAGE_PATTERN.match(value)
+        if match:
+            number = float(match.group(1))
+            if (match.group(2) or "kv").lower() == "v":
+                number /= 1000
+            return number
+    return value
+
+
+def format_voltage(value):
+    """将千伏数值还原为 '15kV' 形式"""
+    if isinstance(value, float) and value == value:
+        return f"{value:g}kV"
+    return value
+
+
+def _parse_measurement(text):
+    """解析单个测量值：数字转换为 int/float，其它文字（如 '无启动'）保留为 None"""
+    if _INT_PATTERN.match(text):
+        return int(text)
+    if _FLOAT_PATTERN.match(text):
+        return float(text)
+    return None
+
+
+def parse_test_data(value):
+    """将试验数据拆分为测量项，导入时调用一次，结果写入 measurements 表
+
+    列表形式（如 '[1.04,1.05]'，验电器、接地线等多项目器具）的测量项序号从 1 开始；
+    单个值的序号为 0，读取时据此还原为标量。
+
+    Args:
+        value: 台账中的试验数据
+
+    Returns:
+        [(序号, 数值或 None, 原文), ...]，空值返回空列表
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    text = str(value).strip()
+    if not text:
+        return []
+    if text.startswith("[") and text.endswith("]"):
+        items = [item.strip() for item in _LIST_SEPARATOR.split(text[1:-1])]
+        return [(seq, _parse_measurement(item), item)
+                for seq, item in enumerate((item for item in items if item), 1)]
+    return [(0, _parse_measurement(text), text)]
+
+
+def decode_measurements(rows):
+    """将 measurements 表的行还原为渲染用的试验数据
+
+    Args:
+        rows: [(tool_id, 序号, 数值, 原文), ...]，按 tool_id、序号排序
+
+    Returns:
+        {tool_id: 标量或列表}，数值项为 int/float，非数值项为原文
+    """
+    decoded = {}
+    for tool_id, seq, number, text in rows:
+        item = text if number is None else number
+        if seq == 0:
+            decoded[tool_id] = item
+        else:
+            decoded.setdefault(tool_id, []).append(item)
+    return decoded
+
+
+def decode_test_data(value):
+    """直接解析一个试验数据值（用于不是从数据库读取的批次数据）"""
+    items = parse_test_data(value)
+    if not items:
+        return value
+    decoded = decode_measurements((None, seq, number, text) for seq, number, text in items)
+    return decoded[None]
+
+
+def replace_measurements(conn, rows):
+    """重新写入指定记录的测量项（调用方负责事务）
+
+    Args:
+        conn: sqlite3 数据库连接
+        rows: [(tool_id, 试验数据), ...]
+    """
+    rows = list(rows)
+    conn.executemany("DELETE FROM measurements WHERE tool_id = ?", [(tool_id,) for tool_id, _ in rows])
+    conn.executemany(
+        "INSERT INTO measurements (tool_id, seq, value, text) VALUES (?, ?, ?, ?)",
+        [(tool_id, seq, number, text)
+         for tool_id, value in rows for seq, number, text in parse_test_data(value)])
+
+
+def to_storage(df):
+    """将台账数据转换为 tools 表的存储格式（返回新的 DataFrame）"""
+    df = df.copy()
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(object).map(to_iso_date)
+    if VOLTAGE_COLUMN in df.columns:
+        df[VOLTAGE_COLUMN] = df[VOLTAGE_COLUMN].astype(object).map(parse_voltage)
+    return df
+
+
+def from_storage(df):
+    """将 tools 表中的数据还原为台账/报告的显示格式（返回新的 DataFrame）"""
+    df = df.copy()
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(object).map(format_ledger_date)
+    if VOLTAGE_COLUMN in df.columns:
+        df[VOLTAGE_COLUMN] = df[VOLTAGE_COLUMN].astype(object).map(format_voltage)
+    return df
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+
+
+def _create_tools_table(conn, extra_columns=()):
+    columns = ["id INTEGER PRIMARY KEY"]
+    columns += [f"{quote_identifier(name)} {sql_type}" for name, sql_type in TOOLS_COLUMNS]
+    columns += [f"{quote_identifier(name)} TEXT" for name in extra_columns]
+    body = ",\n    ".join(columns)
+    conn.execute(f"CREATE TABLE tools (\n    {body}\n)")
+
+
+def _migrate_legacy_tools(conn):
+    """将 to_sql 生成的无类型 tools 表迁移到受管结构，并转换日期与电压"""
+    legacy_columns = _table_columns(conn, "tools")
+    managed = {name for name, _ in TOOLS_COLUMNS}
+    extra_columns = [col for col in legacy_columns if col not in managed and col != "id"]
+
+    conn.execute("ALTER TABLE tools RENAME TO tools_legacy")
+    _create_tools_table(conn, extra_columns)
+
+    copy_columns = [col for col in legacy_columns if col != "id"]
+    select_cols = ", ".join(quote_identifier(col) for col in copy_columns)
+    placeholders = ", ".join("?" for _ in copy_columns)
+    date_positions = [i for i, col in enumerate(copy_columns) if col in DATE_COLUMNS]
+    voltage_position = copy_columns.index(VOLTAGE_COLUMN) if VOLTAGE_COLUMN in copy_columns else None
+
+    def convert(row):
+        row = list(row)
+        for i in date_positions:
+            row[i] = to_iso_date(row[i])
+        if voltage_position is not None:
+            row[voltage_position] = parse_voltage(row[voltage_position])
+        return row
+
+    cursor = conn.execute(f"SELECT {select_cols} FROM tools_legacy ORDER BY rowid")
+    conn.executemany(f"INSERT INTO tools ({select_cols}) VALUES ({placeholders})",
+                     (convert(row) for row in cursor))
+    conn.execute("DROP TABLE tools_legacy")
+
+
+def _create_fts(conn):
+    """创建 trigram 分词的全文索引及同步触发器，并为已有数据建立索引
+
+    trigram 分词按连续三个字符切分，不依赖空格，适合中文与 'xcz-jyx-001' 这类编号的片段查询。
+    """
+    columns = ", ".join(quote_identifier(col) for col in FTS_COLUMNS)
+    new_values = ", ".join(f"new.{quote_identifier(col)}" for col in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{quote_identifier(col)}" for col in FTS_COLUMNS)
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE tools_fts USING fts5({columns}, "
+                     "content='tools', content_rowid='id', tokenize='trigram')")
+    except sqlite3.OperationalError as e:
+        # SQLite 未编译 FTS5 或版本过旧（trigram 需 3.34+），搜索退回 LIKE 查询
+        print(f"无法创建全文索引，搜索将使用普通查询: {e}")
+        return
+    conn.execute(f"""
+        CREATE TRIGGER tools_fts_insert AFTER INSERT ON tools BEGIN
+            INSERT INTO tools_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER tools_fts_delete AFTER DELETE ON tools BEGIN
+            INSERT INTO tools_fts (tools_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER tools_fts_update AFTER UPDATE OF {columns} ON tools BEGIN
+            INSERT INTO tools_fts (tools_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO tools_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute("INSERT INTO tools_fts (tools_fts) VALUES ('rebuild')")
+
+
+def has_fts(conn):
+    """数据库中是否已建立全文索引"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tools_fts'").fetchone() is not None
+
+
+def _evaluate_ledger(conn):
+    """对整个台账按判定规则计算判定结论（用于迁移时为已有数据补算）"""
+    import pandas as pd
+    from utils.rules import evaluate, RULE_COLUMNS
+
+    df = pd.read_sql("SELECT * FROM tools", conn, coerce_float=False)
+    if df.empty:
+        return
+    df = evaluate(df)
+    assignments = ", ".join(f"{quote_identifier(col)} = ?" for col in RULE_COLUMNS)
+    values = df[RULE_COLUMNS].astype(object).where(df[RULE_COLUMNS].notna(), None)
+    conn.executemany(f"UPDATE tools SET {assignments} WHERE id = ?",
+                     zip(*(values[col] for col in RULE_COLUMNS), df["id"].tolist()))
+
+
+def ensure_schema(conn):
+    """确保数据库使用当前版本的受管结构，必要时迁移旧数据库
+
+    Args:
+        conn: sqlite3 数据库连接
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    with conn:
+        # sqlite3 模块不会为 DDL 自动开启事务，显式 BEGIN 保证迁移的原子性
+        conn.execute("BEGIN")
+        if version < 1:
+            existing = _table_columns(conn, "tools")
+            if not existing:
+                _create_tools_table(conn)
+            elif "id" not in existing:
+                print("检测到旧版数据库结构，正在迁移 tools 表...")
+                _migrate_legacy_tools(conn)
+            for name, columns in TOOLS_INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON tools {columns}")
+        if version < 2:
+            # 报告生成清单：记录每个批次上次生成时的数据哈希、模板哈希与输出路径
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_manifest (
+                    委托单位 TEXT NOT NULL,
+                    样品名称 TEXT NOT NULL,
+                    接收日期 TEXT NOT NULL,
+                    rows_hash TEXT NOT NULL,
+                    template_hash TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    generated_at TEXT NOT NULL,
+                    PRIMARY KEY (委托单位, 样品名称, 接收日期)
+                )
+            """)
+        if version < 3:
+            # 试验数据在导入时解析为测量项，渲染时直接读取，不再逐次解析字符串
+            # value 列不声明类型，整数与小数按原类型保存
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS measurements (
+                    tool_id INTEGER NOT NULL REFERENCES tools(id) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    value,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (tool_id, seq)
+                ) WITHOUT ROWID
+            """)
+            if "试验数据" in _table_columns(conn, "tools"):
+                replace_measurements(conn, conn.execute(
+                    "SELECT id, 试验数据 FROM tools WHERE 试验数据 IS NOT NULL").fetchall())
+        if version < 4:
+            for name, columns in TOOLS_INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON tools {columns}")
+        if version < 5:
+            existing = set(_table_columns(conn, "tools"))
+            if all(col in existing for col in FTS_COLUMNS):
+                _create_fts(conn)
+        if version < 6:
+            # 按判定规则计算的结论，导入时随数据一并写入（见 utils.rules）
+            existing = set(_table_columns(conn, "tools"))
+            for name, sql_type in VERDICT_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE tools ADD COLUMN {quote_identifier(name)} {sql_type}")
+            if {"样品名称", "试验数据", "试验电压"} <= existing:
+                _evaluate_ledger(conn)
+        if version < 7:
+            # 批次索引与统计汇总表，由触发器随 tools 表的写入增量维护（见 database.summary）
+            create_summary_tables(conn)
+        if version < 8:
+            # 报告服务的任务队列（见 database.job_queue），接收日期为 ISO 格式
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_jobs (
+                    id INTEGER PRIMARY KEY,
+                    委托单位 TEXT NOT NULL,
+                    样品名称 TEXT NOT NULL,
+                    接收日期 TEXT NOT NULL,
+                    client TEXT,
+                    status TEXT NOT NULL,
+                    output_path TEXT,
+                    error TEXT,
+                    submitted_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    worker TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs (status, id)")
+        if 6 <= version < 9:
+            # 列表形式的多项目试验数据（如验电器的 '[2.4,2.3]'）此前未能判定，按现行规则重新计算
+            # （版本 6 之前的数据库在上面补算时已使用现行规则）
+            if {"样品名称", "试验数据", "试验电压"} <= set(_table_columns(conn, "tools")):
+                _evaluate_ledger(conn)
+        if 3 <= version < 10:
+            # 此前连接未开启外键约束，删除记录时其测量项没有级联删除，清理遗留的孤立测量项
+            conn.execute("DELETE FROM measurements WHERE tool_id NOT IN (SELECT id FROM tools)")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    # 更新统计信息，帮助查询规划器选择索引
+    conn.execute("ANALYZE")
+
+
+DB_PATH = "my_database.db"
+
+# 等待其它连接释放写锁的时间（毫秒）
+BUSY_TIMEOUT_MS = 5000
+
+# 每个连接打开后执行的 PRAGMA：WAL 模式下读写互不阻塞，导入时界面仍可查询
+CONNECTION_PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),        # WAL 模式下 NORMAL 已保证数据库不会损坏，提交无需每次刷盘
+    ("cache_size", "-32000"),         # 页缓存约 32MB（负数单位为 KB）
+    ("mmap_size", str(256 * 1024 * 1024)),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", str(BUSY_TIMEOUT_MS)),
+    ("foreign_keys", "ON"),           # SQLite 默认不检查外键，开启后删除记录时级联删除其测量项
+]
+
+
+def configure_connection(conn):
+    """为 sqlite3 连接应用统一的 PRAGMA 设置
+
+    Args:
+        conn: sqlite3 数据库连接
+    """
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def connect(db_path=DB_PATH):
+    """打开一个已应用统一 PRAGMA 设置的 sqlite3 连接
+
+    Args:
+        db_path: 数据库文件路径
+
+    Returns:
+        sqlite3 数据库连接
+    """
+    return configure_connection(sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000))
 
 
 class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect("my_database.db")
-        
+    """数据库连接管理器：sqlite3 与 Qt 连接均按线程分配，并使用相同的 PRAGMA 设置"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self.conn = self.connection()
+        ensure_schema(self.conn)
+
         # 假设数据库连接已经成功建立
-        self.db = QSqlDatabase.addDatabase("QSQLITE")
-        self.db.setDatabaseName("my_database.db")
-        if not self.db.open():
+        self.db = self.qt_database()
+        if not self.db.isOpen():
             print("无法连接到数据库！")
             sys.exit(1)
 
+    def connection(self):
+        """返回当前线程专用的 sqlite3 连接（首次调用时创建，sqlite3 连接不能跨线程使用）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.db_path)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def new_connection(self):
+        """创建一个独立的 sqlite3 连接，由调用方负责关闭"""
+        return connect(self.db_path)
+
+    def qt_database(self):
+        """返回当前线程专用的 QSqlDatabase 连接（Qt 的数据库连接同样不能跨线程使用）"""
+        name = f"{self.db_path}#{threading.get_ident()}"
+        if QSqlDatabase.contains(name):
+            return QSqlDatabase.database(name)
+        db = QSqlDatabase.addDatabase("QSQLITE", name)
+        db.setDatabaseName(self.db_path)
+        db.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={BUSY_TIMEOUT_MS}")
+        if db.open():
+            query = QSqlQuery(db)
+            for pragma, value in CONNECTION_PRAGMAS:
+                if not query.exec(f"PRAGMA {pragma} = {value}"):
+                    print(f"设置 PRAGMA {pragma} 失败: {query.lastError().text()}")
+            query.finish()
+        return db
+
+    def close(self):
+        """关闭本管理器创建的全部 sqlite3 连接"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # 其它线程创建的连接只能在所属线程关闭，交由垃圾回收处理
+                pass
+        self._local = threading.local()
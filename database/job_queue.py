@@ -0,0 +1,126 @@
+"""
+报告生成任务队列：存储在 report_jobs 表中，供报告服务的多个工作进程领取
+"""
+import datetime
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELED = "canceled"
+FINISHED_STATES = (DONE, FAILED, CANCELED)
+
+JOB_COLUMNS = ["id", "委托单位", "样品名称", "接收日期", "client", "status", "output_path", "error",
+               "submitted_at", "started_at", "finished_at", "worker"]
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class JobQueue:
+    """报告生成任务队列（多进程安全：领取任务是一条带 RETURNING 的 UPDATE，由 SQLite 写锁保证互斥）"""
+
+    def __init__(self, conn):
+        """初始化任务队列
+
+        Args:
+            conn: sqlite3 数据库连接（需已执行 ensure_schema）
+        """
+        self.conn = conn
+
+    def submit(self, keys, client=None):
+        """提交一组批次
+
+        Args:
+            keys: 批次键 (委托单位, 样品名称, 接收日期) 列表，接收日期为 ISO 格式
+            client: 提交者标识（如工作站名称）
+
+        Returns:
+            任务 id 列表，与 keys 顺序一致
+        """
+        submitted_at = _now()
+        ids = []
+        with self.conn:
+            for key in keys:
+                cursor = self.conn.execute(
+                    "INSERT INTO report_jobs (委托单位, 样品名称, 接收日期, client, status, submitted_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", [*key, client, QUEUED, submitted_at])
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, worker):
+        """领取最早提交的一个排队任务
+
+        Args:
+            worker: 工作进程标识
+
+        Returns:
+            (任务 id, 批次键) 或 None（没有排队的任务）
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "UPDATE report_jobs SET status = ?, started_at = ?, worker = ? "
+                "WHERE id = (SELECT id FROM report_jobs WHERE status = ? ORDER BY id LIMIT 1) "
+                "RETURNING id, 委托单位, 样品名称, 接收日期", [RUNNING, _now(), worker, QUEUED]).fetchone()
+        if row is None:
+            return None
+        return row[0], tuple(row[1:])
+
+    def complete(self, job_id, output_path):
+        """记录任务完成及报告位置"""
+        self._finish(job_id, DONE, output_path=output_path)
+
+    def fail(self, job_id, error):
+        """记录任务失败原因"""
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id, status, output_path=None, error=None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE report_jobs SET status = ?, output_path = ?, error = ?, finished_at = ? WHERE id = ?",
+                [status, output_path, error, _now(), job_id])
+
+    def cancel(self, job_ids):
+        """取消尚在排队的任务（已开始的任务不受影响）
+
+        Returns:
+            实际取消的任务数
+        """
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE report_jobs SET status = ?, finished_at = ? WHERE status = ? AND id IN ({placeholders})",
+                [CANCELED, _now(), QUEUED, *job_ids])
+        return cursor.rowcount
+
+    def requeue_running(self):
+        """将处于运行中的任务放回队列（服务异常退出后重启时调用）
+
+        Returns:
+            放回队列的任务数
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE report_jobs SET status = ?, started_at = NULL, worker = NULL WHERE status = ?",
+                [QUEUED, RUNNING])
+        return cursor.rowcount
+
+    def get(self, job_ids):
+        """查询任务
+
+        Returns:
+            [{列名: 值}, ...]，按 id 排序，不存在的 id 不返回
+        """
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        rows = self.conn.execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM report_jobs WHERE id IN ({placeholders}) ORDER BY id",
+            list(job_ids)).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def counts(self):
+        """各状态的任务数 {状态: 数量}"""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM report_jobs GROUP BY status").fetchall())
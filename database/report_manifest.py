@@ -0,0 +1,63 @@
+"""
+报告生成清单：记录每个批次上次生成时的数据与模板哈希，用于跳过未变化的批次
+"""
+import datetime
+import hashlib
+import os
+import pandas as pd
+
+
+def batch_hash(df):
+    """计算批次数据的内容哈希（不含内部主键 id）
+
+    Args:
+        df: 批次数据 DataFrame
+
+    Returns:
+        十六进制哈希字符串
+    """
+    df = df.drop(columns=['id'], errors='ignore')
+    digest = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ReportManifest:
+    """报告生成清单，存储在 report_manifest 表中"""
+
+    def __init__(self, conn):
+        """初始化生成清单
+
+        Args:
+            conn: sqlite3 数据库连接（需已执行 ensure_schema）
+        """
+        self.conn = conn
+
+    def get(self, key):
+        """查询批次的清单记录
+
+        Returns:
+            (rows_hash, template_hash, output_path) 或 None
+        """
+        return self.conn.execute(
+            "SELECT rows_hash, template_hash, output_path FROM report_manifest "
+            "WHERE 委托单位 = ? AND 样品名称 = ? AND 接收日期 = ?", list(key)).fetchone()
+
+    def is_current(self, key, rows_hash, template_hash, output_path):
+        """判断批次的已有报告是否仍然有效：数据、模板、输出路径均未变化且文件存在"""
+        entry = self.get(key)
+        if entry is None:
+            return False
+        return (entry[0] == rows_hash and entry[1] == template_hash
+                and os.path.abspath(entry[2]) == os.path.abspath(output_path)
+                and os.path.exists(output_path))
+
+    def record(self, key, rows_hash, template_hash, output_path):
+        """记录一次成功的生成"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO report_manifest "
+                "(委托单位, 样品名称, 接收日期, rows_hash, template_hash, output_path, generated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [*key, rows_hash, template_hash, output_path,
+                 datetime.datetime.now().isoformat(timespec="seconds")])
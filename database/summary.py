@@ -0,0 +1,186 @@
+"""
+汇总表：批次索引、委托单位按月统计与样品合格情况，由 tools 表上的触发器随导入增量维护
+
+概览页与批次列表只读取这些汇总表，查询耗时不随台账行数增长。
+"""
+
+# 判定为不合格 / 结论不符的条件（结果为 0 或 1，可直接累加）
+_FAILED = "{row}.检测结论 IS '不合格'"
+_MISMATCHED = "{row}.结论不符 IS '是'"
+_MONTH = "substr({row}.接收日期, 1, 7)"
+
+# tools 表中影响汇总结果的列，更新其中任一列时重新计入
+SUMMARY_SOURCE_COLUMNS = ["委托单位", "样品名称", "接收日期", "检测结论", "结论不符"]
+
+SUMMARY_TABLES = {
+    # 批次索引：每个 (委托单位, 样品名称, 接收日期) 一行
+    "summary_batches": """
+        CREATE TABLE summary_batches (
+            委托单位 TEXT NOT NULL,
+            样品名称 TEXT NOT NULL,
+            接收日期 TEXT NOT NULL,
+            记录数 INTEGER NOT NULL,
+            不合格数 INTEGER NOT NULL,
+            结论不符数 INTEGER NOT NULL,
+            PRIMARY KEY (委托单位, 样品名称, 接收日期)
+        ) WITHOUT ROWID
+    """,
+    # 委托单位按接收月份（YYYY-MM）统计
+    "summary_monthly": """
+        CREATE TABLE summary_monthly (
+            委托单位 TEXT NOT NULL,
+            月份 TEXT NOT NULL,
+            批次数 INTEGER NOT NULL,
+            记录数 INTEGER NOT NULL,
+            不合格数 INTEGER NOT NULL,
+            PRIMARY KEY (委托单位, 月份)
+        ) WITHOUT ROWID
+    """,
+    # 各样品的合格情况
+    "summary_samples": """
+        CREATE TABLE summary_samples (
+            样品名称 TEXT PRIMARY KEY,
+            记录数 INTEGER NOT NULL,
+            不合格数 INTEGER NOT NULL,
+            结论不符数 INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """,
+}
+
+
+def _add_row(row):
+    """将 tools 表中的一行（new/old）计入汇总的语句"""
+    failed = _FAILED.format(row=row)
+    mismatched = _MISMATCHED.format(row=row)
+    month = _MONTH.format(row=row)
+    return f"""
+        INSERT INTO summary_batches (委托单位, 样品名称, 接收日期, 记录数, 不合格数, 结论不符数)
+        SELECT {row}.委托单位, {row}.样品名称, {row}.接收日期, 1, {failed}, {mismatched}
+        WHERE {row}.委托单位 IS NOT NULL AND {row}.样品名称 IS NOT NULL AND {row}.接收日期 IS NOT NULL
+        ON CONFLICT (委托单位, 样品名称, 接收日期) DO UPDATE SET
+            记录数 = 记录数 + 1, 不合格数 = 不合格数 + excluded.不合格数, 结论不符数 = 结论不符数 + excluded.结论不符数;
+        INSERT INTO summary_monthly (委托单位, 月份, 批次数, 记录数, 不合格数)
+        SELECT {row}.委托单位, {month}, 0, 1, {failed}
+        WHERE {row}.委托单位 IS NOT NULL AND {row}.接收日期 IS NOT NULL
+        ON CONFLICT (委托单位, 月份) DO UPDATE SET
+            记录数 = 记录数 + 1, 不合格数 = 不合格数 + excluded.不合格数;
+        INSERT INTO summary_samples (样品名称, 记录数, 不合格数, 结论不符数)
+        SELECT {row}.样品名称, 1, {failed}, {mismatched}
+        WHERE {row}.样品名称 IS NOT NULL
+        ON CONFLICT (样品名称) DO UPDATE SET
+            记录数 = 记录数 + 1, 不合格数 = 不合格数 + excluded.不合格数, 结论不符数 = 结论不符数 + excluded.结论不符数;
+    """
+
+
+def _remove_row(row):
+    """将 tools 表中的一行（old）从汇总中扣除的语句，计数归零的汇总行随之删除"""
+    failed = _FAILED.format(row=row)
+    mismatched = _MISMATCHED.format(row=row)
+    month = _MONTH.format(row=row)
+    batch = f"委托单位 = {row}.委托单位 AND 样品名称 = {row}.样品名称 AND 接收日期 = {row}.接收日期"
+    monthly = f"委托单位 = {row}.委托单位 AND 月份 = {month}"
+    return f"""
+        UPDATE summary_batches SET 记录数 = 记录数 - 1, 不合格数 = 不合格数 - ({failed}),
+            结论不符数 = 结论不符数 - ({mismatched}) WHERE {batch};
+        DELETE FROM summary_batches WHERE {batch} AND 记录数 <= 0;
+        UPDATE summary_monthly SET 记录数 = 记录数 - 1, 不合格数 = 不合格数 - ({failed}) WHERE {monthly};
+        DELETE FROM summary_monthly WHERE {monthly} AND 记录数 <= 0 AND 批次数 <= 0;
+        UPDATE summary_samples SET 记录数 = 记录数 - 1, 不合格数 = 不合格数 - ({failed}),
+            结论不符数 = 结论不符数 - ({mismatched}) WHERE 样品名称 = {row}.样品名称;
+        DELETE FROM summary_samples WHERE 样品名称 = {row}.样品名称 AND 记录数 <= 0;
+    """
+
+
+def create_summary_tables(conn):
+    """创建汇总表及维护触发器，并由现有数据生成汇总（调用方负责事务）
+
+    Args:
+        conn: sqlite3 数据库连接
+    """
+    for ddl in SUMMARY_TABLES.values():
+        conn.execute(ddl)
+
+    # 批次新增或删除时更新所在月份的批次数
+    conn.execute(f"""
+        CREATE TRIGGER summary_batches_insert AFTER INSERT ON summary_batches BEGIN
+            INSERT INTO summary_monthly (委托单位, 月份, 批次数, 记录数, 不合格数)
+            VALUES (new.委托单位, {_MONTH.format(row='new')}, 1, 0, 0)
+            ON CONFLICT (委托单位, 月份) DO UPDATE SET 批次数 = 批次数 + 1;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER summary_batches_delete AFTER DELETE ON summary_batches BEGIN
+            UPDATE summary_monthly SET 批次数 = 批次数 - 1
+            WHERE 委托单位 = old.委托单位 AND 月份 = {_MONTH.format(row='old')};
+            DELETE FROM summary_monthly
+            WHERE 委托单位 = old.委托单位 AND 月份 = {_MONTH.format(row='old')} AND 记录数 <= 0 AND 批次数 <= 0;
+        END
+    """)
+    conn.execute(f"CREATE TRIGGER tools_summary_insert AFTER INSERT ON tools BEGIN {_add_row('new')} END")
+    conn.execute(f"CREATE TRIGGER tools_summary_delete AFTER DELETE ON tools BEGIN {_remove_row('old')} END")
+    conn.execute(f"""
+        CREATE TRIGGER tools_summary_update AFTER UPDATE OF {', '.join(SUMMARY_SOURCE_COLUMNS)} ON tools BEGIN
+            {_remove_row('old')}
+            {_add_row('new')}
+        END
+    """)
+    rebuild_summary(conn)
+
+
+def rebuild_summary(conn):
+    """由 tools 表重新生成全部汇总（调用方负责事务）"""
+    for table in SUMMARY_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    # 先写入按月记录数（批次数为 0），再写入批次索引，由 summary_batches_insert 触发器累加批次数
+    conn.execute("""
+        INSERT INTO summary_monthly (委托单位, 月份, 批次数, 记录数, 不合格数)
+        SELECT 委托单位, substr(接收日期, 1, 7), 0, COUNT(*), SUM(检测结论 IS '不合格')
+        FROM tools WHERE 委托单位 IS NOT NULL AND 接收日期 IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO summary_batches (委托单位, 样品名称, 接收日期, 记录数, 不合格数, 结论不符数)
+        SELECT 委托单位, 样品名称, 接收日期, COUNT(*), SUM(检测结论 IS '不合格'), SUM(结论不符 IS '是')
+        FROM tools WHERE 委托单位 IS NOT NULL AND 样品名称 IS NOT NULL AND 接收日期 IS NOT NULL
+        GROUP BY 委托单位, 样品名称, 接收日期
+    """)
+    conn.execute("""
+        INSERT INTO summary_samples (样品名称, 记录数, 不合格数, 结论不符数)
+        SELECT 样品名称, COUNT(*), SUM(检测结论 IS '不合格'), SUM(结论不符 IS '是')
+        FROM tools WHERE 样品名称 IS NOT NULL
+        GROUP BY 样品名称
+    """)
+
+
+def has_summary(conn):
+    """数据库中是否已建立汇总表"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'summary_batches'").fetchone() is not None
+
+
+def overview_totals(conn):
+    """台账总体情况：(记录数, 批次数, 不合格数, 结论不符数)"""
+    records, failed, mismatched = conn.execute(
+        "SELECT COALESCE(SUM(记录数), 0), COALESCE(SUM(不合格数), 0), COALESCE(SUM(结论不符数), 0) "
+        "FROM summary_samples").fetchone()
+    batches = conn.execute("SELECT COALESCE(SUM(批次数), 0) FROM summary_monthly").fetchone()[0]
+    return records, batches, failed, mismatched
+
+
+def sample_stats(conn):
+    """各样品的记录数、不合格数与结论不符数，按记录数降序"""
+    return conn.execute(
+        "SELECT 样品名称, 记录数, 不合格数, 结论不符数 FROM summary_samples ORDER BY 记录数 DESC, 样品名称"
+    ).fetchall()
+
+
+def monthly_stats(conn, unit=None):
+    """委托单位按月的批次数、记录数与不合格数，按月份降序
+
+    Args:
+        conn: sqlite3 数据库连接
+        unit: 仅返回该委托单位，None 表示全部
+    """
+    where, params = ("WHERE 委托单位 = ?", [unit]) if unit is not None else ("", [])
+    return conn.execute(
+        f"SELECT 月份, 委托单位, 批次数, 记录数, 不合格数 FROM summary_monthly {where} "
+        "ORDER BY 月份 DESC, 委托单位", params).fetchall()
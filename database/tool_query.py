@@ -0,0 +1,132 @@
+"""
+tools 表查询条件：筛选、排序与分页均在 SQL 端完成
+"""
+from database.db_manager import quote_identifier, FTS_COLUMNS
+
+# trigram 全文索引至少需要 3 个字符才能匹配，更短的关键字使用 LIKE
+FTS_MIN_LENGTH = 3
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class ToolFilter:
+    """tools 表的筛选条件（委托单位、样品名称、接收日期范围、关键字、结论不符）"""
+
+    def __init__(self, unit=None, sample=None, date_from=None, date_to=None, text=None, use_fts=True,
+                 mismatch_only=False):
+        """初始化筛选条件
+
+        Args:
+            unit: 委托单位，None 表示不限
+            sample: 样品名称，None 表示不限
+            date_from: 接收日期下限（ISO 格式，含）
+            date_to: 接收日期上限（ISO 格式，含）
+            text: 关键字，在样品编号、报告编号、委托单位等文本列中做片段匹配
+            use_fts: 是否使用全文索引 tools_fts（数据库未建立索引时应为 False）
+            mismatch_only: 只保留检测结论与判定规则不符的记录
+        """
+        self.unit = unit
+        self.sample = sample
+        self.date_from = date_from
+        self.date_to = date_to
+        self.text = text.strip() if text and text.strip() else None
+        self.use_fts = use_fts
+        self.mismatch_only = mismatch_only
+
+    def matches_batch(self, key):
+        """批次是否可能包含符合条件的记录（只比较委托单位、样品名称与接收日期，关键字与结论不符按可能包含处理）
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)，接收日期为 ISO 格式
+        """
+        unit, sample, date = key
+        return ((self.unit is None or self.unit == unit) and (self.sample is None or self.sample == sample)
+                and (self.date_from is None or date >= self.date_from)
+                and (self.date_to is None or date <= self.date_to))
+
+    def _text_condition(self):
+        """关键字条件：优先走全文索引，短关键字或无索引时退回 LIKE"""
+        if self.use_fts and len(self.text) >= FTS_MIN_LENGTH:
+            # 整体作为一个短语查询，trigram 分词下等价于子串匹配
+            phrase = '"' + self.text.replace('"', '""') + '"'
+            return "id IN (SELECT rowid FROM tools_fts WHERE tools_fts MATCH ?)", [phrase]
+        pattern = _like_pattern(self.text)
+        conditions = [f"{quote_identifier(col)} LIKE ? ESCAPE '\\'" for col in FTS_COLUMNS]
+        return f"({' OR '.join(conditions)})", [pattern] * len(FTS_COLUMNS)
+
+    def where(self, conditions=()):
+        """生成 WHERE 子句（单位、样品、日期条件可命中 tools 表上的索引，关键字走全文索引）
+
+        Args:
+            conditions: 额外的固定条件
+
+        Returns:
+            (WHERE 子句或空字符串, 参数列表)
+        """
+        conditions = list(conditions)
+        params = []
+        for condition, value in (("委托单位 = ?", self.unit), ("样品名称 = ?", self.sample),
+                                 ("接收日期 >= ?", self.date_from), ("接收日期 <= ?", self.date_to)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if self.mismatch_only:
+            conditions.append("结论不符 = '是'")
+        if self.text is not None:
+            condition, text_params = self._text_condition()
+            conditions.append(condition)
+            params.extend(text_params)
+        clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return clause, params
+
+
+def count_query(tool_filter, with_batches=False):
+    """符合条件的记录总数查询
+
+    Args:
+        tool_filter: ToolFilter 筛选条件
+        with_batches: 是否同时统计涉及的批次数（第二列）
+
+    Returns:
+        (SQL, 参数列表)
+    """
+    where, params = tool_filter.where()
+    if with_batches:
+        # 任一批次键为空时拼接结果为 NULL，不计入批次数，与 BatchStore.list_batches 一致
+        batch = "委托单位 || char(31) || 样品名称 || char(31) || 接收日期"
+        return f"SELECT COUNT(*), COUNT(DISTINCT {batch}) FROM tools {where}", params
+    return f"SELECT COUNT(*) FROM tools {where}", params
+
+
+def page_query(tool_filter, order_by=None, descending=False, limit=500, offset=0):
+    """分页查询：按指定列排序后取一页记录
+
+    Args:
+        tool_filter: ToolFilter 筛选条件
+        order_by: 排序列名，None 表示按导入顺序
+        descending: 是否降序
+        limit: 每页行数
+        offset: 起始行
+
+    Returns:
+        (SQL, 参数列表)
+    """
+    where, params = tool_filter.where()
+    direction = "DESC" if descending else "ASC"
+    # 追加 id 使排序结果确定，翻页时不会出现重复或遗漏的行
+    order = f"{quote_identifier(order_by)} {direction}, id {direction}" if order_by else f"id {direction}"
+    return f"SELECT * FROM tools {where} ORDER BY {order} LIMIT ? OFFSET ?", params + [limit, offset]
+
+
+def distinct_query(column, tool_filter=None):
+    """某列的去重取值查询（用于筛选下拉框）
+
+    Returns:
+        (SQL, 参数列表)
+    """
+    column = quote_identifier(column)
+    where, params = (tool_filter or ToolFilter()).where([f"{column} IS NOT NULL"])
+    return f"SELECT DISTINCT {column} FROM tools {where} ORDER BY {column}", params
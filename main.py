@@ -1,14 +1,51 @@
 """
 绝缘工器具检测系统主程序
+
+启动耗时测量：
+    python main.py --startup-time
 """
+import time
+_START = time.perf_counter()
+
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFont
+from PySide6.QtCore import QTimer
 from ui.main_window import MainWindow
 
+
+def report_startup_time(marks):
+    """打印启动各阶段耗时，并在首个事件循环迭代后退出
+
+    Args:
+        marks: [(阶段名称, 结束时刻)]，时刻为 time.perf_counter() 的返回值
+    """
+    previous = _START
+    print("启动耗时：")
+    for name, moment in marks:
+        print(f"  {name:<16}{(moment - previous) * 1000:>8.1f} ms")
+        previous = moment
+    print(f"  {'合计':<16}{(previous - _START) * 1000:>8.1f} ms")
+    heavy = [name for name in ("pandas", "docxtpl", "openpyxl") if name in sys.modules]
+    print(f"  启动时已加载的重量级模块：{', '.join(heavy) if heavy else '无'}")
+
+
 if __name__ == "__main__":
+    # 打包为可执行文件后，进程池的子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
+    measure = "--startup-time" in sys.argv
+    marks = [("模块导入", time.perf_counter())]
     app = QApplication(sys.argv)
+    marks.append(("QApplication", time.perf_counter()))
     window = MainWindow()
+    marks.append(("主窗口构建", time.perf_counter()))
     window.show()
+    if measure:
+        def on_first_loop():
+            marks.append(("首次事件循环", time.perf_counter()))
+            report_startup_time(marks)
+            app.quit()
+        QTimer.singleShot(0, on_first_loop)
     sys.exit(app.exec())
@@ -0,0 +1,48 @@
+"""
+报告服务入口：集中渲染多台工作站提交的批次
+
+示例：
+    python report_service.py --db my_database.db --workers 4
+    python report_service.py --host 0.0.0.0 --port 8765 --output //server/reports
+
+客户端（界面中勾选“提交到报告服务”，或 service.client.ReportServiceClient）通过环境变量
+REPORT_SERVICE_URL 指定服务地址，默认 http://127.0.0.1:8765。
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from service.server import ReportService, DEFAULT_HOST, DEFAULT_PORT
+from utils.batch_runner import DEFAULT_MAX_WORKERS
+from utils.report_generator import REPORTS_DIR
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="工器具试验报告生成服务")
+    parser.add_argument("--db", default="my_database.db", help="数据库文件路径（默认 my_database.db）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址（默认 {DEFAULT_HOST}，仅本机）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口（默认 {DEFAULT_PORT}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"渲染工作进程数（默认 {DEFAULT_MAX_WORKERS}）")
+    parser.add_argument("--output", default=REPORTS_DIR, help="报告保存目录（默认 ./reports/）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = ReportService(args.db, args.output, workers=args.workers, host=args.host, port=args.port)
+    service.start()
+    print(f"报告服务已启动：{service.url}，{args.workers} 个工作进程，按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("正在停止报告服务，等待进行中的任务完成...")
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+报告服务客户端：提交批次、查询任务状态并下载生成的报告（只依赖标准库）
+"""
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import unquote
+from database.job_queue import FINISHED_STATES
+
+# 报告服务地址，可用环境变量 REPORT_SERVICE_URL 指定
+DEFAULT_SERVICE_URL = os.environ.get("REPORT_SERVICE_URL", "http://127.0.0.1:8765")
+
+
+class ServiceError(Exception):
+    """报告服务不可用或返回错误"""
+
+
+class ReportServiceClient:
+    """报告服务客户端"""
+
+    def __init__(self, base_url=DEFAULT_SERVICE_URL, timeout=10):
+        """初始化客户端
+
+        Args:
+            base_url: 报告服务地址，如 'http://127.0.0.1:8765'
+            timeout: 单次请求的超时时间（秒）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _open(self, method, path, payload=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json; charset=utf-8"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceError(f"报告服务返回错误（{e.code}）：{message}") from e
+        except OSError as e:
+            raise ServiceError(f"无法连接报告服务 {self.base_url}：{e}") from e
+
+    def _request(self, method, path, payload=None):
+        with self._open(method, path, payload) as response:
+            return json.loads(response.read())
+
+    def submit(self, keys, client=None):
+        """提交批次
+
+        Args:
+            keys: 批次键 (委托单位, 样品名称, 接收日期) 列表，接收日期为 ISO 格式
+            client: 提交者标识
+
+        Returns:
+            任务 id 列表
+        """
+        return self._request("POST", "/jobs", {"keys": [list(key) for key in keys], "client": client})["ids"]
+
+    def jobs(self, job_ids):
+        """查询任务状态，返回任务字典列表（字段见 database.job_queue.JOB_COLUMNS）"""
+        return self._request("GET", "/jobs?ids=" + ",".join(str(job_id) for job_id in job_ids))["jobs"]
+
+    def cancel(self, job_ids):
+        """取消尚在排队的任务，返回实际取消的数量"""
+        return self._request("POST", "/jobs/cancel", {"ids": list(job_ids)})["canceled"]
+
+    def status(self):
+        """服务状态：{'counts': {状态: 数量}, 'workers': 工作进程数}"""
+        return self._request("GET", "/status")
+
+    def download(self, job_id, output_dir):
+        """下载已完成任务的报告
+
+        Args:
+            job_id: 任务 id
+            output_dir: 保存目录，不存在时自动创建
+
+        Returns:
+            本地文件路径
+        """
+        with self._open("GET", f"/jobs/{job_id}/report") as response:
+            disposition = response.headers.get("Content-Disposition", "")
+            marker = "filename*=UTF-8''"
+            name = unquote(disposition.split(marker, 1)[1]) if marker in disposition else f"report_{job_id}.docx"
+            data = response.read()
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, os.path.basename(name))
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def wait(self, job_ids, on_update=None, is_canceled=None, poll_interval=1.0):
+        """轮询直到全部任务结束
+
+        Args:
+            job_ids: 任务 id 列表
+            on_update: 每有任务结束时的回调 on_update(job)
+            is_canceled: 返回 True 时取消仍在排队的任务并停止等待
+
+        Returns:
+            (任务字典列表, 是否已取消)
+        """
+        finished = {}
+        remaining = list(job_ids)
+        while remaining:
+            if is_canceled is not None and is_canceled():
+                self.cancel(remaining)
+                return list(finished.values()), True
+            jobs = self.jobs(remaining)
+            if len(jobs) < len(remaining):
+                missing = set(remaining) - {job["id"] for job in jobs}
+                raise ServiceError(f"报告服务中不存在这些任务：{sorted(missing)}")
+            for job in jobs:
+                if job["status"] in FINISHED_STATES:
+                    finished[job["id"]] = job
+                    if on_update is not None:
+                        on_update(job)
+            remaining = [job_id for job_id in remaining if job_id not in finished]
+            if remaining:
+                time.sleep(poll_interval)
+        return [finished[job_id] for job_id in job_ids], False
@@ -0,0 +1,246 @@
+"""
+报告服务：任务队列存储在 SQLite 中，由一组工作进程领取并渲染，客户端通过 HTTP/JSON 提交与查询
+
+接口：
+    POST /jobs              {"keys": [[委托单位, 样品名称, 接收日期], ...], "client": "..."} -> {"ids": [...]}
+    GET  /jobs?ids=1,2,3    -> {"jobs": [...]}
+    POST /jobs/cancel       {"ids": [...]} -> {"canceled": 取消数}
+    GET  /jobs/<id>/report  -> 报告文件（.docx）
+    GET  /status            -> {"counts": {状态: 数量}, "workers": 工作进程数}
+"""
+import json
+import multiprocessing
+import os
+import re
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+from database.db_manager import connect, ensure_schema
+from database.job_queue import JobQueue, DONE
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_REPORT_PATH = re.compile(r"^/jobs/(\d+)/report$")
+
+
+def worker_loop(db_path, output_dir, stop_event, poll_interval=0.5):
+    """工作进程：循环领取任务并渲染报告（必须为模块级函数以便在 Windows 下启动子进程）
+
+    Args:
+        db_path: 数据库文件路径
+        output_dir: 报告保存目录
+        stop_event: 设置后在当前任务完成时退出
+        poll_interval: 队列为空时的等待间隔（秒）
+    """
+    # 渲染相关模块只在工作进程中导入，HTTP 服务进程保持轻量
+    from database.batch_store import BatchStore
+    from utils.report_generator import ReportGenerator
+
+    conn = connect(db_path)
+    queue = JobQueue(conn)
+    store = BatchStore(conn)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        while not stop_event.is_set():
+            job = queue.claim(worker)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+            job_id, key = job
+            try:
+                value = store.fetch_batch(key)
+                if value.empty:
+                    raise ValueError("数据库中没有该批次")
+                report_path = ReportGenerator(key, value).generate_report(open_file=False, output_dir=output_dir)
+            except Exception as e:
+                queue.fail(job_id, str(e))
+            else:
+                queue.complete(job_id, os.path.abspath(report_path))
+    finally:
+        conn.close()
+
+
+class _RequestError(Exception):
+    """请求参数有误，以 400 返回"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP 请求处理：每个请求使用独立的数据库连接（ThreadingHTTPServer 每个请求一个线程）"""
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise _RequestError("请求内容不是有效的 JSON")
+
+    def _handle(self, action):
+        conn = connect(self.server.db_path)
+        try:
+            action(JobQueue(conn))
+        except _RequestError as e:
+            self._send_json({"error": str(e)}, status=400)
+        except Exception as e:
+            self._send_json({"error": str(e)}, status=500)
+        finally:
+            conn.close()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = _REPORT_PATH.match(url.path)
+        if url.path == "/status":
+            self._handle(lambda queue: self._send_json({"counts": queue.counts(),
+                                                        "workers": self.server.worker_count}))
+        elif url.path == "/jobs":
+            self._handle(lambda queue: self._send_json({"jobs": queue.get(_parse_ids(url.query))}))
+        elif match:
+            self._handle(lambda queue: self._send_report(queue, int(match.group(1))))
+        else:
+            self._send_json({"error": "未知的地址"}, status=404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/jobs":
+            self._handle(self._submit)
+        elif url.path == "/jobs/cancel":
+            self._handle(lambda queue: self._send_json(
+                {"canceled": queue.cancel(_validate_ids(self._read_json().get("ids")))}))
+        else:
+            self._send_json({"error": "未知的地址"}, status=404)
+
+    def _submit(self, queue):
+        payload = self._read_json()
+        keys = payload.get("keys")
+        if (not isinstance(keys, list) or not keys
+                or not all(isinstance(key, list) and len(key) == 3 and all(isinstance(part, str) for part in key)
+                           for key in keys)):
+            raise _RequestError("keys 应为 [[委托单位, 样品名称, 接收日期], ...]")
+        self._send_json({"ids": queue.submit([tuple(key) for key in keys], payload.get("client"))})
+
+    def _send_report(self, queue, job_id):
+        jobs = queue.get([job_id])
+        if not jobs:
+            self._send_json({"error": "任务不存在"}, status=404)
+            return
+        job = jobs[0]
+        if job["status"] != DONE or not os.path.exists(job["output_path"]):
+            self._send_json({"error": f"任务状态为 {job['status']}，没有可下载的报告"}, status=409)
+            return
+        with open(job["output_path"], "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+        self.send_header("Content-Disposition",
+                         f"attachment; filename*=UTF-8''{quote(os.path.basename(job['output_path']))}")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 默认每个请求输出一行日志，客户端轮询时过于频繁，只保留错误
+        pass
+
+    def log_error(self, format, *args):
+        print(f"报告服务请求出错: {format % args}")
+
+
+def _validate_ids(ids):
+    if not isinstance(ids, list) or not all(isinstance(job_id, int) for job_id in ids):
+        raise _RequestError("ids 应为整数列表")
+    return ids
+
+
+def _parse_ids(query):
+    values = parse_qs(query).get("ids", [""])[0]
+    try:
+        return [int(value) for value in values.split(",") if value]
+    except ValueError:
+        raise _RequestError("ids 应为逗号分隔的整数")
+
+
+class ReportService:
+    """报告服务：HTTP 接口 + 渲染工作进程池"""
+
+    def __init__(self, db_path, output_dir, workers=1, host=DEFAULT_HOST, port=DEFAULT_PORT, poll_interval=0.5):
+        """初始化报告服务
+
+        Args:
+            db_path: 数据库文件路径（服务端的台账，客户端提交的批次键在其中查找）
+            output_dir: 报告保存目录
+            workers: 渲染工作进程数
+            host: 监听地址，默认只接受本机连接；局域网共享时设为 '0.0.0.0'
+            port: 监听端口，为 0 时由系统分配
+            poll_interval: 工作进程在队列为空时的等待间隔（秒）
+        """
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.httpd = None
+        self._processes = []
+        self._stop_event = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """迁移数据库、恢复上次未完成的任务并启动工作进程与 HTTP 服务（不阻塞）"""
+        conn = connect(self.db_path)
+        try:
+            ensure_schema(conn)
+            requeued = JobQueue(conn).requeue_running()
+        finally:
+            conn.close()
+        if requeued:
+            print(f"已将上次未完成的 {requeued} 个任务放回队列")
+
+        self._stop_event = multiprocessing.Event()
+        for _ in range(self.workers):
+            process = multiprocessing.Process(target=worker_loop, daemon=True,
+                                              args=(self.db_path, self.output_dir, self._stop_event,
+                                                    self.poll_interval))
+            process.start()
+            self._processes.append(process)
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.db_path = self.db_path
+        self.httpd.worker_count = self.workers
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=30):
+        """停止接受请求，等待工作进程完成当前任务后退出"""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self._thread.join()
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,52 @@
+"""
+测试公共夹具
+"""
+import os
+import shutil
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.synthetic_ledger import generate_ledger
+from database.db_manager import connect, ensure_schema
+from utils.excel_handler import ExcelHandler
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """以临时目录为工作目录（模板、报告目录均为相对路径），并复制仓库中的报告模板"""
+    shutil.copytree(os.path.join(REPO_DIR, "templates"), tmp_path / "templates")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """已建立当前版本结构的临时数据库连接"""
+    conn = connect(str(tmp_path / "test.db"))
+    ensure_schema(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def ledger():
+    """约 200 行、覆盖全部样品种类的合成台账（Excel 显示格式）"""
+    return generate_ledger(200, clients=4, seed=1)
+
+
+@pytest.fixture
+def ledger_file(tmp_path, ledger):
+    """写入 Excel 文件的合成台账"""
+    path = tmp_path / "台账.xlsx"
+    ledger.to_excel(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def loaded_conn(conn, ledger_file):
+    """已整表导入合成台账的临时数据库连接"""
+    ExcelHandler(ledger_file, conn).handler(mode="replace")
+    return conn
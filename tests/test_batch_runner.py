@@ -0,0 +1,139 @@
+import io
+import os
+import zipfile
+import pandas as pd
+import pytest
+from benchmarks.synthetic_ledger import generate_ledger
+from database.batch_store import BatchStore
+from database.report_manifest import ReportManifest
+from utils import batch_runner
+from utils.batch_runner import BatchResult, BatchRunner, _render_chunk, _merge_batch, _slice_batch
+from utils.excel_handler import ExcelHandler
+from utils.output_sinks import MemorySink
+from utils.report_generator import ReportGenerator
+
+
+def test_batch_name_matches_report_name():
+    key = ("甲", "绝缘靴", "2025-03-04")
+    assert BatchResult(key).batch_name == "甲_绝缘靴_2025.3.4"
+    assert ReportGenerator(key, pd.DataFrame()).get_report_name() == "甲_绝缘靴_2025.3.4试验报告.docx"
+
+
+def test_cancel_stops_pending_batches(workdir):
+    # 模板不存在的批次会立即失败，取消时大部分批次应尚未开始
+    batches = [(("甲", "无模板", f"2025.3.{day}"), pd.DataFrame({"样品编号": ["1"]})) for day in range(1, 201)]
+    finished = []  # 收到第一个结果后即取消
+    results, was_canceled = BatchRunner(max_workers=1).run(
+        batches, on_result=lambda *args: finished.append(args), is_canceled=lambda: bool(finished))
+    assert was_canceled
+    assert 0 < len(results) < len(batches)
+    assert all(not result.success for result in results)
+
+
+def _renderable_batches(conn, count=3):
+    """取几个有可用模板的批次"""
+    store = BatchStore(conn)
+    keys = [key for key, _ in store.list_batches() if key[1] in ("绝缘靴", "绝缘手套", "验电器")][:count]
+    return [(key, store.fetch_batch(key)) for key in keys]
+
+
+def test_manifest_skips_unchanged_batches(workdir, loaded_conn):
+    batches = _renderable_batches(loaded_conn)
+    (workdir / "out").mkdir()
+    runner = BatchRunner(max_workers=2, open_files=False, output_dir=str(workdir / "out"),
+                         manifest=ReportManifest(loaded_conn))
+    results, _ = runner.run(batches)
+    assert [result.error for result in results] == [None] * len(batches)
+    assert not any(result.skipped for result in results)
+
+    changed_key, changed = batches[0]
+    changed = changed.copy()
+    changed.loc[changed.index[0], "备注"] = "复检"
+    results, _ = runner.run([(changed_key, changed), *batches[1:]])
+    skipped = {result.key: result.skipped for result in results}
+    assert skipped == {key: key != changed_key for key, _ in batches}
+
+
+def test_reports_go_to_the_sink(workdir, loaded_conn):
+    batches = _renderable_batches(loaded_conn)
+    sink = MemorySink()
+    results, _ = BatchRunner(max_workers=2, sink=sink).run(batches)
+    names = [ReportGenerator(key, value).get_report_name() for key, value in batches]
+    assert sorted(result.report_path for result in results) == sorted(f"memory://{name}" for name in names)
+    assert sorted(sink.reports) == sorted(names)
+    assert all(data.startswith(b"PK") for data in sink.reports.values())
+    assert not (workdir / "reports").exists()
+
+
+
+def test_failed_save_is_not_recorded(workdir, loaded_conn):
+    batches = _renderable_batches(loaded_conn, count=2)
+    output_dir = workdir / "out"
+    blocked = ReportGenerator(*batches[0]).get_report_name()
+    (output_dir / blocked).mkdir(parents=True)  # 与报告同名的目录使保存失败
+    manifest = ReportManifest(loaded_conn)
+    results, _ = BatchRunner(max_workers=2, output_dir=str(output_dir), manifest=manifest).run(batches)
+
+    errors = {result.key: result.error for result in results}
+    assert errors[batches[0][0]].startswith("报告保存失败：") and errors[batches[1][0]] is None
+    assert manifest.get(batches[0][0]) is None
+    saved_path = os.path.join(str(output_dir), ReportGenerator(*batches[1]).get_report_name())
+    assert manifest.get(batches[1][0])[2] == saved_path
+
+BATCH_ROWS = 230
+
+
+def _parts(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+@pytest.fixture(params=["绝缘靴", "验电器"])
+def large_batch(request, tmp_path, conn, workdir):
+    """一个超过拆分阈值的批次（验电器的试验数据为列表形式）"""
+    ledger = generate_ledger(BATCH_ROWS * 10, clients=1, seed=2)
+    rows = ledger[ledger["样品名称"] == request.param].head(BATCH_ROWS)
+    rows = rows.assign(委托单位=rows["委托单位"].iloc[0], 接收日期=rows["接收日期"].iloc[0])
+    path = tmp_path / "大批次.xlsx"
+    rows.to_excel(path, index=False)
+    ExcelHandler(str(path), conn).handler(mode="replace")
+    (key, value), = BatchStore(conn).iter_batches()
+    assert len(value) == BATCH_ROWS
+    return key, value
+
+
+def test_split_render_matches_single(large_batch):
+    key, value = large_batch
+    chunks = [_render_chunk(key, _slice_batch(value, start, start + 100), start)[0]
+              for start in range(0, len(value), 100)]
+    fragments = ["".join(chunk[loop] for chunk in chunks) for loop in range(len(chunks[0]))]
+    _, merged, _ = _merge_batch(key, _slice_batch(value, 0, 1), fragments)
+    assert _parts(merged) == _parts(ReportGenerator(key, value).render_bytes())
+
+
+def test_runner_splits_large_batches(large_batch):
+    key, value = large_batch
+    sink = MemorySink()
+    results, canceled = BatchRunner(max_workers=2, sink=sink, split_threshold=100, chunk_rows=80).run([(key, value)])
+    assert not canceled and [result.error for result in results] == [None]
+    generator = ReportGenerator(key, value)
+    assert _parts(sink.reports[generator.get_report_name()]) == _parts(generator.render_bytes())
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_single_large_batch_splits_only_on_a_parallel_pool(large_batch, monkeypatch, max_workers):
+    key, value = large_batch
+    splits = []
+
+    class RecordingSplit(batch_runner._SplitBatch):
+        def __init__(self, *args):
+            super().__init__(*args)
+            splits.append(self)
+
+    monkeypatch.setattr(batch_runner, "_SplitBatch", RecordingSplit)
+    assert len(value) > batch_runner.SPLIT_THRESHOLD
+    runner = BatchRunner(max_workers=max_workers, sink=MemorySink())
+    results, _ = runner.run([(key, value)], total=1)
+    assert [result.error for result in results] == [None]
+    assert runner._pool_size == max_workers
+    assert bool(splits) == (max_workers > 1)  # 只有一个工作进程时拆分没有收益
@@ -0,0 +1,16 @@
+import pytest
+from cli import parse_args
+
+
+def test_dates_are_parsed_to_iso():
+    args = parse_args(["--from", "2025.3.1", "--to", "2025-03-31"])
+    assert (args.date_from, args.date_to) == ("2025-03-01", "2025-03-31")
+    assert parse_args([]).date_from is None
+
+
+@pytest.mark.parametrize("value", ["2025.13.1", "三月", "2025.2.30"])
+def test_bad_dates_are_usage_errors(value, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(["--from", value])
+    assert exit_info.value.code == 2
+    assert f"无法识别的日期：{value}" in capsys.readouterr().err
@@ -0,0 +1,114 @@
+import datetime
+import sqlite3
+import pandas as pd
+from database.batch_store import BatchStore
+from database.db_manager import (SCHEMA_VERSION, BUSY_TIMEOUT_MS, to_storage, from_storage, parse_test_data,
+                                 decode_test_data, ensure_schema, _table_columns)
+from utils.excel_handler import ExcelHandler
+from utils.rules import VERDICT_COLUMN
+
+LEDGER = pd.DataFrame({
+    "样品名称": ["绝缘靴", "验电器", "绝缘杆"],
+    "样品编号": ["jyx-001", "ydq-001", "jyg-001"],
+    "接收日期": ["2025.2.14", "2025.3.4", "2025.12.1"],
+    "试验电压": ["15kV", "10kV", None],
+    "试验数据": ["1.04", "[2.4,2.3]", None],
+    "检测日期": ["2025.2.15", "2025.3.5", "2025.12.2"],
+    "委托单位": ["甲", "乙", "乙"],
+})
+
+
+def test_storage_round_trip():
+    stored = to_storage(LEDGER)
+    assert stored["接收日期"].tolist() == ["2025-02-14", "2025-03-04", "2025-12-01"]
+    assert stored["试验电压"].tolist()[:2] == [15.0, 10.0]
+    pd.testing.assert_frame_equal(from_storage(stored), LEDGER)
+
+
+def test_to_storage_normalizes_dates_and_voltages():
+    df = pd.DataFrame({"接收日期": ["2025.2.14", datetime.date(2025, 3, 1), "2025年3月4日", "待定"],
+                       "试验电压": ["15kV", "500V", 8, "未知"]})
+    stored = to_storage(df)
+    assert stored["接收日期"].tolist() == ["2025-02-14", "2025-03-01", "2025-03-04", "待定"]
+    assert stored["试验电压"].tolist() == [15.0, 0.5, 8.0, "未知"]
+    assert df["接收日期"].iloc[0] == "2025.2.14"  # 不修改传入的数据
+
+
+def test_legacy_table_is_migrated(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    LEDGER.assign(附注="旧列").to_sql("tools", conn, index=False)
+    ensure_schema(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = _table_columns(conn, "tools")
+    assert columns[0] == "id" and "附注" in columns
+    rows = conn.execute("SELECT 样品编号, 接收日期, 试验电压, 附注 FROM tools ORDER BY id").fetchall()
+    assert rows == [("jyx-001", "2025-02-14", 15.0, "旧列"), ("ydq-001", "2025-03-04", 10.0, "旧列"),
+                    ("jyg-001", "2025-12-01", None, "旧列")]
+    assert conn.execute("SELECT tool_id, seq, value, text FROM measurements ORDER BY tool_id, seq").fetchall() == [
+        (1, 0, 1.04, "1.04"), (2, 1, 2.4, "2.4"), (2, 2, 2.3, "2.3")]
+    conn.close()
+
+
+def test_connections_use_wal(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == BUSY_TIMEOUT_MS
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_deleting_a_tool_deletes_its_measurements(loaded_conn):
+    tool_id = loaded_conn.execute("SELECT tool_id FROM measurements LIMIT 1").fetchone()[0]
+    with loaded_conn:
+        loaded_conn.execute("DELETE FROM tools WHERE id = ?", (tool_id,))
+    assert loaded_conn.execute("SELECT COUNT(*) FROM measurements WHERE tool_id = ?", (tool_id,)).fetchone()[0] == 0
+
+
+def test_version_10_removes_orphan_measurements(tmp_path, ledger_file):
+    # 未开启外键约束的旧连接删除记录后留下的孤立测量项，升级时清理
+    conn = sqlite3.connect(tmp_path / "old.db")
+    ensure_schema(conn)
+    ExcelHandler(ledger_file, conn).handler(mode="replace")
+    tool_id = conn.execute("SELECT tool_id FROM measurements LIMIT 1").fetchone()[0]
+    with conn:
+        conn.execute("DELETE FROM tools WHERE id = ?", (tool_id,))
+    conn.execute("PRAGMA user_version = 9")
+    assert conn.execute("SELECT COUNT(*) FROM measurements WHERE tool_id = ?", (tool_id,)).fetchone()[0] > 0
+    ensure_schema(conn)
+    assert conn.execute("SELECT COUNT(*) FROM measurements WHERE tool_id NOT IN (SELECT id FROM tools)"
+                        ).fetchone()[0] == 0
+    conn.close()
+
+
+def test_ensure_schema_is_idempotent(conn):
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = _table_columns(conn, "tools")
+    ensure_schema(conn)
+    assert _table_columns(conn, "tools") == columns
+
+
+def test_parse_test_data():
+    assert parse_test_data("1.04") == [(0, 1.04, "1.04")]
+    assert parse_test_data("[2.4，无启动, 3]") == [(1, 2.4, "2.4"), (2, None, "无启动"), (3, 3, "3")]
+    assert parse_test_data(None) == []
+    assert parse_test_data("  ") == []
+    assert decode_test_data("[1176,980]") == [1176, 980]
+    assert decode_test_data("无启动") == "无启动"
+
+
+def test_imported_measurements_match_test_data(loaded_conn):
+    store = BatchStore(loaded_conn)
+    for key, _ in store.list_batches():
+        value = store.fetch_batch(key)
+        measurements = value.attrs["measurements"]
+        for tool_id, raw in zip(value["id"], value["试验数据"]):
+            assert measurements.get(tool_id, raw) == decode_test_data(raw)
+
+
+def test_version_9_judges_list_valued_test_data(loaded_conn):
+    # 旧版本未能判定列表形式的试验数据，升级时按现行规则重新计算
+    expected = loaded_conn.execute(f"SELECT id, {VERDICT_COLUMN} FROM tools ORDER BY id").fetchall()
+    loaded_conn.execute(f"UPDATE tools SET {VERDICT_COLUMN} = NULL WHERE 试验数据 LIKE '[%'")
+    loaded_conn.execute("PRAGMA user_version = 8")
+    loaded_conn.commit()
+    ensure_schema(loaded_conn)
+    assert loaded_conn.execute(f"SELECT id, {VERDICT_COLUMN} FROM tools ORDER BY id").fetchall() == expected
@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+from database.batch_store import BatchChanges, BatchStore
+from database.db_manager import parse_test_data, to_storage
+from utils.excel_handler import ExcelHandler, MultiExcelImporter, collect_excel_files
+
+
+def _batch_key(row):
+    stored = to_storage(pd.DataFrame([row]))
+    return tuple(stored[["委托单位", "样品名称", "接收日期"]].iloc[0])
+
+
+def _write(df, path):
+    df.to_excel(path, index=False)
+    return str(path)
+
+
+def test_multi_file_import_keeps_first_duplicate(tmp_path, conn, ledger):
+    first = _write(ledger.iloc[:120], tmp_path / "1.xlsx")
+    # 第二个文件与第一个文件重叠 40 行，重叠的行备注不同，应保留第一个文件中的行
+    second = _write(ledger.iloc[80:].assign(备注="第二个文件"), tmp_path / "2.xlsx")
+    broken = tmp_path / "3.xlsx"
+    broken.write_bytes(b"not a workbook")
+
+    importer = MultiExcelImporter([first, second, str(broken)], conn, max_workers=2)
+    result = importer.handler()
+
+    assert result.inserted == len(ledger)
+    stats = {stat.file_path: stat for stat in importer.file_stats}
+    assert (stats[first].rows, stats[first].duplicates) == (120, 0)
+    assert (stats[second].rows, stats[second].duplicates) == (120, 40)
+    assert stats[str(broken)].error is not None
+    remarks = pd.read_sql("SELECT 样品编号, 备注 FROM tools ORDER BY id", conn)
+    assert remarks["样品编号"].tolist() == ledger["样品编号"].tolist()
+    assert remarks["备注"].notna().sum() == len(ledger) - 120
+
+
+def test_collect_excel_files(tmp_path):
+    for name in ("b.xlsx", "a.xls", "~$a.xlsx", "说明.txt"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "子目录").mkdir()
+    single = tmp_path / "子目录" / "c.xlsm"
+    single.write_bytes(b"")
+    files = collect_excel_files([str(tmp_path), str(single), str(tmp_path / "b.xlsx")])
+    assert files == sorted([str(tmp_path / "a.xls"), str(tmp_path / "b.xlsx"), str(single)])
+
+
+def test_compare():
+    changes = BatchChanges.compare({"a": 2, "b": 1, "c": 0}, {"a": 3, "c": 4, "d": 0})
+    assert (changes.added, changes.changed, changes.removed) == ({"c"}, {"a"}, {"b"})
+    assert changes.counts == {"a": 3, "c": 4}
+    assert BatchChanges.compare({"a": 1}, {"a": 1}).changed == {"a"}  # 记录数不变也可能内容变化
+    assert not BatchChanges()
+    assert BatchChanges(unbatched=True)
+
+
+def test_incremental_import_reports_changed_batches(tmp_path, conn, ledger):
+    result = ExcelHandler(_write(ledger, tmp_path / "1.xlsx"), conn).handler()
+    assert (result.inserted, result.updated, result.unchanged) == (len(ledger), 0, 0)
+    assert result.changes.added == set(BatchStore(conn).batch_counts())
+
+    edited = ledger.copy()
+    edited.loc[0, "备注"] = "复检"                      # 第一批内容变化
+    moved = edited.index[-1]
+    old_key = _batch_key(edited.loc[moved])
+    edited.loc[moved, "接收日期"] = "2024.12.31"         # 移到一个新批次
+    result = ExcelHandler(_write(edited, tmp_path / "2.xlsx"), conn).handler()
+
+    assert (result.inserted, result.updated) == (0, 2)
+    assert result.changes.added == {_batch_key(edited.loc[moved])}
+    assert result.changes.changed | result.changes.removed == {_batch_key(edited.loc[0]), old_key}
+    assert not result.changes.unbatched
+
+    unchanged = ExcelHandler(_write(edited, tmp_path / "3.xlsx"), conn).handler()
+    assert unchanged.unchanged == len(edited) and not unchanged.changes
+
+
+def test_replace_reports_all_batches(tmp_path, loaded_conn, ledger):
+    before = set(BatchStore(loaded_conn).batch_counts())
+    result = ExcelHandler(_write(ledger.iloc[:50], tmp_path / "new.xlsx"), loaded_conn).handler(mode="replace")
+    after = set(BatchStore(loaded_conn).batch_counts())
+    assert result.changes.removed == before - after
+    assert result.changes.added | result.changes.changed == after
+
+
+def test_rows_outside_any_batch_are_flagged(tmp_path, conn, ledger):
+    ExcelHandler(_write(ledger, tmp_path / "1.xlsx"), conn).handler()
+    extra = ledger.iloc[:1].assign(样品编号="syn-extra", 委托单位=None)
+    result = ExcelHandler(_write(pd.concat([ledger, extra]), tmp_path / "2.xlsx"), conn).handler()
+    assert result.inserted == 1
+    assert result.changes.unbatched and not result.changes.keys
+
+
+@pytest.mark.parametrize("fail", ["cancel", "error"])
+def test_replace_rolls_back(tmp_path, loaded_conn, ledger, fail):
+    before = loaded_conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0]
+    path = _write(ledger.iloc[:50], tmp_path / "new.xlsx")
+    handler = ExcelHandler(path, loaded_conn)
+
+    def on_progress(processed, estimated):
+        raise RuntimeError("写入失败")
+
+    if fail == "cancel":
+        chunks = iter([False, True])
+        result = handler.handler(mode="replace", chunk_size=20, is_canceled=lambda: next(chunks))
+        assert result.canceled and result.inserted == 0 and not result.changes
+    else:
+        with pytest.raises(RuntimeError):
+            handler.handler(mode="replace", chunk_size=20, on_progress=on_progress)
+    assert loaded_conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0] == before
+    assert loaded_conn.execute("SELECT SUM(记录数) FROM summary_batches").fetchone()[0] == before
+
+
+def test_measurements_follow_inserted_ids(tmp_path, conn, ledger):
+    ExcelHandler(_write(ledger.iloc[:100], tmp_path / "1.xlsx"), conn).handler()
+    with conn:
+        # 删除部分记录并留下一段 id 空缺，之后插入的记录仍应对应各自的测量项
+        conn.execute("DELETE FROM tools WHERE id > 90 OR id BETWEEN 20 AND 30")
+        conn.execute("INSERT INTO tools (id, 样品编号) VALUES (500, 'syn-gap')")
+    ExcelHandler(_write(ledger, tmp_path / "2.xlsx"), conn).handler()
+
+    rows = conn.execute("SELECT id, 试验数据 FROM tools WHERE 试验数据 IS NOT NULL").fetchall()
+    stored = {}
+    for tool_id, seq, value, text in conn.execute("SELECT tool_id, seq, value, text FROM measurements"):
+        stored.setdefault(tool_id, []).append((seq, value, text))
+    assert len(rows) == len(ledger)
+    assert {tool_id: parse_test_data(raw) for tool_id, raw in rows} == {
+        tool_id: sorted(items) for tool_id, items in stored.items()}
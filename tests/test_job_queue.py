@@ -0,0 +1,43 @@
+import threading
+from database.db_manager import connect
+from database.job_queue import JobQueue, QUEUED, RUNNING, DONE, CANCELED
+
+KEYS = [("甲", "绝缘靴", f"2025-03-{day:02d}") for day in range(1, 21)]
+
+
+def test_claim_in_submission_order(conn):
+    queue = JobQueue(conn)
+    ids = queue.submit(KEYS[:3], client="工作站")
+    assert queue.claim("w1") == (ids[0], KEYS[0])
+    assert queue.cancel(ids[1:2]) == 1
+    assert queue.claim("w1") == (ids[2], KEYS[2])
+    assert queue.claim("w1") is None
+
+    queue.complete(ids[0], "/tmp/报告.docx")
+    statuses = {job["id"]: job["status"] for job in queue.get(ids)}
+    assert statuses == {ids[0]: DONE, ids[1]: CANCELED, ids[2]: RUNNING}
+    assert queue.requeue_running() == 1
+    assert queue.counts() == {DONE: 1, CANCELED: 1, QUEUED: 1}
+
+
+def test_concurrent_claims_are_exclusive(tmp_path, conn):
+    ids = JobQueue(conn).submit(KEYS)
+    claimed = []
+    lock = threading.Lock()
+
+    def work(name):
+        worker_conn = connect(str(tmp_path / "test.db"))
+        queue = JobQueue(worker_conn)
+        while (job := queue.claim(name)) is not None:
+            with lock:
+                claimed.append(job[0])
+        worker_conn.close()
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == ids
+    assert JobQueue(conn).counts() == {RUNNING: len(KEYS)}
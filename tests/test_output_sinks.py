@@ -0,0 +1,47 @@
+import os
+import zipfile
+import pytest
+from utils.output_sinks import MemorySink, DirectorySink, ZipBundleSink
+
+KEY_A = ("甲", "绝缘靴", "2025-03-04")
+KEY_B = ("乙", "绝缘靴", "2025-03-04")
+
+
+def test_memory_sink():
+    sink = MemorySink()
+    assert sink.write(KEY_A, "a.docx", b"a") == "memory://a.docx"
+    assert sink.reports == {"a.docx": b"a"} and not sink.persistent
+
+
+def test_directory_sink_writes_behind(tmp_path):
+    output_dir = tmp_path / "reports"
+    with DirectorySink(str(output_dir), max_pending=2) as sink:
+        paths = [sink.write(KEY_A, f"{i}.docx", bytes([i])) for i in range(5)]
+    assert paths == [os.path.join(str(output_dir), f"{i}.docx") for i in range(5)]
+    for i, path in enumerate(paths):
+        with open(path, "rb") as f:
+            assert f.read() == bytes([i])
+
+
+def test_directory_sink_reports_write_errors(tmp_path):
+    (tmp_path / "占用.docx").mkdir()  # 与报告同名的目录使写入失败
+    with DirectorySink(str(tmp_path)) as sink:
+        failed = sink.submit(KEY_A, "占用.docx", b"a")
+        saved = sink.submit(KEY_A, "正常.docx", b"b")
+        with pytest.raises(OSError):
+            sink.write(KEY_A, "占用.docx", b"c")
+    with pytest.raises(OSError):
+        failed.result()
+    assert saved.result() == str(tmp_path / "正常.docx")
+    assert (tmp_path / "正常.docx").read_bytes() == b"b"
+
+
+def test_zip_bundle_sink_groups_by_unit(tmp_path):
+    with ZipBundleSink(str(tmp_path)) as sink:
+        location = sink.write(KEY_A, "a1.docx", b"1")
+        sink.write(KEY_B, "b1.docx", b"2")
+        sink.write(KEY_A, "a2.docx", b"3")
+    assert location == f"{sink.bundle_path('甲')}::a1.docx"
+    assert sink.bundle_paths == [sink.bundle_path("甲"), sink.bundle_path("乙")]
+    with zipfile.ZipFile(sink.bundle_path("甲")) as bundle:
+        assert {name: bundle.read(name) for name in bundle.namelist()} == {"a1.docx": b"1", "a2.docx": b"3"}
@@ -0,0 +1,14 @@
+import math
+from database.batch_store import BatchStore
+from utils.report_generator import ReportGenerator
+
+
+def test_empty_cells_render_as_blanks(workdir, loaded_conn):
+    store = BatchStore(loaded_conn)
+    key = next(key for key, _ in store.list_batches() if key[1] == "验电器")
+    value = store.fetch_batch(key)
+    value.loc[value.index[0], ["备注", "外观检查"]] = None
+    rows = ReportGenerator(key, value).build_context()["rows"]
+    assert rows[0]["备注"] == "" and rows[0]["外观检查"] == ""
+    for row in rows:
+        assert not any(item is None or (isinstance(item, float) and math.isnan(item)) for item in row.values())
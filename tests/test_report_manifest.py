@@ -0,0 +1,42 @@
+from database.batch_store import BatchStore
+from database.report_manifest import ReportManifest, batch_hash
+
+
+def _first_batch(conn):
+    key = BatchStore(conn).list_batches()[0][0]
+    return key, BatchStore(conn).fetch_batch(key)
+
+
+def test_batch_hash_is_stable(loaded_conn):
+    key, first = _first_batch(loaded_conn)
+    _, second = _first_batch(loaded_conn)
+    assert batch_hash(first) == batch_hash(second)
+    # 内部主键不参与哈希
+    assert batch_hash(first) == batch_hash(first.assign(id=first["id"] + 1000))
+
+
+def test_batch_hash_detects_changes(loaded_conn):
+    _, value = _first_batch(loaded_conn)
+    digest = batch_hash(value)
+
+    changed = value.copy()
+    changed.loc[changed.index[0], "备注"] = "复检"
+    assert batch_hash(changed) != digest
+    assert batch_hash(value.iloc[::-1]) != digest
+    assert batch_hash(value.iloc[1:]) != digest
+    assert batch_hash(value.rename(columns={"备注": "说明"})) != digest
+
+
+def test_is_current(tmp_path, conn):
+    manifest = ReportManifest(conn)
+    key = ("甲", "绝缘靴", "2025-03-04")
+    report = tmp_path / "报告.docx"
+    assert not manifest.is_current(key, "rows", "template", str(report))
+
+    manifest.record(key, "rows", "template", str(report))
+    assert not manifest.is_current(key, "rows", "template", str(report))  # 报告文件不存在
+    report.write_bytes(b"")
+    assert manifest.is_current(key, "rows", "template", str(report))
+    assert not manifest.is_current(key, "rows2", "template", str(report))
+    assert not manifest.is_current(key, "rows", "template2", str(report))
+    assert not manifest.is_current(key, "rows", "template", str(tmp_path / "其它.docx"))
@@ -0,0 +1,58 @@
+import pandas as pd
+from utils.rules import evaluate, PASS, FAIL, VERDICT_COLUMN, REASON_COLUMN, MISMATCH_COLUMN
+
+
+def _evaluate(sample, voltage, data, conclusion=None):
+    df = pd.DataFrame({"样品名称": sample, "试验电压": voltage, "试验数据": data, "检测结论": conclusion})
+    return evaluate(df)
+
+
+def _values(series):
+    """列的取值列表，缺失值统一为 None"""
+    return [None if pd.isna(value) else value for value in series]
+
+
+def test_limit_rule():
+    result = _evaluate("绝缘靴", 15.0, ["7.5", "7.6", None], "合格")
+    assert _values(result[VERDICT_COLUMN]) == [PASS, FAIL, None]
+    assert _values(result[MISMATCH_COLUMN]) == ["否", "是", None]
+    assert _values(result[REASON_COLUMN]) == [None, "泄漏电流 7.6mA 超过限值 7.5mA", "泄漏电流缺失或不是数值"]
+    assert _evaluate("绝缘靴", 8.0, ["1.0"])[REASON_COLUMN].iloc[0] == "试验电压无对应限值"
+
+
+def test_limit_rule_checks_largest_reading():
+    result = _evaluate("绝缘靴", 15.0, ["[1.2,8.0]", "[1.2,2.0]"], "合格")
+    assert _values(result[VERDICT_COLUMN]) == [FAIL, PASS]
+    assert _values(result[MISMATCH_COLUMN]) == ["是", "否"]
+    assert result[REASON_COLUMN].iloc[0] == "泄漏电流 8mA 超过限值 7.5mA"
+
+
+def test_start_voltage_rule():
+    # 10kV 验电器的启动电压范围为 1.5~4kV
+    result = _evaluate("验电器", 10.0, ["2.0", "1.2", "4.1", "无启动", "?"])
+    assert _values(result[VERDICT_COLUMN]) == [PASS, FAIL, FAIL, FAIL, None]
+    assert result[REASON_COLUMN].iloc[1] == "启动电压 1.2kV 不在 1.5~4kV 范围内"
+    assert result[REASON_COLUMN].iloc[3] == "无启动"
+    assert result[REASON_COLUMN].iloc[4] == "启动电压缺失或不是数值"
+
+
+
+def test_start_voltage_rule_checks_every_reading():
+    data = ["[2.4,2.3]", "[2.4,1.2]", "[4.1,2.0]", "[2.4,无启动]", "[2.4,?]", "[3]"]
+    result = _evaluate("验电器", 10.0, data)
+    assert _values(result[VERDICT_COLUMN]) == [PASS, FAIL, FAIL, FAIL, None, PASS]
+    assert result[REASON_COLUMN].iloc[1] == "启动电压 1.2kV 不在 1.5~4kV 范围内"
+    assert result[REASON_COLUMN].iloc[2] == "启动电压 4.1kV 不在 1.5~4kV 范围内"
+    assert result[REASON_COLUMN].iloc[3] == "无启动"
+
+
+def test_appearance_overrides_and_unknown_samples():
+    df = pd.DataFrame({"样品名称": ["绝缘靴", "绝缘杆", "绝缘杆"], "试验电压": [15.0, None, None],
+                       "试验数据": ["1.0", None, None], "外观检查": ["损坏", "符合", "不合格"]})
+    assert _values(evaluate(df)[VERDICT_COLUMN]) == [FAIL, None, FAIL]
+
+
+def test_mismatch_compares_recorded_result():
+    df = pd.DataFrame({"样品名称": "绝缘靴", "试验电压": 15.0, "试验数据": ["1.0", "9.0", "1.0"],
+                       "检测结论": [None, None, "合格"], "试验结果": ["通过", "通过", "不通过"]})
+    assert _values(evaluate(df)[MISMATCH_COLUMN]) == ["否", "是", "是"]
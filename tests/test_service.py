@@ -0,0 +1,49 @@
+import pytest
+from database.batch_store import BatchStore
+from database.job_queue import DONE, FAILED
+from service.client import ReportServiceClient, ServiceError
+from service.server import ReportService
+
+
+@pytest.fixture
+def service(tmp_path, workdir, loaded_conn):
+    with ReportService(str(tmp_path / "test.db"), str(tmp_path / "service"), workers=2, port=0,
+                       poll_interval=0.05) as service:
+        yield service
+
+
+def test_submit_wait_and_download(tmp_path, service, loaded_conn):
+    keys = [key for key, _ in BatchStore(loaded_conn).list_batches() if key[1] == "绝缘靴"][:2]
+    missing = ("不存在的单位", "绝缘靴", "2025-01-01")
+    client = ReportServiceClient(service.url)
+
+    ids = client.submit([*keys, missing], client="测试")
+    finished = []
+    jobs, canceled = client.wait(ids, on_update=finished.append, poll_interval=0.05)
+    assert not canceled and sorted(job["id"] for job in finished) == sorted(ids)
+    assert [job["status"] for job in jobs] == [DONE, DONE, FAILED]
+    assert jobs[2]["error"] == "数据库中没有该批次"
+    assert client.status() == {"counts": {DONE: 2, FAILED: 1}, "workers": 2}
+
+    path = client.download(ids[0], str(tmp_path / "下载"))
+    with open(path, "rb") as downloaded, open(jobs[0]["output_path"], "rb") as original:
+        assert downloaded.read() == original.read()
+    with pytest.raises(ServiceError, match="409"):
+        client.download(ids[2], str(tmp_path / "下载"))
+
+
+def test_invalid_requests(service):
+    client = ReportServiceClient(service.url)
+    with pytest.raises(ServiceError, match="400"):
+        client.submit([("只有两项", "绝缘靴")])
+    with pytest.raises(ServiceError, match="400"):
+        client._request("GET", "/jobs?ids=a,b")
+    with pytest.raises(ServiceError, match="404"):
+        client.download(12345, ".")
+    with pytest.raises(ServiceError, match="不存在这些任务"):
+        client.wait([12345], poll_interval=0.05)
+
+
+def test_unreachable_service():
+    with pytest.raises(ServiceError, match="无法连接"):
+        ReportServiceClient("http://127.0.0.1:1", timeout=1).status()
@@ -0,0 +1,42 @@
+from database.summary import SUMMARY_TABLES, rebuild_summary, overview_totals
+from utils.excel_handler import ExcelHandler
+
+
+def _snapshot(conn):
+    return {table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall()) for table in SUMMARY_TABLES}
+
+
+def _assert_matches_rebuild(conn):
+    maintained = _snapshot(conn)
+    with conn:
+        rebuild_summary(conn)
+    assert _snapshot(conn) == maintained
+
+
+def test_import_maintains_summary(loaded_conn, ledger):
+    records, batches, failed, _ = overview_totals(loaded_conn)
+    assert records == len(ledger)
+    assert batches == len(ledger.groupby(["委托单位", "样品名称", "接收日期"]))
+    assert failed == (ledger["检测结论"] == "不合格").sum()
+    _assert_matches_rebuild(loaded_conn)
+
+
+def test_update_and_delete_maintain_summary(loaded_conn):
+    ids = [row[0] for row in loaded_conn.execute("SELECT id FROM tools ORDER BY id")]
+    with loaded_conn:
+        # 移到另一个批次和月份、改变结论、移出全部批次、删除整批与零散记录
+        loaded_conn.execute("UPDATE tools SET 接收日期 = '2024-12-31', 检测结论 = '不合格' WHERE id IN (?, ?)",
+                            ids[:2])
+        loaded_conn.execute("UPDATE tools SET 结论不符 = '是' WHERE id = ?", [ids[5]])
+        loaded_conn.execute("UPDATE tools SET 委托单位 = NULL WHERE id = ?", [ids[6]])
+        unit, sample, date = loaded_conn.execute(
+            "SELECT 委托单位, 样品名称, 接收日期 FROM tools WHERE id = ?", [ids[-1]]).fetchone()
+        loaded_conn.execute("DELETE FROM tools WHERE 委托单位 = ? AND 样品名称 = ? AND 接收日期 = ?",
+                            [unit, sample, date])
+        loaded_conn.execute("DELETE FROM tools WHERE id = ?", [ids[10]])
+    _assert_matches_rebuild(loaded_conn)
+
+
+def test_reimport_maintains_summary(loaded_conn, ledger_file):
+    ExcelHandler(ledger_file, loaded_conn).handler(mode="replace")
+    _assert_matches_rebuild(loaded_conn)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import threading
+import pytest
+from utils import template_registry
+from utils.template_registry import TemplateRegistry
+
+
+@pytest.fixture
+def registry(tmp_path, workdir):
+    templates = tmp_path / "registry"
+    templates.mkdir()
+    shutil.copy(workdir / "templates" / "绝缘靴.docx", templates)
+    return TemplateRegistry(str(templates) + os.sep)
+
+
+def test_cached_until_file_changes(registry):
+    path = registry.get_path("绝缘靴")
+    compiled = registry.get("绝缘靴")
+    assert registry.get("绝缘靴") is compiled
+
+    shutil.copy(os.path.join("templates", "绝缘手套.docx"), path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, compiled.mtime + 1_000_000_000))
+    reloaded = registry.get("绝缘靴")
+    assert reloaded is not compiled
+    with open(path, "rb") as f:
+        assert reloaded.blob == f.read()
+
+
+def test_discovers_added_and_removed_templates(registry):
+    registry.get("绝缘靴")
+    with pytest.raises(FileNotFoundError):
+        registry.get("绝缘手套")
+    shutil.copy(os.path.join("templates", "绝缘手套.docx"), registry.templates_dir)
+    assert registry.get("绝缘手套").path == registry.get_path("绝缘手套")
+
+    os.remove(registry.get_path("绝缘靴"))
+    with pytest.raises(FileNotFoundError):
+        registry.get("绝缘靴")
+    assert registry.sample_names() == ["绝缘手套"]
+
+
+def test_concurrent_gets_compile_once(registry, monkeypatch):
+    loads = []
+    load = template_registry.CompiledTemplate.load
+    monkeypatch.setattr(template_registry.CompiledTemplate, "load",
+                        classmethod(lambda cls, path: loads.append(path) or load(path)))
+    barrier = threading.Barrier(8)
+    compiled = []
+
+    def get():
+        barrier.wait()
+        compiled.append(registry.get("绝缘靴"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1 and len({id(item) for item in compiled}) == 1
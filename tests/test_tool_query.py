@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+from database.db_manager import FTS_COLUMNS
+from database.tool_query import ToolFilter, count_query, page_query, distinct_query
+
+
+def _column(conn, sql, params):
+    return [row[0] for row in conn.execute(sql, params)]
+
+
+def test_where_without_conditions():
+    assert ToolFilter().where() == ("", [])
+    assert ToolFilter(text="   ").text is None
+
+
+def test_where_combines_conditions():
+    tool_filter = ToolFilter(unit="甲", sample="绝缘靴", date_from="2025-01-01", mismatch_only=True)
+    clause, params = tool_filter.where(["x = 1"])
+    assert clause == "WHERE x = 1 AND 委托单位 = ? AND 样品名称 = ? AND 接收日期 >= ? AND 结论不符 = '是'"
+    assert params == ["甲", "绝缘靴", "2025-01-01"]
+
+
+def test_mismatch_only(loaded_conn):
+    # 合成台账中约 5% 的记录填写为不合格，与按规则判定的结果多有不符
+    mismatched = _column(loaded_conn, "SELECT id FROM tools WHERE 结论不符 = '是' ORDER BY id", [])
+    assert mismatched
+    assert _column(loaded_conn, *page_query(ToolFilter(mismatch_only=True), limit=1000)) == mismatched
+
+
+def test_filter_matches_pandas(loaded_conn):
+    df = pd.read_sql("SELECT * FROM tools ORDER BY id", loaded_conn)
+    unit = df["委托单位"].iloc[0]
+    dates = sorted(df["接收日期"].unique())
+    date_from, date_to = dates[1], dates[-2]
+    tool_filter = ToolFilter(unit=unit, date_from=date_from, date_to=date_to)
+    expected = df[(df["委托单位"] == unit) & df["接收日期"].between(date_from, date_to)]
+    assert 0 < len(expected) < len(df)
+
+    assert loaded_conn.execute(*count_query(tool_filter)).fetchone()[0] == len(expected)
+    assert _column(loaded_conn, *page_query(tool_filter, limit=len(df))) == expected["id"].tolist()
+    assert _column(loaded_conn, *distinct_query("样品名称", tool_filter)) == sorted(expected["样品名称"].unique())
+
+
+def test_page_query_pages_are_disjoint_and_ordered(loaded_conn):
+    total = loaded_conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0]
+    pages = []
+    for offset in range(0, total, 30):
+        pages.extend(_column(loaded_conn, *page_query(ToolFilter(), order_by="样品名称", descending=True,
+                                                      limit=30, offset=offset)))
+    expected = _column(loaded_conn, "SELECT id FROM tools ORDER BY 样品名称 DESC, id DESC", [])
+    assert pages == expected
+
+
+def test_short_keyword_uses_escaped_like():
+    clause, params = ToolFilter(text="5%").where()
+    assert "LIKE ? ESCAPE" in clause and "MATCH" not in clause
+    assert set(params) == {"%5\\%%"}
+
+
+@pytest.mark.parametrize("use_fts", [True, False])
+@pytest.mark.parametrize("short", [True, False])
+def test_keyword_matches_pandas(loaded_conn, use_fts, short):
+    df = pd.read_sql("SELECT * FROM tools ORDER BY id", loaded_conn)
+    unit = df["委托单位"].iloc[0]
+    # 样品编号形如 syn-00005-jyx-001：短关键字取样品缩写的前两个字母（走 LIKE），长关键字取批次编号
+    code = df.loc[df["委托单位"] == unit, "样品编号"].iloc[-1]
+    text = code.split("-")[2][:2] if short else code[:9]
+    tool_filter = ToolFilter(unit=unit, text=text, use_fts=use_fts)
+    # LIKE 与 trigram 全文索引对英文字母均不区分大小写
+    found = pd.concat([df[col].fillna("").str.contains(text, case=False, regex=False) for col in FTS_COLUMNS],
+                      axis=1).any(axis=1)
+    expected = df[(df["委托单位"] == unit) & found]
+    assert 0 < len(expected) < len(df)
+
+    count, batches = loaded_conn.execute(*count_query(tool_filter, with_batches=True)).fetchone()
+    assert count == len(expected)
+    assert batches == len(expected.groupby(["委托单位", "样品名称", "接收日期"]))
+    assert _column(loaded_conn, *page_query(tool_filter, limit=len(df))) == expected["id"].tolist()
+
+
+def test_full_text_index_follows_writes(loaded_conn):
+    row_id, code = loaded_conn.execute("SELECT id, 样品编号 FROM tools ORDER BY id LIMIT 1").fetchone()
+    with loaded_conn:
+        loaded_conn.execute("UPDATE tools SET 备注 = '返厂维修' WHERE id = ?", [row_id])
+    assert _column(loaded_conn, *page_query(ToolFilter(text="返厂维修"))) == [row_id]
+    with loaded_conn:
+        loaded_conn.execute("DELETE FROM tools WHERE id = ?", [row_id])
+    assert _column(loaded_conn, *page_query(ToolFilter(text="返厂维修"))) == []
+    assert _column(loaded_conn, *page_query(ToolFilter(text=code))) == []
@@ -3,11 +3,51 @@ from PySide6.QtWidgets import (QApplication, QTabWidget, QWidget, QVBoxLayout,
                                QPushButton, QLabel, QSizePolicy, QFileDialog)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon, QGuiApplication # 导入QGuiApplication用于获取屏幕信息
-from utils.excel_handler import ExcelHandler
 from database.db_manager import DatabaseManager
-from .tools_tab import ToolTab
 from .quick_start_tab import QuickStart
-from .report_tab import ReportTab
+
+
+def _excel_handler(file_path, con):
+    """延迟导入 ExcelHandler（依赖 pandas/openpyxl），首次导入台账时才加载"""
+    from utils.excel_handler import ExcelHandler
+    return ExcelHandler(file_path, con)
+
+
+class LazyTab(QWidget):
+    """延迟构建的选项卡容器：首次切换到该选项卡时才创建真正的页面"""
+
+    def __init__(self, factory):
+        """初始化延迟选项卡
+
+        Args:
+            factory: 无参可调用对象，返回真正的页面控件
+        """
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_widget(self):
+        """构建页面（仅首次调用时执行）并返回"""
+        if self.widget is None:
+            self.widget = self.factory()
+            self._layout.addWidget(self.widget)
+        return self.widget
+
+    def refresh_data(self):
+        """由 MainWindow.on_tab_changed 调用：首次显示时构建页面，之后转发刷新"""
+        built = self.widget is not None
+        widget = self.ensure_widget()
+        # 刚构建的页面数据已是最新，无需再刷新一次
+        if built and hasattr(widget, 'refresh_data'):
+            widget.refresh_data()
+
+    def apply_batch_changes(self, changes):
+        """转发导入的变更集；尚未构建的页面首次显示时读取的已是最新数据，无需处理"""
+        if self.widget is not None and hasattr(self.widget, 'apply_batch_changes'):
+            self.widget.apply_batch_changes(changes)
+
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -55,12 +95,17 @@ class MainWindow(QWidget):
 
         self.tab_widget = QTabWidget()
         self.tab_widget.setFont(QFont("Microsoft YaHei", 10))
-        self.quick_tab = QuickStart(ExcelHandler, self.db_manager) # 传递实例
-        self.tool_tab = ToolTab(self.db_manager) # 传递实例
-        self.report_tab = ReportTab(self.db_manager) # 传递实例
+        self.quick_tab = QuickStart(_excel_handler, self.db_manager) # 传递实例
+        # 数据预览与报告打印页依赖 pandas/docxtpl，首次切换到该页时才导入并构建
+        self.tool_tab = LazyTab(self.create_tool_tab)
+        self.report_tab = LazyTab(self.create_report_tab)
+        self.overview_tab = LazyTab(self.create_overview_tab)
+        self.perf_tab = LazyTab(self.create_perf_tab)
         self.tab_widget.addTab(self.quick_tab, "快速开始")
         self.tab_widget.addTab(self.tool_tab, "数据预览")
         self.tab_widget.addTab(self.report_tab, "报告打印")
+        self.tab_widget.addTab(self.overview_tab, "数据概览")
+        self.tab_widget.addTab(self.perf_tab, "性能统计")
         layout.addWidget(self.tab_widget)
 
 
@@ -121,6 +166,41 @@ class MainWindow(QWidget):
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
 
+    def create_tool_tab(self):
+        from .tools_tab import ToolTab
+        tab = ToolTab(self.db_manager)
+        tab.batch_requested.connect(self.show_batch)
+        return tab
+
+    def create_report_tab(self):
+        from .report_tab import ReportTab
+        return ReportTab(self.db_manager)
+
+    def create_overview_tab(self):
+        from .overview_tab import OverviewTab
+        return OverviewTab(self.db_manager)
+
+    def create_perf_tab(self):
+        from .perf_tab import PerfTab
+        return PerfTab()
+
+    def show_batch(self, key):
+        """切换到报告打印页并选中指定批次"""
+        self.switch_tab("报告打印")
+        if not self.report_tab.ensure_widget().select_batch(key):
+            print(f"未找到批次: {key}")
+
+    def apply_batch_changes(self, changes):
+        """导入完成后将变更集分发给各页面，各页面只更新受影响的批次
+
+        Args:
+            changes: database.batch_store.BatchChanges
+        """
+        print(f"批次变化：{changes}")
+        # 数据概览页读取的是触发器维护的汇总表，切换到该页时重新读取即可
+        for tab in (self.tool_tab, self.report_tab):
+            tab.apply_batch_changes(changes)
+
     def on_tab_changed(self, index):
         """选项卡切换事件处理
 
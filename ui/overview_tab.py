@@ -0,0 +1,89 @@
+"""
+数据概览页：只读取汇总表（见 database.summary），显示总体情况、各样品合格情况与委托单位按月统计
+"""
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+                               QLabel, QComboBox, QHeaderView)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont
+from database.summary import overview_totals, sample_stats, monthly_stats
+from .tools_tab import TOOLBAR_STYLE, ALL_ITEMS
+
+SAMPLE_COLUMNS = ["样品名称", "记录数", "不合格数", "不合格率", "结论不符数"]
+MONTHLY_COLUMNS = ["月份", "委托单位", "批次数", "记录数", "不合格数"]
+
+
+def _make_table(columns):
+    table = QTableWidget(0, len(columns))
+    table.setHorizontalHeaderLabels(columns)
+    table.setFont(QFont("Microsoft YaHei", 9))
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.setAlternatingRowColors(True)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    return table
+
+
+def _fill_table(table, rows):
+    table.setRowCount(len(rows))
+    for row, values in enumerate(rows):
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(Qt.AlignCenter)
+            table.setItem(row, column, item)
+
+
+class OverviewTab(QWidget):
+    def __init__(self, db_manager):
+        super().__init__()
+        self.db_manager = db_manager
+        layout = QVBoxLayout(self)
+
+        toolbar = QWidget()
+        toolbar.setStyleSheet(TOOLBAR_STYLE)
+        toolbar_layout = QHBoxLayout(toolbar)
+        toolbar_layout.setContentsMargins(0, 0, 0, 0)
+        self.totals_label = QLabel()
+        self.totals_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        self.unit_combo = QComboBox()
+        self.unit_combo.setMinimumWidth(220)
+        self.unit_combo.activated.connect(self.load_monthly)
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh_data)
+        toolbar_layout.addWidget(self.totals_label)
+        toolbar_layout.addStretch(1)
+        for widget in (QLabel("委托单位："), self.unit_combo, refresh_button):
+            toolbar_layout.addWidget(widget)
+        layout.addWidget(toolbar)
+
+        tables = QHBoxLayout()
+        self.sample_table = _make_table(SAMPLE_COLUMNS)
+        self.monthly_table = _make_table(MONTHLY_COLUMNS)
+        tables.addWidget(self.sample_table, 2)
+        tables.addWidget(self.monthly_table, 3)
+        layout.addLayout(tables)
+
+        self.refresh_data()
+
+    def refresh_data(self):
+        """重新读取汇总表（切换到本页时由主窗口调用）"""
+        conn = self.db_manager.connection()
+        records, batches, failed, mismatched = overview_totals(conn)
+        self.totals_label.setText(f"共 {records} 条记录，{batches} 个批次，不合格 {failed} 条，结论不符 {mismatched} 条")
+
+        rows = []
+        for sample, count, sample_failed, sample_mismatched in sample_stats(conn):
+            rate = f"{sample_failed / count:.1%}" if count else "-"
+            rows.append((sample, count, sample_failed, rate, sample_mismatched))
+        _fill_table(self.sample_table, rows)
+
+        current = self.unit_combo.currentData()
+        self.unit_combo.clear()
+        self.unit_combo.addItem(ALL_ITEMS, None)
+        for unit in sorted({row[1] for row in monthly_stats(conn)}):
+            self.unit_combo.addItem(unit, unit)
+        index = self.unit_combo.findData(current) if current is not None else 0
+        self.unit_combo.setCurrentIndex(max(index, 0))
+        self.load_monthly()
+
+    def load_monthly(self):
+        _fill_table(self.monthly_table, monthly_stats(self.db_manager.connection(), self.unit_combo.currentData()))
@@ -0,0 +1,68 @@
+"""
+性能统计页：显示本次运行中各关键路径的耗时汇总，可导出为 JSON
+"""
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+                               QLabel, QFileDialog, QHeaderView)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont
+from utils.perf import recorder
+from .tools_tab import TOOLBAR_STYLE
+
+COLUMNS = ["片段", "次数", "总计(s)", "均值(ms)", "p50(ms)", "p95(ms)"]
+
+
+class PerfTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout(self)
+
+        toolbar = QWidget()
+        toolbar.setStyleSheet(TOOLBAR_STYLE)
+        toolbar_layout = QHBoxLayout(toolbar)
+        toolbar_layout.setContentsMargins(0, 0, 0, 0)
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh_data)
+        reset_button = QPushButton("清空")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("导出 JSON")
+        export_button.clicked.connect(self.export_json)
+        hint = QLabel("导入、批次查询与报告生成（含后台工作进程）的耗时统计")
+        hint.setStyleSheet("color: #6C757D;")
+        for widget in (refresh_button, reset_button, export_button, hint):
+            toolbar_layout.addWidget(widget)
+        toolbar_layout.addStretch(1)
+        layout.addWidget(toolbar)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setFont(QFont("Microsoft YaHei", 9))
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.refresh_data()
+
+    def refresh_data(self):
+        """重新读取耗时汇总（切换到本页时由主窗口调用）"""
+        summary = recorder.summary()
+        self.table.setRowCount(len(summary))
+        for row, (name, stats) in enumerate(summary.items()):
+            values = [name, str(stats["count"]), f"{stats['total']:.3f}", f"{stats['mean'] * 1000:.1f}",
+                      f"{stats['p50'] * 1000:.1f}", f"{stats['p95'] * 1000:.1f}"]
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignCenter if column else Qt.AlignLeft | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset(self):
+        recorder.reset()
+        self.refresh_data()
+
+    def export_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出性能统计", "perf_report.json", "JSON 文件 (*.json)")
+        if file_path:
+            recorder.export_json(file_path)
+            print(f"性能统计已导出到 {file_path}")
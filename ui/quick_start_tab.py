@@ -1,12 +1,16 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QSizePolicy, QFileDialog
-from PySide6.QtCore import Qt
+import os
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, QSizePolicy, QFileDialog,
+                               QProgressDialog, QMessageBox)
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtGui import QFont
+from .workers import ImportWorker, MultiImportWorker
 
 class QuickStart(QWidget):
     def __init__(self, ExcelHandler, DatabaseManager):
         super().__init__()
         self.ExcelHandler = ExcelHandler
         self.DatabaseManager = DatabaseManager
+        self.import_worker = None
         # 主布局
         main_layout = QVBoxLayout()
         main_layout.setAlignment(Qt.AlignCenter) # 整体居中
@@ -27,6 +31,7 @@ class QuickStart(QWidget):
 
         # 创建大按钮/卡片
         self.create_button("导入 Excel 文件", self.import_excel, main_layout)
+        self.create_button("导入文件夹", self.import_folder, main_layout)
         self.create_button("查看已导入数据", self.view_data, main_layout)
         self.create_button("开始生成报告", self.generate_report, main_layout)
 
@@ -50,22 +55,91 @@ class QuickStart(QWidget):
         layout.addWidget(button, alignment=Qt.AlignCenter) # 按钮在布局中也居中
     
     def import_excel(self):
-        # 实际应用中会触发文件选择对话框
+        # 可多选：各变电站的台账分别为一个文件时一次导入
         print("导入 Excel 文件功能被点击")
-        # 这里可以添加文件选择对话框的代码，例如：
-        file_path, _ = QFileDialog.getOpenFileName(self, "选择 Excel 文件", "", "Excel Files (*.xlsx *.xls)")
-        if file_path:
-            print(f"选择了文件: {file_path}")
-            db_mag = self.DatabaseManager
-            excel_hand = self.ExcelHandler(file_path, db_mag.conn)
-            excel_hand.handler()
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择 Excel 文件（可多选）", "",
+                                                     "Excel Files (*.xlsx *.xlsm *.xls)")
+        if file_paths:
+            print(f"选择了 {len(file_paths)} 个文件: {', '.join(file_paths)}")
+            self.start_import(file_paths)
+
+    def import_folder(self):
+        # 导入文件夹中的全部 Excel 文件
+        folder = QFileDialog.getExistingDirectory(self, "选择包含 Excel 台账的文件夹")
+        if folder:
+            print(f"选择了文件夹: {folder}")
+            self.start_import([folder])
+
+    def start_import(self, paths):
+        """启动后台导入：单个文件流式导入，多个文件或文件夹并行解析后统一写入
+
+        Args:
+            paths: 文件或文件夹路径列表
+        """
+        if self.import_worker is not None:
+            QMessageBox.information(self, "提示", "已有导入任务正在进行，请稍候")
+            return
+
+        # 导入在后台线程中进行，界面保持响应，可随时取消
+        progress = QProgressDialog("正在导入 Excel...", "取消", 0, 0, self)
+        progress.setWindowTitle("导入 Excel 文件")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+
+        if len(paths) == 1 and os.path.isfile(paths[0]):
+            worker = ImportWorker(self.ExcelHandler, paths[0], self.DatabaseManager)
+        else:
+            worker = MultiImportWorker(paths, self.DatabaseManager)
+
+        def on_progress(done, total, text):
+            if total:
+                progress.setMaximum(total)
+                progress.setValue(min(done, total))
+            progress.setLabelText(text)
+
+        def on_finished(result):
+            progress.close()
+            self.import_worker = None
+            print(f"导入完成：{result}")
+            file_stats = getattr(worker, 'file_stats', [])
+            for stats in file_stats:
+                print(f"  {stats}")
+            if file_stats:
+                self.show_import_summary(result, file_stats)
             # 使用更可靠的方式切换选项卡
             main_window = self.get_main_window()
             if main_window:
+                main_window.apply_batch_changes(result.changes)
                 main_window.switch_tab("数据预览")  # 确保名称完全匹配
             else:
                 print("错误：无法找到主窗口")
 
+        def on_failed(message):
+            progress.close()
+            self.import_worker = None
+            QMessageBox.critical(self, "错误", f"导入失败：{message}")
+
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(on_failed)
+        progress.canceled.connect(worker.cancel)
+        self.import_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def show_import_summary(self, result, file_stats, max_lines=15):
+        """显示多文件导入结果：总体统计与各文件的行数、错误"""
+        failed = sum(1 for stats in file_stats if stats.error is not None)
+        lines = [f"共 {len(file_stats)} 个文件，失败 {failed} 个", f"{result}", ""]
+        lines += [str(stats) for stats in file_stats[:max_lines]]
+        if len(file_stats) > max_lines:
+            lines.append(f"... 还有 {len(file_stats) - max_lines} 个文件")
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("导入结果")
+        msg_box.setIcon(QMessageBox.Warning if failed else QMessageBox.Information)
+        msg_box.setText("\n".join(lines))
+        msg_box.exec()
+
     def view_data(self):
         # 切换到数据预览标签页
         main_window = self.get_main_window()
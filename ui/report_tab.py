@@ -1,39 +1,16 @@
-from PySide6.QtWidgets import (QWidget, QGridLayout, QPushButton, QLabel, QSizePolicy, 
-                             QFileDialog, QComboBox, QLineEdit, QTableView, QHeaderView,
-                             QProgressDialog, QMessageBox)
-from PySide6.QtCore import Qt, QAbstractTableModel
+import bisect
+from PySide6.QtWidgets import (QWidget, QGridLayout, QPushButton, QLabel, QSizePolicy,
+                             QComboBox, QTableView, QProgressDialog, QMessageBox, QCheckBox)
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtGui import QFont
-from database.db_manager import DatabaseManager 
-from utils.report_generator import ReportGenerator
-from PySide6.QtSql import QSqlQuery
-import pandas as pd
-import numpy as np
-
-class PandasModel(QAbstractTableModel):
-    def __init__(self, data):
-        super().__init__()
-        self._data = data
-
-    def rowCount(self, parent=None):
-        return self._data.shape[0]
+from database.batch_store import BatchStore
+from .table_model import DataFrameModel, fit_columns_by_sample
+from .workers import GenerationWorker, RemoteGenerationWorker
 
-    def columnCount(self, parent=None):
-        return self._data.shape[1]
 
-    def data(self, index, role=Qt.DisplayRole):
-        if role == Qt.DisplayRole:
-            return str(self._data.iloc[index.row(), index.column()])
-        elif role == Qt.TextAlignmentRole:
-            return Qt.AlignCenter  # 文字居中对齐
-        return None
-
-    def headerData(self, section, orientation, role):
-        if role == Qt.DisplayRole:
-            if orientation == Qt.Horizontal:
-                return str(self._data.columns[section])
-            else:
-                return str(self._data.index[section])
-        return None
+def _batch_label(key, count):
+    """批次下拉框的显示文字"""
+    return f"{key} - {count}条"
 
 
 class ReportTab(QWidget):
@@ -41,13 +18,10 @@ class ReportTab(QWidget):
         super().__init__()
 
         self.databasemanger = DatabaseManager
-        df = pd.read_sql("SELECT * FROM tools", self.databasemanger.conn)
+        self.batch_store = BatchStore(self.databasemanger.conn)
 
-        # 筛选相同单位日期的相同样品作为1个试验批次，用来生成报告
-        grouped_object = df.groupby(['委托单位', '样品名称', '接收日期'])
-        dic = {}
-        for name, group in grouped_object:
-            dic[name] = group
+        # 筛选相同单位日期的相同样品作为1个试验批次，用来生成报告（在 SQL 端分组，只取批次键与记录数）
+        batches = self.batch_store.list_batches()
 
         # 美化标签和下拉框
         label = QLabel("选择试验批次：")
@@ -63,6 +37,7 @@ class ReportTab(QWidget):
         """)
         
         selec = QComboBox()
+        self.batch_combo = selec
         selec.setFont(QFont("Microsoft YaHei", 10))
         selec.setStyleSheet("""
             QComboBox {
@@ -81,33 +56,12 @@ class ReportTab(QWidget):
             }
         """)
         view = QTableView()
-        for key, _ in dic.items():
-            selec.addItem(str(key), key)  # 第二个参数存储原始的元组键
-
-        # 统一的数据更新方法
-        def update_current_data():
-            """更新当前选中的键值对"""
-            current_key = selec.currentData()
-            if current_key and current_key in dic:
-                self.key = current_key
-                self.value = dic[current_key]
-                return True
-            return False
-        
-        # 连接ComboBox选择变化信号
-        def update_table():
-            if update_current_data():
-                model = PandasModel(self.value)
-                view.setModel(model)
-
-        selec.currentTextChanged.connect(update_table)
-        
-        # 初始化时设置第一个选项的模型
-        if dic:  # 确保字典不为空
-            update_current_data()  # 初始化键值对
-            initial_model = PandasModel(self.value)
-            view.setModel(initial_model)
+        self.batch_view = view
+        for key, count in batches:
+            selec.addItem(_batch_label(key, count), key)  # 第二个参数存储原始的元组键
 
+        # 连接ComboBox选择变化信号
+        selec.currentTextChanged.connect(self.update_table)
 
         # 设置表格视图的大小策略，让它能够扩展
         view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -118,14 +72,17 @@ class ReportTab(QWidget):
         view.setGridStyle(Qt.SolidLine)  # 网格线样式
         view.setFont(QFont("Microsoft YaHei", 9))  # 设置字体
         
-        # 自适应列宽 - 根据内容调整
+        # 列宽按抽样内容估算（见 fit_columns_by_sample），不再逐个测量所有单元格
         header = view.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)  # 根据内容调整列宽
         header.setStretchLastSection(True)  # 最后一列拉伸填充剩余空间
         
         # 设置行高并隐藏序号
         view.verticalHeader().setDefaultSectionSize(30)
         view.verticalHeader().setVisible(False)  # 隐藏行序号
+
+        # 初始化时设置第一个选项的模型（在设置字体之后，以便按实际字体估算列宽）
+        if batches:  # 确保批次列表不为空
+            self.update_table()
         
         layout = QGridLayout()
         
@@ -153,6 +110,8 @@ class ReportTab(QWidget):
 
         # 添加批量生成按钮
         batch_button = QPushButton("批量生成所有报告")
+        self.batch_button = batch_button
+        self.generation_worker = None
         batch_button.clicked.connect(self.generate_all_batches)
         batch_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         batch_button.setMaximumWidth(150)  # 限制按钮宽度
@@ -176,14 +135,33 @@ class ReportTab(QWidget):
             }
         """)  # 蓝色主题样式
 
-        # 存储字典供批量生成使用
-        self.dic = dic
+        # 增量生成：数据与模板均未变化、且报告文件仍存在的批次直接跳过
+        self.incremental_check = QCheckBox("仅生成有变化的批次")
+        self.incremental_check.setChecked(True)
+        self.incremental_check.setFont(QFont("Microsoft YaHei", 9))
+
+        # 按委托单位打包：每个单位一个 ZIP，便于交付（打包时每次都重新生成全部批次）
+        self.bundle_check = QCheckBox("按委托单位打包为 ZIP")
+        self.bundle_check.setFont(QFont("Microsoft YaHei", 9))
+        self.bundle_check.toggled.connect(self.update_generation_options)
+
+        # 提交到报告服务：由服务端的工作进程渲染，完成后下载到本地报告目录
+        self.remote_check = QCheckBox("提交到报告服务")
+        self.remote_check.setFont(QFont("Microsoft YaHei", 9))
+        self.remote_check.setToolTip("服务地址由环境变量 REPORT_SERVICE_URL 指定，默认 http://127.0.0.1:8765")
+        self.remote_check.toggled.connect(self.update_generation_options)
+
+        # 存储批次键供批量生成使用
+        self.batch_keys = [key for key, _ in batches]
 
         layout.addWidget(label, 0, 0)
         layout.addWidget(selec, 0, 1, 1, 2)  # 下拉框占2列，显示更多内容
         layout.addWidget(view, 1, 0, 1, 3)  # 表格占据3列
         layout.addWidget(button, 2, 0, 1, 1, alignment=Qt.AlignRight)
         layout.addWidget(batch_button, 2, 1, 1, 2, alignment=Qt.AlignLeft)
+        layout.addWidget(self.incremental_check, 3, 1, 1, 1, alignment=Qt.AlignLeft)
+        layout.addWidget(self.bundle_check, 3, 2, 1, 1, alignment=Qt.AlignLeft)
+        layout.addWidget(self.remote_check, 4, 1, 1, 1, alignment=Qt.AlignLeft)
         
         # 设置间距和拉伸比例
         layout.setVerticalSpacing(15)  # 增加垂直间距
@@ -196,26 +174,107 @@ class ReportTab(QWidget):
 
         self.setLayout(layout)
 
+    def update_current_data(self):
+        """更新当前选中的键值对，批次数据在选中时才从数据库读取"""
+        current_key = self.batch_combo.currentData()
+        if current_key:
+            self.key = tuple(current_key)
+            self.value = self.batch_store.load_batch(self.key)
+            return True
+        return False
+
+    def update_table(self):
+        """显示当前选中批次的记录"""
+        if self.update_current_data():
+            model = DataFrameModel(self.value.drop(columns=['id']))
+            self.batch_view.setModel(model)
+            fit_columns_by_sample(self.batch_view)
+
+    def apply_batch_changes(self, changes):
+        """导入完成后按变更集（见 database.batch_store.BatchChanges）只更新受影响的批次
+
+        增删下拉框中的批次、更新记录数并使这些批次的缓存失效；只有当前批次受影响时才重新读取表格。
+        不属于任何批次的记录（changes.unbatched）不出现在下拉框中，无需处理。
+        """
+        if not changes:
+            return
+        self.batch_store.invalidate(changes.keys)
+        combo = self.batch_combo
+        current = combo.currentData()
+        current = tuple(current) if current else None
+
+        combo.blockSignals(True)
+        try:
+            for index in reversed(range(combo.count())):
+                key = tuple(combo.itemData(index))
+                if key in changes.removed:
+                    combo.removeItem(index)
+                elif key in changes.changed:
+                    combo.setItemText(index, _batch_label(key, changes.counts[key]))
+            # 下拉框按批次键排序（与 BatchStore.list_batches 一致），新批次插入到对应位置
+            keys = [tuple(combo.itemData(index)) for index in range(combo.count())]
+            for key in sorted(changes.added):
+                index = bisect.bisect_left(keys, key)
+                keys.insert(index, key)
+                combo.insertItem(index, _batch_label(key, changes.counts[key]), key)
+            self.batch_keys = keys
+            if current in keys:
+                combo.setCurrentIndex(keys.index(current))
+        finally:
+            combo.blockSignals(False)
+
+        if current is None or current in changes.removed or current in changes.changed:
+            if combo.count():
+                self.update_table()
+            else:
+                self.batch_view.setModel(None)
+
+    def update_generation_options(self):
+        """报告服务与打包互斥；二者都会重新生成全部批次，此时不适用增量生成"""
+        remote = self.remote_check.isChecked()
+        bundle = self.bundle_check.isChecked()
+        self.bundle_check.setEnabled(not remote)
+        self.remote_check.setEnabled(not bundle)
+        self.incremental_check.setEnabled(not remote and not bundle)
+
+    def select_batch(self, key):
+        """选中指定批次（如从数据预览页双击跳转而来）
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+
+        Returns:
+            是否找到该批次
+        """
+        for i in range(self.batch_combo.count()):
+            if tuple(self.batch_combo.itemData(i)) == tuple(key):
+                self.batch_combo.setCurrentIndex(i)
+                return True
+        return False
+
     def generate(self):
+        from utils.report_generator import ReportGenerator
         self.generator = ReportGenerator(self.key, self.value)
         self.generator.generate_report()
 
     def generate_all_batches(self):
-        """批量生成所有批次的报告"""
-        if not hasattr(self, 'dic') or not self.dic:
+        """批量生成所有批次的报告（在后台线程中执行，界面保持可操作）"""
+        if not hasattr(self, 'batch_keys') or not self.batch_keys:
             QMessageBox.warning(self, "警告", "没有可生成的批次数据")
             return
+        if self.generation_worker is not None:
+            QMessageBox.information(self, "提示", "批量生成正在进行中，请稍候")
+            return
         
-        total_count = len(self.dic)
-        success_count = 0
-        error_count = 0
-        error_messages = []
+        total_count = len(self.batch_keys)
+        stats = {'success': 0, 'skipped': 0, 'error': 0, 'messages': []}
         
-        # 创建进度对话框
+        # 创建进度对话框（非模态，生成期间可以切换到其它选项卡继续浏览）
         progress = QProgressDialog("正在生成报告...", "取消", 0, total_count, self)
         progress.setWindowTitle("批量生成报告")
-        progress.setWindowModality(Qt.WindowModal)
+        progress.setWindowModality(Qt.NonModal)
         progress.setMinimumDuration(0)  # 立即显示进度条
+        progress.setAutoClose(False)
         progress.resize(400, 120)
         
         # 设置进度条样式
@@ -237,50 +296,68 @@ class ReportTab(QWidget):
             }
         """)
         
-        current_step = 0
-        was_canceled = False
-        
-        for key, value in self.dic.items():
-            # 检查是否取消
-            if progress.wasCanceled():
-                was_canceled = True
-                break
-                
-            # 更新进度
-            current_step += 1
-            batch_name = f"{key[0]}_{key[1]}_{key[2]}"
-            progress.setLabelText(f"正在生成第 {current_step}/{total_count} 个报告：\n{batch_name}")
-            progress.setValue(current_step)
-            
-            try:
-                generator = ReportGenerator(key, value)
-                generator.generate_report()
-                success_count += 1
-                print(f"✓ 成功生成: {batch_name}")
-            except Exception as e:
-                error_count += 1
-                error_msg = f"{batch_name}: {str(e)}"
-                error_messages.append(error_msg)
+        def on_item(result):
+            if result.skipped:
+                stats['skipped'] += 1
+                print(f"- 未变化，跳过: {result.batch_name}")
+            elif result.success:
+                stats['success'] += 1
+                print(f"✓ 成功生成: {result.batch_name}")
+            else:
+                stats['error'] += 1
+                error_msg = f"{result.batch_name}: {result.error}"
+                stats['messages'].append(error_msg)
                 print(f"✗ 生成失败: {error_msg}")
-        
-        progress.close()
-        
-        # 显示结果对话框
-        self.show_batch_result(success_count, error_count, error_messages, was_canceled)
 
-    def show_batch_result(self, success_count, error_count, error_messages, was_canceled):
+        def on_progress(done, total, text):
+            progress.setLabelText(f"已完成 {done}/{total} 个报告：\n{text}")
+            progress.setValue(done)
+
+        def on_finished(result):
+            _, was_canceled = result
+            finish()
+            self.show_batch_result(stats['success'], stats['error'], stats['messages'],
+                                   was_canceled, stats['skipped'])
+
+        def on_failed(message):
+            finish()
+            QMessageBox.critical(self, "错误", f"批量生成失败：{message}")
+
+        def finish():
+            progress.close()
+            self.batch_button.setEnabled(True)
+            self.generation_worker = None
+
+        if self.remote_check.isChecked():
+            worker = RemoteGenerationWorker(self.batch_keys)
+        else:
+            worker = GenerationWorker(self.databasemanger, self.batch_keys,
+                                      incremental=self.incremental_check.isChecked(),
+                                      bundle=self.bundle_check.isChecked())
+        worker.signals.item.connect(on_item)
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(on_failed)
+        progress.canceled.connect(worker.cancel)
+
+        self.generation_worker = worker
+        self.batch_button.setEnabled(False)
+        QThreadPool.globalInstance().start(worker)
+
+    def show_batch_result(self, success_count, error_count, error_messages, was_canceled, skipped_count=0):
         """显示批量生成结果对话框"""
+        skipped_note = f"\n未变化跳过: {skipped_count} 个" if skipped_count else ""
         if was_canceled:
             title = "操作已取消"
-            message = f"批量生成已取消！\n已成功生成: {success_count} 个报告"
+            message = f"批量生成已取消！\n已成功生成: {success_count} 个报告{skipped_note}"
             icon = QMessageBox.Information
         elif error_count == 0:
             title = "生成完成"
-            message = f"🎉 批量生成成功完成！\n共生成 {success_count} 个报告"
+            message = f"🎉 批量生成成功完成！\n共生成 {success_count} 个报告{skipped_note}"
             icon = QMessageBox.Information
         else:
             title = "生成完成（部分失败）"
-            message = f"批量生成完成！\n✓ 成功: {success_count} 个\n✗ 失败: {error_count} 个"
+            message = f"批量生成完成！\n✓ 成功: {success_count} 个\n✗ 失败: {error_count} 个{skipped_note}"
             if error_messages:
                 message += f"\n\n失败详情:\n" + "\n".join(error_messages[:5])  # 只显示前5个错误
                 if len(error_messages) > 5:
@@ -0,0 +1,119 @@
+"""
+高性能表格模型：列式字符串缓存 + 分段加载
+"""
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QFontMetrics
+from PySide6.QtWidgets import QHeaderView
+
+# 每次向视图追加的行数
+FETCH_BATCH_SIZE = 500
+
+
+def _to_text(value):
+    """单元格显示文本，空值显示为空白"""
+    if value is None or value != value:  # None 或 NaN
+        return ""
+    return str(value)
+
+
+class DataFrameModel(QAbstractTableModel):
+    """DataFrame 表格模型
+
+    数据按列保存，首次需要显示时才按块转换为字符串并缓存，data() 只做列表索引；
+    行通过 canFetchMore/fetchMore 分段交给视图，滚动到底部时再追加。
+    """
+
+    def __init__(self, data, fetch_size=FETCH_BATCH_SIZE):
+        """初始化表格模型
+
+        Args:
+            data: 要显示的 DataFrame
+            fetch_size: 每次追加的行数
+        """
+        super().__init__()
+        self._headers = [str(col) for col in data.columns]
+        self._raw = [data[col].tolist() for col in data.columns]
+        self._total = len(data)
+        self._fetch_size = fetch_size
+        self._text = [[] for _ in self._headers]  # 已转换为字符串的列缓存
+        self._loaded = 0
+        self._load_rows(min(fetch_size, self._total))
+
+    def _load_rows(self, count):
+        """将接下来 count 行转换为字符串并加入缓存"""
+        start, end = self._loaded, self._loaded + count
+        for raw, text in zip(self._raw, self._text):
+            text.extend(_to_text(value) for value in raw[start:end])
+        self._loaded = end
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self._fetch_size, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._load_rows(count)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self._text[index.column()][index.row()]
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter  # 文字居中对齐
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self._headers[section]
+            else:
+                return str(section + 1)
+        return None
+
+    def column_texts(self, column, limit):
+        """返回某列已缓存的前 limit 个显示文本（用于估算列宽）"""
+        return self._text[column][:limit]
+
+
+def fit_columns_by_sample(view, sample_rows=50, padding=24, max_width=400):
+    """按表头和前若干行的文本估算列宽，避免 ResizeToContents 逐个测量所有单元格
+
+    Args:
+        view: QTableView，其模型需提供 column_texts 或标准 data 接口
+        sample_rows: 参与估算的行数
+        padding: 单元格左右留白
+        max_width: 单列最大宽度
+    """
+    model = view.model()
+    if model is None:
+        return
+    header = view.horizontalHeader()
+    header.setSectionResizeMode(QHeaderView.Interactive)
+    metrics = QFontMetrics(view.font())
+    header_metrics = QFontMetrics(header.font())
+    rows = min(sample_rows, model.rowCount())
+    for column in range(model.columnCount()):
+        if hasattr(model, "column_texts"):
+            texts = model.column_texts(column, rows)
+        else:
+            texts = [str(model.data(model.index(row, column)) or "") for row in range(rows)]
+        width = header_metrics.horizontalAdvance(str(model.headerData(column, Qt.Horizontal, Qt.DisplayRole)))
+        for text in texts:
+            width = max(width, metrics.horizontalAdvance(text))
+        header.resizeSection(column, min(width + padding, max_width))
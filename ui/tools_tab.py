@@ -1,9 +1,43 @@
-from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QTableView, QPushButton, QLabel, QSizePolicy, QFileDialog, QHeaderView, QStyledItemDelegate
-from PySide6.QtCore import Qt
-from PySide6.QtSql import QSqlDatabase, QSqlTableModel
-from PySide6.QtGui import QFont, QIcon, QGuiApplication # 导入QGuiApplication用于获取屏幕信息
-from utils.excel_handler import ExcelHandler
-from database.db_manager import DatabaseManager
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QPushButton, QLabel,
+                               QStyledItemDelegate, QComboBox, QLineEdit, QCheckBox)
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtSql import QSqlQuery, QSqlQueryModel
+from PySide6.QtGui import QFont
+from database.db_manager import to_iso_date
+from database.tool_query import ToolFilter, count_query, page_query, distinct_query
+from .table_model import fit_columns_by_sample
+
+# 每页行数可选值
+PAGE_SIZES = [100, 500, 1000, 5000]
+
+ALL_ITEMS = "全部"
+
+# 工具栏控件的紧凑样式（覆盖主窗口中 QPushButton 的大按钮样式）
+TOOLBAR_STYLE = """
+    QPushButton {
+        border: 1px solid #007BFF;
+        border-radius: 6px;
+        font-size: 12px;
+        padding: 4px 12px;
+        margin-bottom: 0px;
+        min-width: 0px;
+        color: #007BFF;
+        background-color: #FFFFFF;
+    }
+    QPushButton:hover {
+        background-color: #E7F3FF;
+    }
+    QPushButton:disabled {
+        border-color: #DEE2E6;
+        color: #ADB5BD;
+    }
+    QComboBox, QLineEdit {
+        padding: 4px;
+        border: 1px solid #dee2e6;
+        border-radius: 4px;
+        background-color: #FFFFFF;
+    }
+"""
 
 
 class CenterAlignDelegate(QStyledItemDelegate):
@@ -13,7 +47,94 @@ class CenterAlignDelegate(QStyledItemDelegate):
         option.displayAlignment = Qt.AlignCenter
 
 
+def _exec_query(db, sql, params):
+    """在 Qt 数据库连接上执行带参数的查询"""
+    query = QSqlQuery(db)
+    query.prepare(sql)
+    for value in params:
+        query.addBindValue(value)
+    if not query.exec():
+        print(f"查询失败: {query.lastError().text()}")
+    return query
+
+
+class ToolsPageModel(QSqlQueryModel):
+    """分页数据模型：筛选、排序与分页都转换为 SQL，每次只从数据库读取一页"""
+    page_loaded = Signal()
+
+    def __init__(self, db, page_size=PAGE_SIZES[1]):
+        """初始化分页模型
+
+        Args:
+            db: QSqlDatabase 连接
+            page_size: 每页行数
+        """
+        super().__init__()
+        self.db = db
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+        self.tool_filter = ToolFilter()
+        self.batch_total = None  # 关键字搜索时涉及的批次数
+        self.order_by = None
+        self.descending = False
+
+    @property
+    def page_count(self):
+        return max(1, (self.total + self.page_size - 1) // self.page_size)
+
+    def set_filter(self, tool_filter):
+        """设置筛选条件并回到第一页"""
+        self.tool_filter = tool_filter
+        self.page = 0
+        self.refresh()
+
+    def set_page(self, page):
+        self.page = min(max(page, 0), self.page_count - 1)
+        self.load_page()
+
+    def set_page_size(self, page_size):
+        self.page_size = page_size
+        self.page = 0
+        self.load_page()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """由表头点击触发：按列在 SQL 端排序，并回到第一页"""
+        name = self.record().fieldName(column)
+        if not name:
+            return
+        self.order_by = name
+        self.descending = order == Qt.DescendingOrder
+        self.page = 0
+        self.load_page()
+
+    def refresh(self):
+        """重新统计总数并加载当前页"""
+        with_batches = self.tool_filter.text is not None
+        query = _exec_query(self.db, *count_query(self.tool_filter, with_batches))
+        found = query.next()
+        self.total = query.value(0) if found else 0
+        self.batch_total = (query.value(1) if found else 0) if with_batches else None
+        query.finish()
+        self.page = min(self.page, self.page_count - 1)
+        self.load_page()
+
+    def load_page(self):
+        """读取当前页"""
+        sql, params = page_query(self.tool_filter, self.order_by, self.descending,
+                                 limit=self.page_size, offset=self.page * self.page_size)
+        self.setQuery(_exec_query(self.db, sql, params))
+        # 一页最多几千行，直接取完，避免滚动时再分段读取
+        while self.canFetchMore():
+            self.fetchMore()
+        if self.lastError().isValid():
+            print(f"模型错误: {self.lastError().text()}")
+        self.page_loaded.emit()
+
+
 class ToolTab(QWidget):
+    batch_requested = Signal(tuple)  # 双击某行时请求在报告打印页打开其所在批次
+
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
@@ -26,37 +147,192 @@ class ToolTab(QWidget):
 
         layout = QVBoxLayout(self)
 
-        self.model = QSqlTableModel(db=self.db_manager.db)
-        self.model.setTable("tools")
-        self.model.select()
+        # 筛选栏：委托单位、样品名称、接收日期范围
+        toolbar = QWidget()
+        toolbar.setStyleSheet(TOOLBAR_STYLE)
+        toolbar_layout = QHBoxLayout(toolbar)
+        toolbar_layout.setContentsMargins(0, 0, 0, 0)
+        self.unit_combo = QComboBox()
+        self.unit_combo.setMinimumWidth(220)
+        self.sample_combo = QComboBox()
+        self.sample_combo.setMinimumWidth(110)
+        self.date_from_edit = QLineEdit()
+        self.date_from_edit.setPlaceholderText("如 2025.3.1")
+        self.date_to_edit = QLineEdit()
+        self.date_to_edit.setPlaceholderText("如 2025.3.31")
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索样品编号、报告编号、委托单位…")
+        self.search_edit.setMinimumWidth(220)
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.returnPressed.connect(self.apply_filter)
+        search_button = QPushButton("查询")
+        search_button.clicked.connect(self.apply_filter)
+        reset_button = QPushButton("重置")
+        reset_button.clicked.connect(self.reset_filter)
+        self.mismatch_check = QCheckBox("仅看结论不符")
+        self.mismatch_check.setToolTip("检测结论或试验结果与按试验数据判定的结论不一致的记录")
+        self.mismatch_check.toggled.connect(self.apply_filter)
+        self.date_from_edit.returnPressed.connect(self.apply_filter)
+        self.date_to_edit.returnPressed.connect(self.apply_filter)
+        self.unit_combo.activated.connect(self.apply_filter)
+        self.sample_combo.activated.connect(self.apply_filter)
+        for widget in (QLabel("委托单位："), self.unit_combo, QLabel("样品名称："), self.sample_combo,
+                       QLabel("接收日期："), self.date_from_edit, QLabel("至"), self.date_to_edit,
+                       self.search_edit, search_button, reset_button, self.mismatch_check):
+            toolbar_layout.addWidget(widget)
+        toolbar_layout.addStretch(1)
+        layout.addWidget(toolbar)
 
-        if self.model.lastError().isValid():
-            print(f"模型错误: {self.model.lastError().text()}")
-        elif self.model.rowCount() == 0:
-            print("模型加载成功，但 'tools' 表中没有数据。")
+        self.model = ToolsPageModel(self.db_manager.db)
+        self.model.page_loaded.connect(self.on_page_loaded)
 
         self.table_view = QTableView()
         self.table_view.setModel(self.model)
+        self.table_view.doubleClicked.connect(self.open_batch)
+        # 排序由模型转换为 ORDER BY，在数据库端完成；默认按导入顺序显示
         self.table_view.setSortingEnabled(True)
-        
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
         # 美化表格
         self.table_view.setAlternatingRowColors(True)  # 交替行颜色
         self.table_view.setSelectionBehavior(QTableView.SelectRows)  # 选择整行
         self.table_view.setGridStyle(Qt.SolidLine)  # 网格线样式
         self.table_view.setFont(QFont("Microsoft YaHei", 9))  # 设置字体
-        
-        # 自适应列宽 - 根据内容调整
+
+        # 列宽按抽样内容估算（见 fit_columns_by_sample），不再逐个测量所有单元格
         header = self.table_view.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)  # 根据内容调整列宽
         header.setStretchLastSection(True)  # 最后一列拉伸填充剩余空间
-        
+
         # 设置行高
         self.table_view.verticalHeader().setDefaultSectionSize(30)
-        
+
         # 设置文字居中对齐
         center_delegate = CenterAlignDelegate()
         self.table_view.setItemDelegate(center_delegate)
 
         layout.addWidget(self.table_view)
 
+        # 分页栏
+        pager = QWidget()
+        pager.setStyleSheet(TOOLBAR_STYLE)
+        pager_layout = QHBoxLayout(pager)
+        pager_layout.setContentsMargins(0, 0, 0, 0)
+        self.prev_button = QPushButton("上一页")
+        self.prev_button.clicked.connect(lambda: self.go_to_page(self.model.page - 1))
+        self.next_button = QPushButton("下一页")
+        self.next_button.clicked.connect(lambda: self.go_to_page(self.model.page + 1))
+        self.page_label = QLabel()
+        self.page_size_combo = QComboBox()
+        for size in PAGE_SIZES:
+            self.page_size_combo.addItem(f"每页 {size} 条", size)
+        self.page_size_combo.setCurrentIndex(PAGE_SIZES.index(self.model.page_size))
+        self.page_size_combo.activated.connect(self.change_page_size)
+        pager_layout.addStretch(1)
+        for widget in (self.prev_button, self.page_label, self.next_button, self.page_size_combo):
+            pager_layout.addWidget(widget)
+        layout.addWidget(pager)
+
+        # 数据库未建立全文索引（SQLite 不支持 FTS5）时关键字搜索退回 LIKE
+        query = _exec_query(self.db_manager.db, "SELECT 1 FROM sqlite_master WHERE name = 'tools_fts'", [])
+        self.use_fts = query.next()
+        query.finish()
+
+        self.load_filter_options()
+        self.model.refresh()
+        fit_columns_by_sample(self.table_view)
+
+        if self.model.total == 0:
+            print("模型加载成功，但 'tools' 表中没有数据。")
+
+    def load_filter_options(self):
+        """从数据库读取筛选下拉框的可选值，保留当前选择"""
+        for combo, column in ((self.unit_combo, "委托单位"), (self.sample_combo, "样品名称")):
+            current = combo.currentData()
+            combo.clear()
+            combo.addItem(ALL_ITEMS, None)
+            query = _exec_query(self.db_manager.db, *distinct_query(column))
+            while query.next():
+                value = query.value(0)
+                combo.addItem(str(value), value)
+            query.finish()
+            index = combo.findData(current) if current is not None else 0
+            combo.setCurrentIndex(max(index, 0))
+
+    def current_filter(self):
+        """根据筛选栏生成筛选条件"""
+        def date_value(edit):
+            text = edit.text().strip()
+            return to_iso_date(text) if text else None
+
+        return ToolFilter(unit=self.unit_combo.currentData(), sample=self.sample_combo.currentData(),
+                          date_from=date_value(self.date_from_edit), date_to=date_value(self.date_to_edit),
+                          text=self.search_edit.text(), use_fts=self.use_fts,
+                          mismatch_only=self.mismatch_check.isChecked())
+
+    def apply_filter(self):
+        self.model.set_filter(self.current_filter())
+
+    def reset_filter(self):
+        self.unit_combo.setCurrentIndex(0)
+        self.sample_combo.setCurrentIndex(0)
+        self.date_from_edit.clear()
+        self.date_to_edit.clear()
+        self.search_edit.clear()
+        self.mismatch_check.blockSignals(True)
+        self.mismatch_check.setChecked(False)
+        self.mismatch_check.blockSignals(False)
+        self.apply_filter()
+
+    def go_to_page(self, page):
+        self.model.set_page(page)
+
+    def change_page_size(self):
+        self.model.set_page_size(self.page_size_combo.currentData())
+
+    def on_page_loaded(self):
+        """更新分页栏并隐藏内部主键列"""
+        self.table_view.hideColumn(self.model.record().indexOf("id"))  # 隐藏内部主键列
+        text = f"第 {self.model.page + 1}/{self.model.page_count} 页，共 {self.model.total} 条"
+        if self.model.batch_total is not None:
+            text += f"，涉及 {self.model.batch_total} 个批次（双击行可打开所在批次）"
+        self.page_label.setText(text)
+        self.prev_button.setEnabled(self.model.page > 0)
+        self.next_button.setEnabled(self.model.page + 1 < self.model.page_count)
+
+    def open_batch(self, index):
+        """双击行：请求打开该记录所在的试验批次"""
+        record = self.model.record(index.row())
+        key = tuple(record.value(col) for col in ("委托单位", "样品名称", "接收日期"))
+        if all(value not in (None, "") for value in key):
+            self.batch_requested.emit(key)
+
+    def apply_batch_changes(self, changes):
+        """导入完成后按变更集（见 database.batch_store.BatchChanges）更新本页
+
+        新批次只需补充筛选项；有批次被移除时某个委托单位或样品名称可能已无记录，才重新读取筛选项。
+        只有当前筛选条件涉及受影响的批次时才重新统计总数并读取当前页。
+        写入了不属于任何批次的记录时无法按批次判断，重新读取筛选项与当前页。
+        """
+        if not changes:
+            return
+        if changes.unbatched:
+            self.load_filter_options()
+            self.model.refresh()
+            return
+        if changes.removed:
+            self.load_filter_options()
+        else:
+            for combo, position in ((self.unit_combo, 0), (self.sample_combo, 1)):
+                for value in sorted({key[position] for key in changes.added}):
+                    self.insert_filter_option(combo, value)
+        if any(self.model.tool_filter.matches_batch(key) for key in changes.keys):
+            self.model.refresh()
 
+    def insert_filter_option(self, combo, value):
+        """按排序位置插入一个筛选项（已存在时忽略），与 distinct_query 的 ORDER BY 顺序一致"""
+        if combo.findData(value) >= 0:
+            return
+        index = 1  # 第一项为"全部"
+        while index < combo.count() and combo.itemData(index) < value:
+            index += 1
+        combo.insertItem(index, str(value), value)
@@ -0,0 +1,211 @@
+"""
+后台任务：在 QThreadPool 中执行导入与批量生成，界面线程只负责接收信号
+"""
+import threading
+import time
+import traceback
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class WorkerSignals(QObject):
+    """后台任务信号（信号跨线程发送，由 Qt 排队投递到界面线程）"""
+    progress = Signal(int, int, str)  # 已完成数, 总数（未知时为 0）, 说明文字
+    item = Signal(object)             # 单项结果，如每个批次的 BatchResult
+    finished = Signal(object)         # 任务结果
+    failed = Signal(str)              # 任务异常
+
+
+class BaseWorker(QRunnable):
+    """后台任务基类：提供取消标志与进度节流"""
+
+    def __init__(self, progress_interval=0.1):
+        """初始化后台任务
+
+        Args:
+            progress_interval: 进度信号的最小发送间隔（秒），避免大量信号拖慢界面
+        """
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.progress_interval = progress_interval
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+
+    def cancel(self):
+        """请求取消任务（线程安全）"""
+        self._cancel_event.set()
+
+    def is_canceled(self):
+        return self._cancel_event.is_set()
+
+    def report_progress(self, done, total, text=""):
+        """节流发送进度信号，完成时总会发送"""
+        now = time.monotonic()
+        if done == total or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self.signals.progress.emit(done, total or 0, text)
+
+    def run(self):
+        try:
+            result = self.execute()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+    def execute(self):
+        raise NotImplementedError
+
+
+class ImportWorker(BaseWorker):
+    """后台导入 Excel，使用本线程独立的数据库连接"""
+
+    def __init__(self, excel_handler_class, file_path, db_manager, mode='incremental'):
+        super().__init__()
+        self.excel_handler_class = excel_handler_class
+        self.file_path = file_path
+        self.db_manager = db_manager
+        self.mode = mode
+
+    def execute(self):
+        conn = self.db_manager.new_connection()
+        try:
+            handler = self.excel_handler_class(self.file_path, conn)
+            return handler.handler(
+                mode=self.mode,
+                on_progress=lambda done, total: self.report_progress(done, total, f"已导入 {done} 行"),
+                is_canceled=self.is_canceled)
+        finally:
+            conn.close()
+
+
+class MultiImportWorker(BaseWorker):
+    """后台并行导入多个 Excel 文件，解析在进程池中进行，写入使用本线程独立的数据库连接"""
+
+    def __init__(self, file_paths, db_manager, mode='incremental'):
+        """初始化多文件导入任务
+
+        Args:
+            file_paths: Excel 文件或文件夹路径列表（文件夹在后台展开）
+            db_manager: DatabaseManager 实例
+            mode: 导入模式
+        """
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.db_manager = db_manager
+        self.mode = mode
+        self.file_stats = []
+
+    def execute(self):
+        from utils.excel_handler import MultiExcelImporter, collect_excel_files
+
+        file_paths = collect_excel_files(self.file_paths)
+        conn = self.db_manager.new_connection()
+        try:
+            importer = MultiExcelImporter(file_paths, conn)
+            result = importer.handler(
+                mode=self.mode,
+                on_progress=lambda done, total: self.report_progress(done, total, f"已解析 {done}/{total} 个文件"),
+                is_canceled=self.is_canceled)
+            self.file_stats = importer.file_stats
+            return result
+        finally:
+            conn.close()
+
+
+class GenerationWorker(BaseWorker):
+    """后台批量生成报告：批次数据在本线程读取，渲染交给进程池"""
+
+    def __init__(self, db_manager, batch_keys, incremental=True, bundle=False, runner_options=None):
+        """初始化批量生成任务
+
+        Args:
+            db_manager: DatabaseManager 实例
+            batch_keys: 需要生成的批次键列表
+            incremental: 是否跳过数据与模板均未变化的批次（打包时不适用）
+            bundle: 是否按委托单位打包为 ZIP，而不是逐个保存到报告目录
+            runner_options: 传给 BatchRunner 的其它参数
+        """
+        super().__init__()
+        self.db_manager = db_manager
+        self.batch_keys = list(batch_keys)
+        self.incremental = incremental
+        self.bundle = bundle
+        self.runner_options = runner_options or {}
+
+    def execute(self):
+        # 渲染相关模块依赖 pandas/docxtpl，在后台线程中首次使用时再导入，不拖慢启动
+        from database.batch_store import BatchStore
+        from database.report_manifest import ReportManifest
+        from utils.batch_runner import BatchRunner
+        from utils.output_sinks import ZipBundleSink
+        from utils.report_generator import REPORTS_DIR
+
+        conn = self.db_manager.new_connection()
+        sink = None
+        try:
+            store = BatchStore(conn)
+            manifest = ReportManifest(conn) if self.incremental else None
+            if self.bundle:
+                sink = ZipBundleSink(self.runner_options.get('output_dir', REPORTS_DIR))
+            runner = BatchRunner(manifest=manifest, sink=sink, **self.runner_options)
+
+            def on_result(result, done, total):
+                self.signals.item.emit(result)
+                self.report_progress(done, total, result.batch_name)
+
+            # 批次在进程池有空位时才逐个读取，内存占用与批次数无关
+            return runner.run(store.iter_keys(self.batch_keys), on_result, self.is_canceled,
+                              total=len(self.batch_keys))
+        finally:
+            if sink is not None:
+                sink.close()
+            conn.close()
+
+
+class RemoteGenerationWorker(BaseWorker):
+    """提交到报告服务生成：批次键发送给服务端排队渲染，完成后下载到本地报告目录"""
+
+    def __init__(self, batch_keys, service_url=None, output_dir=None, poll_interval=1.0):
+        """初始化远程生成任务
+
+        Args:
+            batch_keys: 需要生成的批次键列表
+            service_url: 报告服务地址，默认取 REPORT_SERVICE_URL 环境变量
+            output_dir: 下载报告的保存目录，默认为本地报告目录
+            poll_interval: 查询任务状态的间隔（秒）
+        """
+        super().__init__()
+        self.batch_keys = [tuple(key) for key in batch_keys]
+        self.service_url = service_url
+        self.output_dir = output_dir
+        self.poll_interval = poll_interval
+
+    def execute(self):
+        import socket
+        from database.job_queue import DONE
+        from service.client import ReportServiceClient, DEFAULT_SERVICE_URL
+        from utils.batch_runner import BatchResult
+        from utils.report_generator import REPORTS_DIR
+
+        client = ReportServiceClient(self.service_url or DEFAULT_SERVICE_URL)
+        output_dir = self.output_dir or REPORTS_DIR
+        job_ids = client.submit(self.batch_keys, client=socket.gethostname())
+        keys = dict(zip(job_ids, self.batch_keys))
+        results = []
+
+        def on_update(job):
+            key = keys[job["id"]]
+            if job["status"] == DONE:
+                try:
+                    result = BatchResult(key, report_path=client.download(job["id"], output_dir))
+                except Exception as e:
+                    result = BatchResult(key, error=f"下载失败：{e}")
+            else:
+                result = BatchResult(key, error=job["error"] or job["status"])
+            results.append(result)
+            self.signals.item.emit(result)
+            self.report_progress(len(results), len(job_ids), result.batch_name)
+
+        _, was_canceled = client.wait(job_ids, on_update, self.is_canceled, self.poll_interval)
+        return results, was_canceled
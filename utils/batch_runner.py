@@ -0,0 +1,324 @@
+"""
+批量报告并行生成
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from utils.report_generator import ReportGenerator, REPORTS_DIR, open_report
+from utils.output_sinks import DirectorySink
+from utils.template_registry import default_registry
+from database.db_manager import format_ledger_date
+from database.report_manifest import batch_hash
+from utils.perf import recorder, span
+
+# Windows 下 ProcessPoolExecutor 最多支持 61 个工作进程
+DEFAULT_MAX_WORKERS = max(1, min(os.cpu_count() or 1, 61))
+
+# 超过该行数的批次拆分为多块并行渲染表格行，再合并为一份报告
+SPLIT_THRESHOLD = 200
+CHUNK_ROWS = 100
+
+
+def _generate_batch(key, value):
+    """在工作进程中渲染单个批次的报告（必须为模块级函数以便序列化）
+
+    工作进程只负责渲染，报告内容以字节返回，由主进程交给输出目标保存。
+
+    Args:
+        key: 批次键 (委托单位, 样品名称, 接收日期)
+        value: 批次数据 DataFrame
+
+    Returns:
+        (报告文件名, 报告内容, 本批次的耗时样本)
+    """
+    # 进程池复用工作进程，先清空上一个批次的样本再计时
+    recorder.reset()
+    generator = ReportGenerator(key, value)
+    data = generator.render_bytes()
+    return generator.get_report_name(), data, recorder.drain()
+
+
+def _render_chunk(key, value, offset):
+    """在工作进程中渲染大批次中一块的表格行（必须为模块级函数以便序列化）
+
+    Args:
+        key: 批次键
+        value: 本块的批次数据
+        offset: 本块第一行在整个批次中的位置
+
+    Returns:
+        (行循环的 XML 片段列表, 耗时样本)
+    """
+    recorder.reset()
+    fragments = ReportGenerator(key, value).render_rows(offset)
+    return fragments, recorder.drain()
+
+
+def _merge_batch(key, header, row_fragments):
+    """在工作进程中将各块的行片段合并为完整报告
+
+    Args:
+        key: 批次键
+        header: 批次的首行（行循环之外的字段只取自首行，不必再传送整个批次）
+        row_fragments: 各块按顺序拼接好的行片段
+
+    Returns:
+        同 _generate_batch
+    """
+    recorder.reset()
+    generator = ReportGenerator(key, header)
+    data = generator.render_bytes(row_fragments)
+    return generator.get_report_name(), data, recorder.drain()
+
+
+def _slice_batch(value, start, stop):
+    """取批次的一块，只附带本块的测量项，避免每块都序列化整个批次的测量项"""
+    chunk = value.iloc[start:stop].copy()
+    measurements = value.attrs.get('measurements')
+    if measurements is not None and 'id' in chunk.columns:
+        chunk.attrs['measurements'] = {tool_id: measurements[tool_id] for tool_id in chunk['id'].tolist()
+                                       if tool_id in measurements}
+    return chunk
+
+
+class _SplitBatch:
+    """拆分渲染中的大批次：收集各块的行片段，全部到齐后再提交合并"""
+
+    def __init__(self, key, header, chunk_count):
+        self.key = key
+        self.header = header  # 批次首行，合并时用于渲染行循环之外的部分
+        self.fragments = [None] * chunk_count
+        self.remaining = chunk_count
+        self.error = None
+
+    def merged_fragments(self):
+        """按块顺序拼接每个行循环的片段"""
+        return ["".join(chunk[loop] for chunk in self.fragments) for loop in range(len(self.fragments[0]))]
+
+
+class BatchResult:
+    """单个批次的生成结果"""
+
+    def __init__(self, key, report_path=None, error=None, skipped=False, timings=None):
+        self.key = key
+        self.report_path = report_path
+        self.error = error
+        self.skipped = skipped  # 数据与模板均未变化，沿用已有报告
+        self.timings = timings or {}  # 工作进程中记录的耗时样本 {名称: [秒, ...]}
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def batch_name(self):
+        """批次名称，日期与报告文件名一致（如 '某供电所_绝缘靴_2025.3.4'）"""
+        return f"{self.key[0]}_{self.key[1]}_{format_ledger_date(self.key[2])}"
+
+
+class BatchRunner:
+    """批量报告生成引擎，将批次分发到进程池并行渲染"""
+
+    def __init__(self, max_workers=None, poll_interval=0.1, open_files=False, output_dir=REPORTS_DIR,
+                 manifest=None, max_in_flight=None, sink=None, split_threshold=SPLIT_THRESHOLD,
+                 chunk_rows=CHUNK_ROWS):
+        """初始化生成引擎
+
+        Args:
+            max_workers: 最大工作进程数，默认为 CPU 核心数
+            poll_interval: 等待结果时检查取消状态的间隔（秒）
+            open_files: 全部完成后是否逐个打开生成的报告（仅保存到目录时有效，批量生成时默认关闭）
+            output_dir: 报告保存目录（未指定 sink 时使用）
+            manifest: ReportManifest 实例；提供时启用增量模式，跳过数据与模板均未变化的批次
+                （仅对保存到目录的输出目标有效）
+            max_in_flight: 已提交但未完成的批次数上限，默认为工作进程数的 2 倍（拆分渲染的批次无论分为几块都只计一个）
+            sink: 输出目标（见 utils.output_sinks），由调用方负责关闭；默认每次运行写入 output_dir
+            split_threshold: 行数超过该值的批次拆分渲染，为 None 时不拆分
+            chunk_rows: 拆分渲染时每块的行数
+        """
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.poll_interval = poll_interval
+        self.open_files = open_files
+        self.output_dir = output_dir
+        self.sink = sink
+        self.manifest = manifest
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.split_threshold = split_threshold
+        self.chunk_rows = chunk_rows
+        self._pool_size = self.max_workers  # 本次运行进程池的实际工作进程数，创建进程池时确定
+
+    def _decide_pool_size(self, total):
+        """确定进程池大小
+
+        不拆分时按批次数缩小进程池；可能拆分时保持 max_workers，单个大批次的各块也能并行
+        （spawn 方式的进程池按需启动工作进程，小批量运行不会多启动进程）。
+        _should_split 依据同一数值判断，二者不会不一致。
+        """
+        if total and self.split_threshold is None:
+            return min(self.max_workers, total)
+        return self.max_workers
+
+    def _should_split(self, key, value):
+        """批次是否足够大且模板支持拆分渲染（只有一个工作进程时拆分没有收益）"""
+        if self._pool_size < 2 or self.split_threshold is None or len(value) <= self.split_threshold:
+            return False
+        try:
+            return default_registry.get(key[1]).splittable
+        except Exception:
+            # 模板缺失或有误时按普通批次提交，由工作进程报告具体错误
+            return False
+
+    def _fingerprint(self, sink, key, value):
+        """计算批次的 (数据哈希, 模板哈希, 输出路径)，模板无法加载时返回 None"""
+        try:
+            template_hash = default_registry.get(key[1]).digest
+        except Exception:
+            # 模板缺失或有误时照常提交，由工作进程报告具体错误
+            return None
+        output_path = sink.location(key, ReportGenerator(key, value).get_report_name())
+        return batch_hash(value), template_hash, output_path
+
+    def run(self, batches, on_result=None, is_canceled=None, total=None):
+        """并行生成所有批次的报告
+
+        batches 可以是生成器（如 BatchStore.iter_batches）：只有当在途批次少于上限时才读取下一个批次，
+        内存占用与批次总数无关。
+
+        Args:
+            batches: 可迭代的 (批次键, 批次数据) 序列
+            on_result: 每完成一个批次时的回调 on_result(result, done, total)
+            is_canceled: 返回 True 表示用户取消的回调，在等待期间周期性调用
+            total: 批次总数，仅用于进度显示；batches 没有长度时由调用方提供，未知时为 0
+
+        Returns:
+            (结果列表, 是否已取消)
+        """
+        if total is None and hasattr(batches, '__len__'):
+            total = len(batches)
+        sink = self.sink if self.sink is not None else DirectorySink(self.output_dir)
+        try:
+            with span("generation.run"):
+                results, was_canceled = self._run(sink, iter(batches), on_result, is_canceled, total or 0)
+        finally:
+            if sink is self.sink:
+                sink.flush()
+            else:
+                sink.close()
+        if self.open_files and sink.persistent:
+            for result in results:
+                if result.success and not result.skipped:
+                    open_report(result.report_path)
+        return results, was_canceled
+
+    def _run(self, sink, batches, on_result, is_canceled, total):
+        # 只有按固定路径保存的输出目标才能依据清单判断已有报告是否有效
+        manifest = self.manifest if sink.persistent else None
+        results = []
+        pending = {}
+        writing = {}  # 已交给输出目标、尚未保存完成的报告 {Future: (批次键, 指纹, 耗时样本)}
+        in_flight = 0  # 已提交但未完成的批次数；拆分渲染的多个块属于同一个批次
+        executor = None
+        was_canceled = False
+        exhausted = False
+
+        def finish(result):
+            nonlocal in_flight
+            if not result.skipped:  # 跳过的批次没有提交到进程池
+                in_flight -= 1
+            results.append(result)
+            if on_result is not None:
+                on_result(result, len(results), total)
+
+        def canceled():
+            return is_canceled is not None and is_canceled()
+
+        def saved(write):
+            # 报告真正保存后才记为成功并写入清单，写入失败的批次记为失败，下次增量生成时会重新生成
+            key, fingerprint, timings = writing.pop(write)
+            try:
+                result = BatchResult(key, report_path=write.result(), timings=timings)
+            except Exception as e:
+                result = BatchResult(key, error=f"报告保存失败：{e}", timings=timings)
+            if result.success and fingerprint is not None:
+                manifest.record(key, fingerprint[0], fingerprint[1], result.report_path)
+            finish(result)
+
+        try:
+            while True:
+                # 背压：在途批次达到上限前才从 batches 中读取下一个批次
+                while not exhausted and in_flight < self.max_in_flight and not canceled():
+                    item = next(batches, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    key, value = item
+
+                    # 增量模式：先在主进程中比对清单，未变化的批次直接记为跳过
+                    fingerprint = None
+                    if manifest is not None:
+                        with span("generation.fingerprint"):
+                            fingerprint = self._fingerprint(sink, key, value)
+                        if fingerprint is not None and manifest.is_current(key, *fingerprint):
+                            finish(BatchResult(key, report_path=fingerprint[2], skipped=True))
+                            continue
+
+                    in_flight += 1
+                    if executor is None:
+                        self._pool_size = self._decide_pool_size(total)
+                        # 常在 Qt 的后台线程中运行，fork 出的子进程可能继承其它线程持有的锁而死锁，统一使用 spawn
+                        executor = ProcessPoolExecutor(max_workers=self._pool_size,
+                                                       mp_context=multiprocessing.get_context("spawn"))
+                    if self._should_split(key, value):
+                        # 大批次：各块的表格行分别提交到进程池，全部完成后再合并
+                        offsets = range(0, len(value), self.chunk_rows)
+                        split = _SplitBatch(key, _slice_batch(value, 0, 1), len(offsets))
+                        for index, offset in enumerate(offsets):
+                            chunk = _slice_batch(value, offset, offset + self.chunk_rows)
+                            future = executor.submit(_render_chunk, key, chunk, offset)
+                            pending[future] = (key, fingerprint, split, index)
+                    else:
+                        future = executor.submit(_generate_batch, key, value)
+                        pending[future] = (key, fingerprint, None, None)
+
+                if canceled():
+                    was_canceled = True
+                    break
+                if not pending and not writing:
+                    break
+
+                done, _ = wait([*pending, *writing], timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in writing:
+                        saved(future)
+                        continue
+                    key, fingerprint, split, index = pending.pop(future)
+                    if split is not None:
+                        try:
+                            fragments, timings = future.result()
+                            recorder.merge(timings)
+                            split.fragments[index] = fragments
+                        except Exception as e:
+                            split.error = split.error or str(e)
+                        split.remaining -= 1
+                        if split.remaining == 0:
+                            if split.error is not None:
+                                finish(BatchResult(key, error=split.error))
+                            else:
+                                future = executor.submit(_merge_batch, key, split.header, split.merged_fragments())
+                                pending[future] = (key, fingerprint, None, None)
+                        continue
+                    try:
+                        name, data, timings = future.result()
+                        recorder.merge(timings)
+                        writing[sink.submit(key, name, data)] = (key, fingerprint, timings)
+                    except Exception as e:
+                        finish(BatchResult(key, error=str(e)))
+            # 取消时已渲染完成的报告仍等待其保存，结果照常报告
+            for write in list(writing):
+                saved(write)
+        finally:
+            # 取消时丢弃尚未开始的批次，已在渲染的批次会自然结束
+            if executor is not None:
+                executor.shutdown(wait=not was_canceled, cancel_futures=True)
+
+        return results, was_canceled
@@ -1,7 +1,118 @@
 """
 Excel导入导出处理
 """
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 import pandas as pd
+from database.db_manager import ensure_schema, to_storage, quote_identifier, replace_measurements
+from database.batch_store import BatchStore, BatchChanges, BATCH_COLUMNS
+from utils.perf import recorder, span
+from utils.rules import evaluate, MISMATCH_COLUMN
+
+# 增量导入时用于识别同一条记录的键（台账中不同样品可能复用同一样品编号，故包含样品名称）
+KEY_COLUMNS = ['样品名称', '样品编号', '检测日期']
+
+# 流式导入时每块的行数
+CHUNK_SIZE = 2000
+
+
+class ImportResult:
+    """导入结果统计"""
+
+    def __init__(self, inserted=0, updated=0, unchanged=0, mismatched=0):
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+        self.mismatched = mismatched  # 判定结论与台账填写的结论不一致的行数
+        self.canceled = False  # 导入被中途取消（增量模式下已写入的块保留，整表替换则全部回滚）
+        self.changes = BatchChanges()  # 受影响的批次（变更集），供界面增量刷新
+
+    @property
+    def total(self):
+        return self.inserted + self.updated + self.unchanged
+
+    def __str__(self):
+        text = f"新增 {self.inserted} 条，更新 {self.updated} 条，未变化 {self.unchanged} 条"
+        if self.mismatched:
+            text += f"，其中 {self.mismatched} 条的检测结论与判定规则不符"
+        return text + "（已取消）" if self.canceled else text
+
+
+def _normalize(df):
+    """将数据统一转换为字符串，保证 Excel 与数据库两侧的哈希可比"""
+    return df.astype(object).where(df.notna(), '').astype(str)
+
+
+def _row_hashes(df):
+    """计算每一行内容的哈希值"""
+    return pd.util.hash_pandas_object(_normalize(df), index=False).to_numpy()
+
+
+def _apply_rules(df):
+    """按判定规则为存储格式的数据填写判定结论（与写入的数据一起参与增量比较）"""
+    with span("import.rules"):
+        return evaluate(df)
+
+
+def _count_mismatched(df):
+    return int((df[MISMATCH_COLUMN] == "是").sum())
+
+
+def _to_records(df):
+    """将 DataFrame 转换为可直接写入 sqlite3 的行列表（NaN 转为 None）"""
+    columns = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns]
+    return list(zip(*columns))
+
+
+def iter_excel_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """按固定行数分块读取 Excel 第一个工作表
+
+    .xlsx/.xlsm 使用 openpyxl 只读模式逐行流式读取，内存占用与文件大小无关；
+    其它格式（如 .xls）退回 pd.read_excel 后再切块。表头为空的列会被忽略，全空行会被跳过。
+
+    Args:
+        file_path: Excel 文件路径
+        chunk_size: 每块行数
+
+    Yields:
+        (DataFrame, 预计总行数或 None)
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in ('.xlsx', '.xlsm'):
+        df = pd.read_excel(file_path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size], len(df)
+        return
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = [i for i, name in enumerate(header) if name is not None]
+        columns = [str(header[i]) for i in positions]
+        # max_row 来自工作表的维度信息，可能包含空行，仅用于进度估计
+        estimated = sheet.max_row - 1 if sheet.max_row else None
+
+        buffer = []
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in positions]
+            if all(value is None for value in values):
+                continue
+            buffer.append(values)
+            if len(buffer) >= chunk_size:
+                # 使用 object 类型，避免不同块的数值类型推断不一致
+                yield pd.DataFrame(buffer, columns=columns, dtype=object), estimated
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, dtype=object), estimated
+    finally:
+        workbook.close()
 
 
 class ExcelHandler:
@@ -11,12 +122,382 @@ class ExcelHandler:
         """初始化Excel处理器
 
         Args:
-            db_manager: 数据库管理器
+            file_path: Excel 文件路径
+            con: sqlite3 数据库连接
+        """
+        self.file_path = file_path
+        self.conn = con
+        self._batches_before = {}  # 本次导入涉及的批次在写入前的记录数
+        self._unbatched = False  # 是否写入了批次键不完整、不属于任何批次的记录
+
+    def _track_all_batches(self):
+        """整表替换前记录全部批次的记录数（整表替换不逐行区分，按写入了不属于任何批次的记录处理）"""
+        self._batches_before = BatchStore(self.conn).batch_counts()
+        self._unbatched = True
+
+    def _track_batches(self, to_insert, to_update, update_ids):
+        """写入一块数据前，记录其涉及的批次（更新行原来所在的批次与写入后所在的批次）的记录数"""
+        store = BatchStore(self.conn)
+        old_keys = store.batch_keys(update_ids) if update_ids else {}
+        touched = set(old_keys.values())
+        for frame, ids in ((to_insert, [None] * len(to_insert)), (to_update, update_ids)):
+            # 台账中没有的批次列沿用记录原来的取值（新插入的记录则为空）
+            values = {col: frame[col].tolist() for col in BATCH_COLUMNS if col in frame.columns}
+            for i, row_id in enumerate(ids):
+                old_key = old_keys.get(row_id, (None,) * len(BATCH_COLUMNS))
+                touched.add(tuple(values[col][i] if col in values else old_key[pos]
+                                  for pos, col in enumerate(BATCH_COLUMNS)))
+        incomplete = {key for key in touched if any(pd.isna(part) for part in key)}
+        self._unbatched = self._unbatched or bool(incomplete)
+        new = [key for key in touched - incomplete if key not in self._batches_before]
+        if new:
+            counts = store.batch_counts(new)
+            self._batches_before.update((key, counts.get(key, 0)) for key in new)
+
+    def _batch_changes(self, replace=False):
+        """对比涉及批次在导入前后的记录数，得出变更集"""
+        store = BatchStore(self.conn)
+        after = store.batch_counts(None if replace else list(self._batches_before))
+        return BatchChanges.compare(self._batches_before, after, unbatched=self._unbatched)
+
+    def handler(self, mode='incremental', chunk_size=CHUNK_SIZE, on_progress=None, is_canceled=None):
+        """分块流式导入 Excel 到 tools 表
+
+        增量模式下每块在一个事务内批量写入；整表替换在一个事务内完成，取消或出错时回滚，
+        其它连接在提交前读到的始终是原有数据。
+
+        Args:
+            mode: 'incremental' 按 样品名称+样品编号+检测日期 增量更新；'replace' 整表替换
+            chunk_size: 每块行数
+            on_progress: 每写完一块时的回调 on_progress(已处理行数, 预计总行数或 None)
+            is_canceled: 返回 True 时在下一块开始前停止导入
+
+        Returns:
+            ImportResult 导入统计
+        """
+        if mode not in ('incremental', 'replace'):
+            raise ValueError(f"未知的导入模式: {mode}")
+
+        ensure_schema(self.conn)
+        result = ImportResult()
+        processed = 0
+        replace = mode == 'replace'
+        if replace:
+            self._track_all_batches()
+        chunks = iter_excel_chunks(self.file_path, chunk_size)
+        try:
+            if replace:
+                self._clear()
+            processed = self._write_chunks(chunks, replace, result, on_progress, is_canceled)
+            if replace:
+                if result.canceled:
+                    self.conn.rollback()
+                    result.inserted = 0
+                else:
+                    self.conn.commit()
+        except BaseException:
+            if replace:
+                self.conn.rollback()
+            raise
+        finally:
+            chunks.close()  # 取消或出错时提前关闭工作簿
+        # 整表替换被取消时已全部回滚，没有变化
+        if not result.canceled or (processed and not replace):
+            result.changes = self._batch_changes(replace)
+        return result
+
+    def _write_chunks(self, chunks, replace, result, on_progress, is_canceled):
+        """逐块转换并写入，统计结果累加到 result
+
+        Returns:
+            已写入的行数
         """
+        processed = 0
+        while True:
+            if is_canceled is not None and is_canceled():
+                result.canceled = True
+                break
+            # 分别计时读取 Excel、格式转换与写入数据库，定位导入的瓶颈
+            with span("import.read"):
+                item = next(chunks, None)
+            if item is None:
+                break
+            chunk, estimated = item
+            # 日期转换为 ISO 格式、试验电压转换为数值，与库中存储格式一致后再比较/写入
+            with span("import.convert"):
+                chunk = to_storage(chunk)
+            chunk = _apply_rules(chunk)
+            result.mismatched += _count_mismatched(chunk)
+            self._ensure_columns(chunk.columns)
+            with span("import.write"):
+                if replace:
+                    # 整表替换不逐块提交，由 handler 在全部写完后一次提交
+                    self._insert_rows(chunk)
+                    result.inserted += len(chunk)
+                else:
+                    chunk_result = self._upsert(chunk)
+                    result.inserted += chunk_result.inserted
+                    result.updated += chunk_result.updated
+                    result.unchanged += chunk_result.unchanged
+            processed += len(chunk)
+            if on_progress is not None:
+                on_progress(processed, estimated)
+        return processed
+
+    def _clear(self):
+        """清空 tools 表及其测量项"""
+        self.conn.execute("DELETE FROM measurements")
+        self.conn.execute("DELETE FROM tools")
+
+    def _insert_rows(self, df):
+        """插入数据块并解析其中的试验数据（调用方负责事务）"""
+        columns = ", ".join(quote_identifier(col) for col in df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        sql = f"INSERT INTO tools ({columns}) VALUES ({placeholders})"
+        if '试验数据' not in df.columns:
+            self.conn.executemany(sql, _to_records(df))
+            return
+        # 逐行插入并取 lastrowid 得到各行实际分配的 id（删除过记录或 id 不连续时不能按最大 id 推算）
+        cursor = self.conn.cursor()
+        ids = []
+        for record in _to_records(df):
+            cursor.execute(sql, record)
+            ids.append(cursor.lastrowid)
+        replace_measurements(self.conn, zip(ids, df['试验数据'].tolist()))
+
+    def _ensure_columns(self, columns):
+        """为 Excel 中新增的列在 tools 表中补充字段（受管列之外的列统一为 TEXT）"""
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info("tools")')}
+        for col in columns:
+            if col not in existing:
+                self.conn.execute(f'ALTER TABLE tools ADD COLUMN {quote_identifier(col)} TEXT')
+
+    def _upsert(self, df):
+        """在一个事务内按键增量写入一块数据"""
+        with self.conn:
+            return self._upsert_rows(df)
+
+    def _upsert_rows(self, df):
+        """按键增量写入一块数据：只插入新行、只更新内容变化的行（调用方负责事务）"""
+        missing = [col for col in KEY_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Excel 缺少增量导入所需的列: {', '.join(missing)}")
+
+        columns = list(df.columns)
+        key_frame = _normalize(df[KEY_COLUMNS])
+        duplicated = key_frame.duplicated(keep='last')
+        if duplicated.any():
+            print(f"警告：本块中有 {int(duplicated.sum())} 行的 样品名称+样品编号+检测日期 重复，仅保留最后一行")
+            df = df[~duplicated.to_numpy()]
+            key_frame = key_frame[~duplicated]
+
+        # 只读取与本块样品编号相关的已有记录并计算哈希（同一键存在多行时以第一行为准）
+        select_cols = ", ".join(quote_identifier(col) for col in columns)
+        codes = df['样品编号']
+        code_values = list(dict.fromkeys(codes[codes.notna()].tolist()))
+        conditions = []
+        if code_values:
+            conditions.append(f"样品编号 IN ({', '.join('?' for _ in code_values)})")
+        if codes.isna().any():
+            conditions.append("样品编号 IS NULL")
+        existing = pd.read_sql(
+            f"SELECT id AS _id, {select_cols} FROM tools WHERE {' OR '.join(conditions)}",
+            self.conn, params=code_values)
+        existing_index = {}
+        if not existing.empty:
+            existing_keys = _normalize(existing[KEY_COLUMNS]).itertuples(index=False, name=None)
+            for key, row_id, row_hash in zip(existing_keys, existing['_id'].tolist(),
+                                            _row_hashes(existing[columns])):
+                existing_index.setdefault(key, (row_id, row_hash))
+
+        new_hashes = _row_hashes(df)
+        insert_mask = []
+        update_ids = []
+        update_mask = []
+        for key, row_hash in zip(key_frame.itertuples(index=False, name=None), new_hashes):
+            found = existing_index.get(key)
+            insert_mask.append(found is None)
+            changed = found is not None and found[1] != row_hash
+            update_mask.append(changed)
+            if changed:
+                update_ids.append(found[0])
+
+        to_insert = df[insert_mask]
+        to_update = df[update_mask]
+        result = ImportResult(inserted=len(to_insert), updated=len(to_update),
+                              unchanged=len(df) - len(to_insert) - len(to_update))
+
+        self._track_batches(to_insert, to_update, update_ids)
+
+        assignments = ", ".join(f"{quote_identifier(col)} = ?" for col in columns)
+        if len(to_insert):
+            self._insert_rows(to_insert)
+        if len(to_update):
+            self.conn.executemany(
+                f"UPDATE tools SET {assignments} WHERE id = ?",
+                [record + (row_id,) for record, row_id in zip(_to_records(to_update), update_ids)])
+            if '试验数据' in columns:
+                replace_measurements(self.conn, zip(update_ids, to_update['试验数据'].tolist()))
+        return result
+
+
+# 文件夹导入时识别的 Excel 扩展名
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+
+def collect_excel_files(paths):
+    """展开文件与文件夹，返回按路径排序的 Excel 文件列表（忽略 Office 临时文件 ~$*.xlsx）
+
+    Args:
+        paths: 文件或文件夹路径列表
+
+    Returns:
+        Excel 文件路径列表
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in os.scandir(path):
+                if (entry.is_file() and not entry.name.startswith('~$')
+                        and os.path.splitext(entry.name)[1].lower() in EXCEL_EXTENSIONS):
+                    files.append(entry.path)
+        else:
+            files.append(path)
+    return sorted(dict.fromkeys(files))
+
+
+def _parse_workbook(file_path):
+    """在工作进程中读取整个工作簿并转换为存储格式（必须为模块级函数以便序列化）
+
+    Returns:
+        (DataFrame, 本文件的耗时样本)
+    """
+    recorder.reset()
+    with span("import.read"):
+        chunks = [chunk for chunk, _ in iter_excel_chunks(file_path)]
+    if not chunks:
+        return None, recorder.drain()
+    with span("import.convert"):
+        df = to_storage(pd.concat(chunks, ignore_index=True))
+    df = _apply_rules(df)
+    return df, recorder.drain()
+
+
+class FileImportStats:
+    """单个文件的导入情况"""
+
+    def __init__(self, file_path, rows=0, duplicates=0, error=None):
         self.file_path = file_path
+        self.rows = rows              # 文件中的有效行数
+        self.duplicates = duplicates  # 与排在前面的文件重复而被忽略的行数
+        self.error = error
+
+    def __str__(self):
+        name = os.path.basename(self.file_path)
+        if self.error is not None:
+            return f"{name}：失败，{self.error}"
+        text = f"{name}：{self.rows} 行"
+        return text + f"（其中 {self.duplicates} 行与其它文件重复，已忽略）" if self.duplicates else text
+
+
+class MultiExcelImporter:
+    """多文件并行导入：工作簿在进程池中并行解析，解析结果在一个事务内统一写入 tools 表"""
+
+    def __init__(self, file_paths, con, max_workers=None):
+        """初始化多文件导入
+
+        Args:
+            file_paths: Excel 文件路径列表
+            con: sqlite3 数据库连接（只在调用线程中写入）
+            max_workers: 解析进程数，默认为 CPU 核心数
+        """
+        self.file_paths = list(file_paths)
         self.conn = con
+        self.max_workers = max_workers or min(os.cpu_count() or 1, 61)
+        self.file_stats = []
+
+    def handler(self, mode='incremental', on_progress=None, is_canceled=None, poll_interval=0.1):
+        """并行解析全部文件后写入数据库
+
+        多个文件中 样品名称+样品编号+检测日期 相同的行只保留排序在前的文件中的一行。
+        解析失败的文件跳过，不影响其它文件；取消或没有解析出任何数据时不写入。
+
+        Args:
+            mode: 'incremental' 增量更新；'replace' 用这些文件的数据整表替换
+            on_progress: 每解析完一个文件时的回调 on_progress(已解析文件数, 文件总数)
+            is_canceled: 返回 True 时停止解析
+            poll_interval: 等待解析结果时检查取消状态的间隔（秒）
+
+        Returns:
+            ImportResult 导入统计，各文件的行数与错误见 self.file_stats
+        """
+        if mode not in ('incremental', 'replace'):
+            raise ValueError(f"未知的导入模式: {mode}")
+        ensure_schema(self.conn)
+        result = ImportResult()
+        stats = {path: FileImportStats(path) for path in self.file_paths}
+        self.file_stats = list(stats.values())
+        frames = {}
+
+        # 导入在 Qt 的后台线程中运行，fork 出的子进程可能继承其它线程持有的锁而死锁，统一使用 spawn
+        executor = ProcessPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.file_paths))),
+                                       mp_context=multiprocessing.get_context("spawn"))
+        try:
+            pending = {executor.submit(_parse_workbook, path): path for path in self.file_paths}
+            while pending:
+                if is_canceled is not None and is_canceled():
+                    result.canceled = True
+                    break
+                done, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        df, timings = future.result()
+                        recorder.merge(timings)
+                    except Exception as e:
+                        stats[path].error = str(e)
+                        continue
+                    if df is not None:
+                        stats[path].rows = len(df)
+                        frames[path] = df
+                if on_progress is not None:
+                    on_progress(len(self.file_paths) - len(pending), len(self.file_paths))
+        finally:
+            executor.shutdown(wait=not result.canceled, cancel_futures=True)
+        if result.canceled:
+            return result
+
+        # 没有成功解析任何数据时不写入（整表替换模式下也不清空已有数据）
+        ordered = [(path, frames[path]) for path in self.file_paths if path in frames]
+        if not ordered:
+            return result
+
+        # 按文件顺序合并，跨文件去重时保留排在前面的文件中的行
+        df = pd.concat([frame for _, frame in ordered], ignore_index=True)
+        if all(col in df.columns for col in KEY_COLUMNS):
+            sources = np.repeat([path for path, _ in ordered], [len(frame) for _, frame in ordered])
+            duplicated = _normalize(df[KEY_COLUMNS]).duplicated(keep='first').to_numpy()
+            for path, count in zip(*np.unique(sources[duplicated], return_counts=True)):
+                stats[path].duplicates = int(count)
+            df = df[~duplicated]
+        result.mismatched = _count_mismatched(df)
 
-    def handler(self):
-        df = pd.read_excel(self.file_path)
-        # print(df.head())
-        df.to_sql(name="tools", con=self.conn,if_exists='replace', index=False)
+        # 单一写入者：全部数据在一个事务内写入，其它连接在 WAL 模式下仍可读取
+        writer = ExcelHandler(None, self.conn)
+        with span("import.write"), self.conn:
+            writer._ensure_columns(df.columns)
+            if mode == 'replace':
+                writer._track_all_batches()
+                writer._clear()
+            for start in range(0, len(df), CHUNK_SIZE):
+                chunk = df.iloc[start:start + CHUNK_SIZE]
+                if mode == 'replace':
+                    writer._insert_rows(chunk)
+                    result.inserted += len(chunk)
+                else:
+                    chunk_result = writer._upsert_rows(chunk)
+                    result.inserted += chunk_result.inserted
+                    result.updated += chunk_result.updated
+                    result.unchanged += chunk_result.unchanged
+            result.changes = writer._batch_changes(mode == 'replace')
+        return result
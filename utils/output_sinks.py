@@ -0,0 +1,171 @@
+"""
+报告输出目标：渲染好的报告以字节形式交给输出目标，由其保存到内存、目录或按委托单位打包的 ZIP 中
+"""
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from utils.perf import span
+
+
+class OutputSink:
+    """输出目标基类
+
+    write 同步保存并返回报告的位置（文件路径或描述）；submit 提交保存并返回 Future，
+    报告真正保存后才得到位置，保存失败时 Future 带有异常。flush/close 等待全部输出完成。
+    支持 with 语句，退出时自动 close。
+    """
+    # 报告是否按固定路径长期保存；只有这类输出目标才能依据生成清单跳过未变化的批次
+    persistent = False
+
+    def location(self, key, name):
+        """报告写入后的位置
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+            name: 报告文件名
+        """
+        raise NotImplementedError
+
+    def write(self, key, name, data):
+        """保存一份报告
+
+        Args:
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+            name: 报告文件名
+            data: 报告内容（字节）
+
+        Returns:
+            报告位置
+        """
+        raise NotImplementedError
+
+    def submit(self, key, name, data):
+        """提交一份报告，参数同 write
+
+        Returns:
+            Future，结果为报告位置；默认实现同步保存，返回已完成的 Future
+        """
+        future = Future()
+        try:
+            future.set_result(self.write(key, name, data))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def flush(self):
+        """等待已提交的报告全部保存"""
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MemorySink(OutputSink):
+    """保存在内存中：reports 为 {文件名: 字节}，适合预览或由调用方另行传输"""
+
+    def __init__(self):
+        self.reports = {}
+
+    def location(self, key, name):
+        return f"memory://{name}"
+
+    def write(self, key, name, data):
+        self.reports[name] = data
+        return self.location(key, name)
+
+
+class DirectorySink(OutputSink):
+    """写入目录：文件由后台线程写盘（write-behind），渲染不必等待磁盘"""
+    persistent = True
+
+    def __init__(self, output_dir, max_pending=16):
+        """初始化目录输出
+
+        Args:
+            output_dir: 报告保存目录，不存在时自动创建
+            max_pending: 尚未写盘的报告数上限，超过时等待最早的一份写完，限制内存占用
+        """
+        self.output_dir = output_dir
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = deque()
+
+    def location(self, key, name):
+        return os.path.join(self.output_dir, name)
+
+    def _save(self, path, data):
+        with span("report.write"):
+            with open(path, "wb") as f:
+                f.write(data)
+        return path
+
+    def submit(self, key, name, data):
+        """提交到后台线程写盘，写入失败的异常由返回的 Future 交给调用方"""
+        if self._executor is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        future = self._executor.submit(self._save, self.location(key, name), data)
+        self._pending.append(future)
+        while len(self._pending) > self.max_pending:
+            wait([self._pending.popleft()])
+        return future
+
+    def write(self, key, name, data):
+        """同步写入，失败时抛出 OSError"""
+        return self.submit(key, name, data).result()
+
+    def flush(self):
+        wait(self._pending)
+        self._pending.clear()
+
+    def close(self):
+        """等待全部写盘并结束后台线程"""
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class ZipBundleSink(OutputSink):
+    """按委托单位打包：每个委托单位一个 ZIP，报告直接写入压缩包，不落地为单独的文件"""
+
+    def __init__(self, output_dir, suffix="试验报告.zip"):
+        """初始化打包输出
+
+        Args:
+            output_dir: 压缩包保存目录，不存在时自动创建
+            suffix: 压缩包文件名后缀，完整文件名为 委托单位_后缀
+        """
+        self.output_dir = output_dir
+        self.suffix = suffix
+        self._bundles = {}
+        self.bundle_paths = []  # 已写入的压缩包路径
+
+    def bundle_path(self, unit):
+        return os.path.join(self.output_dir, f"{unit}_{self.suffix}")
+
+    def location(self, key, name):
+        return f"{self.bundle_path(key[0])}::{name}"
+
+    def write(self, key, name, data):
+        bundle = self._bundles.get(key[0])
+        if bundle is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            # .docx 本身已是压缩格式，直接存储不再压缩
+            bundle = zipfile.ZipFile(self.bundle_path(key[0]), "w", compression=zipfile.ZIP_STORED)
+            self._bundles[key[0]] = bundle
+            self.bundle_paths.append(bundle.filename)
+        with span("report.write"):
+            bundle.writestr(name, data)
+        return self.location(key, name)
+
+    def close(self):
+        for bundle in self._bundles.values():
+            bundle.close()
+        self._bundles.clear()
@@ -0,0 +1,103 @@
+"""
+性能计时：在关键路径上记录耗时片段，按名称汇总次数、总计与 p50/p95
+"""
+import datetime
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+def summarize(samples):
+    """汇总一组耗时样本（秒）：次数、总计、均值、p50、p95"""
+    if not samples:
+        return {"count": 0, "total": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "total": sum(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+    }
+
+
+class PerfRecorder:
+    """耗时记录器（线程安全）：每个名称保存本次运行中的全部样本"""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """记录一个耗时样本
+
+        Args:
+            name: 片段名称，如 'report.render'
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+
+    def merge(self, samples):
+        """合并其它进程返回的样本
+
+        Args:
+            samples: {名称: [耗时, ...]}
+        """
+        with self._lock:
+            for name, values in samples.items():
+                self._samples.setdefault(name, []).extend(values)
+
+    @contextmanager
+    def span(self, name):
+        """计时上下文：with recorder.span('import.read'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def drain(self):
+        """取出并清空全部样本（工作进程随结果一并返回）"""
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        return samples
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self):
+        """按名称汇总，返回 {名称: {count, total, mean, p50, p95}}，按名称排序"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {name: summarize(samples[name]) for name in sorted(samples)}
+
+    def to_dict(self):
+        return {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "spans": self.summary(),
+        }
+
+    def export_json(self, path):
+        """将汇总结果写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_table(self):
+        """汇总结果的文本表格，用于命令行输出"""
+        lines = [f"{'片段':<28}{'次数':>6}{'总计(s)':>12}{'p50(ms)':>12}{'p95(ms)':>12}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<28}{stats['count']:>6}{stats['total']:>12.3f}"
+                         f"{stats['p50'] * 1000:>12.1f}{stats['p95'] * 1000:>12.1f}")
+        return "\n".join(lines)
+
+
+# 进程内共享的默认记录器（每个工作进程各自持有一份）
+recorder = PerfRecorder()
+span = recorder.span
@@ -1,24 +1,37 @@
 """
 报告生成器
 """
+import io
 import os
 import datetime
-from docxtpl import DocxTemplate
-import ast
+from utils.template_registry import default_registry, ROW_FRAGMENTS_KEY
+from utils.output_sinks import DirectorySink
+from database.db_manager import from_storage, format_ledger_date, decode_test_data
+from utils.perf import span
+
+REPORTS_DIR = "./reports/"
+
+
+def open_report(report_path):
+    """用系统默认程序打开报告（仅 Windows 支持）"""
+    os.startfile(os.path.abspath(report_path))
 
 
 class ReportGenerator:
     """报告生成器类"""
 
-    def __init__(self, key, value):
+    def __init__(self, key, value, registry=None):
         """初始化报告生成器
 
         Args:
-            templates_dir: 模板目录
+            key: 批次键 (委托单位, 样品名称, 接收日期)
+            value: 批次数据
+            registry: 模板注册表，默认使用进程内共享的注册表
         """
         self.key = key
         self.value = value
         self.sample_name = self.key[1]
+        self.registry = registry or default_registry
 
     def get_template_path(self):
         """根据样品名称获取模板路径
@@ -29,55 +42,127 @@ class ReportGenerator:
         Returns:
             模板路径
         """
+        return self.registry.get_path(self.sample_name)
 
-        template_path = "./templates/" + self.sample_name + ".docx"
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"模板文件 {template_path} 不存在")
+    def build_context(self, offset=0):
+        """准备模板数据
 
-        return template_path
+        Args:
+            offset: 序号起始偏移（分块渲染时为本块第一行在整个批次中的位置），序号从 offset + 1 开始
 
-    def generate_report(self):
-        """生成试验报告
         Returns:
-            生成的报告文件路径
+            渲染上下文字典
         """
-        
-
-        # # 获取模板路径
-        template_path = self.get_template_path()
-        # print(template_path)
-        # print(self.value)
-
-        # # 加载模板
-        doc = DocxTemplate(template_path)
-
-        self.value['序号'] = range(1, len(self.value) + 1)
-        # 将含多个试验数据的项转换为列表
-        try:
-            self.value['试验数据'] = self.value['试验数据'].apply(ast.literal_eval)
-        except Exception as e:
-            pass
-         
-        # 准备模板数据
-        context = {
-            'rows': self.value.to_dict(orient='records'),
-            **self.value.iloc[0].to_dict()  #对第一行字典进行解包，使得可以直接用{{样品名称}}获得通用信息
+        # 库中日期为 ISO 格式、试验电压为数值，渲染前还原为台账中的书写格式（from_storage 返回副本，不修改传入的批次数据）
+        # pandas 在每次运算时都会深拷贝 attrs，先去掉其中按行增长的测量项，避免大批次上的重复拷贝
+        measurements = self.value.attrs.get('measurements')
+        source = self.value.copy(deep=False)
+        source.attrs = {}
+        value = from_storage(source.drop(columns=['id'], errors='ignore'))
+        # 空单元格在库中为 NULL，渲染为空白而不是字面的 None/nan
+        value = value.astype(object).where(value.notna(), '')
+        value['序号'] = range(offset + 1, offset + len(value) + 1)
+        rows = value.to_dict(orient='records')
+
+        # 试验数据已在导入时解析（见 BatchStore.fetch_batch），多项目器具得到列表
+        if '试验数据' in value.columns:
+            if measurements is not None and 'id' in self.value.columns:
+                test_data = [measurements.get(tool_id, raw) for tool_id, raw in
+                             zip(self.value['id'].tolist(), value['试验数据'].tolist())]
+            else:
+                test_data = [decode_test_data(raw) for raw in value['试验数据'].tolist()]
+            for row, item in zip(rows, test_data):
+                row['试验数据'] = item
+
+        return {
+            'rows': rows,
+            **rows[0]  #对第一行字典进行解包，使得可以直接用{{样品名称}}获得通用信息
         }
 
+    def render(self, context):
+        """渲染模板
 
+        Args:
+            context: 渲染上下文
 
-        # 渲染模板
+        Returns:
+            渲染完成、可直接保存的文档
+        """
+        # 从注册表获取已编译模板的副本，避免重复解析 .docx
+        doc = self.registry.new_document(self.sample_name)
         doc.render(context)
+        return doc
 
-        # 生成报告文件名
-        report_name = f"{self.key[0]}_{self.key[1]}_{self.key[2]}试验报告"
-        report_path = "./reports/" + report_name + ".docx"
+    def get_report_name(self):
+        """报告文件名，如 '某供电所_绝缘靴_2025.3.4试验报告.docx'"""
+        return f"{self.key[0]}_{self.key[1]}_{format_ledger_date(self.key[2])}试验报告.docx"
 
-        # 保存报告
-        doc.save(report_path)
-        
-        # 打开报告
-        abs_path = os.path.abspath(report_path)
-        os.startfile(abs_path)
+    def get_report_path(self, output_dir=REPORTS_DIR):
+        """生成报告文件路径
 
+        Args:
+            output_dir: 报告保存目录
+
+        Returns:
+            报告文件路径
+        """
+        return os.path.join(output_dir, self.get_report_name())
+
+    def render_rows(self, offset=0):
+        """只渲染表格行（大批次拆分渲染时，每个工作进程渲染一块）
+
+        Args:
+            offset: 本块第一行在整个批次中的位置，用于连续编排序号
 
+        Returns:
+            [行循环的 XML 片段, ...]，交给 render_bytes(row_fragments=...) 合并
+        """
+        with span("report.context"):
+            context = self.build_context(offset)
+        with span("report.render_rows"):
+            return self.registry.get(self.sample_name).render_rows(context)
+
+    def render_bytes(self, row_fragments=None):
+        """渲染报告并返回 .docx 文件内容，由调用方决定保存到哪里（见 utils.output_sinks）
+
+        Args:
+            row_fragments: 各块按顺序拼接好的行片段（见 render_rows）；提供时表格行不再重新渲染，
+                批次数据只需包含首行
+
+        Returns:
+            报告内容（字节）
+        """
+        with span("report.context"):
+            context = self.build_context()
+            if row_fragments is not None:
+                context[ROW_FRAGMENTS_KEY] = row_fragments
+        with span("report.render"):
+            doc = self.render(context)
+        with span("report.save"):
+            buffer = io.BytesIO()
+            doc.save(buffer)
+        return buffer.getvalue()
+
+    def generate_report(self, open_file=True, output_dir=REPORTS_DIR, sink=None):
+        """生成试验报告
+
+        Args:
+            open_file: 保存后是否用系统默认程序打开报告（仅 Windows 支持，且仅用于保存到目录的报告）
+            output_dir: 报告保存目录（未指定 sink 时使用，不存在时自动创建）
+            sink: 输出目标，默认保存到 output_dir
+
+        Returns:
+            报告位置（保存到目录时为文件路径）
+        """
+        data = self.render_bytes()
+        if sink is None:
+            with DirectorySink(output_dir) as directory:
+                report_path = directory.write(self.key, self.get_report_name(), data)
+        else:
+            report_path = sink.write(self.key, self.get_report_name(), data)
+            sink.flush()
+
+        if open_file and (sink is None or sink.persistent):
+            open_report(report_path)
+
+        return report_path
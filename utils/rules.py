@@ -0,0 +1,191 @@
+"""
+试验判定规则：按样品名称对整批（或整个台账）的试验数据做向量化判定，并与台账中填写的结论比对
+"""
+import numpy as np
+import pandas as pd
+from database.db_manager import parse_test_data
+
+PASS = "合格"
+FAIL = "不合格"
+
+# 判定结果写入 tools 表的列
+VERDICT_COLUMN = "判定结论"    # 合格 / 不合格 / 空（无规则或数据不足）
+REASON_COLUMN = "判定说明"     # 不合格或无法判定的原因
+MISMATCH_COLUMN = "结论不符"   # 是 / 否 / 空：判定结论与台账填写的检测结论、试验结果是否不一致
+RULE_COLUMNS = [VERDICT_COLUMN, REASON_COLUMN, MISMATCH_COLUMN]
+
+# 外观检查为这些值时直接判为不合格
+FAILED_APPEARANCE = {"不符合", "不合格", "不完好", "损坏"}
+
+# 试验结果与检测结论的对应关系
+RESULT_FOR_VERDICT = {PASS: "通过", FAIL: "不通过"}
+
+
+def _numbers(series):
+    """将一列转换为数值，无法转换的值为 NaN"""
+    return pd.to_numeric(series.astype(object), errors="coerce")
+
+
+def _measurement_range(series):
+    """每行试验数据中测量值的 (最小值, 最大值)
+
+    单个数值直接转换；列表形式的多项目数据（如 '[2.4,2.3]'）按 parse_test_data 拆分后取全部测量项，
+    判定时要求每一项都在范围内。任一测量项不是数值时为 NaN（无法判定）。
+    """
+    low = _numbers(series)
+    high = low.copy()
+    for index, value in series[low.isna()].items():
+        numbers = [number for _, number, _ in parse_test_data(value)]
+        if numbers and all(number is not None for number in numbers):
+            low[index] = min(numbers)
+            high[index] = max(numbers)
+    return low, high
+
+
+def _measurement_texts(series):
+    """每行试验数据各测量项的原文列表"""
+    return series.astype(object).map(lambda value: [text for _, _, text in parse_test_data(value)])
+
+
+def _format_number(values):
+    return values.map(lambda value: f"{value:g}").astype(object)
+
+
+class LimitRule:
+    """试验数据不超过限值，限值按试验电压确定（如绝缘靴、绝缘手套的泄漏电流）"""
+
+    def __init__(self, quantity, unit, limits):
+        """初始化限值规则
+
+        Args:
+            quantity: 试验数据的名称，如 '泄漏电流'
+            unit: 试验数据的单位，如 'mA'
+            limits: {试验电压(kV): 限值}
+        """
+        self.quantity = quantity
+        self.unit = unit
+        self.limits = limits
+
+    def evaluate(self, df):
+        """判定一组同类样品
+
+        Args:
+            df: 存储格式的数据（试验电压为千伏数值）
+
+        Returns:
+            (判定结论 Series, 判定说明 Series)
+        """
+        _, value = _measurement_range(df["试验数据"])  # 多项目数据以最大的一项判定
+        limit = _numbers(df["试验电压"]).map(self.limits)
+        verdict = pd.Series(None, index=df.index, dtype=object)
+        reason = pd.Series(None, index=df.index, dtype=object)
+
+        known = value.notna() & limit.notna()
+        failed = known & (value > limit)
+        verdict[known] = PASS
+        verdict[failed] = FAIL
+        reason[failed] = (self.quantity + " " + _format_number(value[failed]) + self.unit + " 超过限值 "
+                          + _format_number(limit[failed]) + self.unit)
+        reason[value.isna()] = f"{self.quantity}缺失或不是数值"
+        reason[value.notna() & limit.isna()] = "试验电压无对应限值"
+        return verdict, reason
+
+
+class StartVoltageRule:
+    """启动电压在额定电压的规定比例范围内（验电器），记录为 '无启动' 时不合格"""
+
+    def __init__(self, low_ratio, high_ratio, no_start_text="无启动"):
+        """初始化启动电压规则
+
+        Args:
+            low_ratio: 启动电压下限占额定电压的比例
+            high_ratio: 启动电压上限占额定电压的比例
+            no_start_text: 表示验电器未启动的记录
+        """
+        self.low_ratio = low_ratio
+        self.high_ratio = high_ratio
+        self.no_start_text = no_start_text
+
+    def evaluate(self, df):
+        # 多项目数据要求每一项都在范围内，不合格时说明中给出超出范围的那一项
+        minimum, maximum = _measurement_range(df["试验数据"])
+        rated = _numbers(df["试验电压"])
+        low = rated * self.low_ratio
+        high = rated * self.high_ratio
+        verdict = pd.Series(None, index=df.index, dtype=object)
+        reason = pd.Series(None, index=df.index, dtype=object)
+
+        known = minimum.notna() & rated.notna()
+        failed = known & ((minimum < low) | (maximum > high))
+        value = minimum.where(minimum < low, maximum)
+        verdict[known] = PASS
+        verdict[failed] = FAIL
+        reason[failed] = ("启动电压 " + _format_number(value[failed]) + "kV 不在 " + _format_number(low[failed])
+                          + "~" + _format_number(high[failed]) + "kV 范围内")
+        no_start = _measurement_texts(df["试验数据"]).map(lambda texts: self.no_start_text in texts)
+        verdict[no_start] = FAIL
+        reason[no_start] = self.no_start_text
+        reason[verdict.isna()] = "启动电压缺失或不是数值"
+        return verdict, reason
+
+
+# 样品名称 -> 判定规则；未列出的样品只根据外观检查判定不合格
+RULES = {
+    "绝缘靴": LimitRule("泄漏电流", "mA", {15.0: 7.5}),
+    "绝缘手套": LimitRule("泄漏电流", "mA", {8.0: 9.0}),
+    "验电器": StartVoltageRule(0.15, 0.4),
+}
+
+
+def evaluate(df, rules=None):
+    """对整批数据做判定，返回带有 判定结论/判定说明/结论不符 三列的新 DataFrame
+
+    每种样品只做一次向量化计算，与行数无关地按样品种类循环。
+
+    Args:
+        df: 存储格式的数据（见 database.db_manager.to_storage）
+        rules: 样品名称 -> 规则，默认使用 RULES
+
+    Returns:
+        新的 DataFrame
+    """
+    rules = RULES if rules is None else rules
+    df = df.copy()
+    verdict = pd.Series(None, index=df.index, dtype=object)
+    reason = pd.Series(None, index=df.index, dtype=object)
+
+    if all(col in df.columns for col in ("样品名称", "试验数据", "试验电压")):
+        samples = df["样品名称"].astype(object)
+        for sample, rule in rules.items():
+            mask = (samples == sample).to_numpy()
+            if mask.any():
+                sample_verdict, sample_reason = rule.evaluate(df[mask])
+                verdict[mask] = sample_verdict
+                reason[mask] = sample_reason
+
+    if "外观检查" in df.columns:
+        bad_appearance = df["外观检查"].astype(object).isin(FAILED_APPEARANCE).to_numpy()
+        verdict[bad_appearance] = FAIL
+        reason[bad_appearance] = "外观检查不合格"
+
+    # 与台账中填写的检测结论、试验结果比对；任一方缺失时不做比较
+    mismatch = pd.Series(None, index=df.index, dtype=object)
+    judged = verdict.notna()
+    compared = pd.Series(False, index=df.index)
+    differs = pd.Series(False, index=df.index)
+    if "检测结论" in df.columns:
+        recorded = df["检测结论"].astype(object)
+        present = judged & recorded.notna()
+        compared |= present
+        differs |= present & (recorded != verdict)
+    if "试验结果" in df.columns:
+        recorded = df["试验结果"].astype(object)
+        present = judged & recorded.notna()
+        compared |= present
+        differs |= present & (recorded != verdict.map(RESULT_FOR_VERDICT))
+    mismatch[compared] = np.where(differs[compared], "是", "否")
+
+    df[VERDICT_COLUMN] = verdict
+    df[REASON_COLUMN] = reason.where(reason.notna() & (verdict != PASS), None)
+    df[MISMATCH_COLUMN] = mismatch
+    return df
@@ -0,0 +1,252 @@
+"""
+报告模板注册表与编译缓存
+"""
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from docx.opc.constants import CONTENT_TYPE as CT
+from docxtpl import DocxTemplate
+from jinja2 import Environment, Template, meta
+from utils.perf import span
+
+TEMPLATES_DIR = "./templates/"
+
+# 表格行循环（docxtpl 已将 {%tr for row in rows %} 转换为包住 <w:tr> 的普通 for 块）
+_ROWS_LOOP = re.compile(r"\{%\s*for\s+row\s+in\s+rows\s*%\}(.*?)\{%\s*endfor\s*%\}", re.S)
+
+# 拆分渲染时，各行循环预先渲染好的 XML 片段在上下文中的键
+ROW_FRAGMENTS_KEY = "_row_fragments"
+
+# 渲染时会被修改的部件：正文（替换 body 及页眉页脚的引用）、文档属性与脚注；其余部件只读，在各份报告间共享
+_RENDERED_CONTENT_TYPES = (CT.WML_DOCUMENT_MAIN, CT.OPC_CORE_PROPERTIES, CT.WML_FOOTNOTES)
+
+
+class _CompiledDocxTemplate(DocxTemplate):
+    """复用预编译正文模板的 DocxTemplate，避免每次渲染重复清洗 XML 与编译 Jinja"""
+
+    def __init__(self, template_file, body_template, frame_template=None):
+        super().__init__(template_file)
+        self._body_template = body_template
+        self._frame_template = frame_template
+
+    def build_xml(self, context, jinja_env=None):
+        # 自定义 jinja 环境时无法复用缓存，退回 docxtpl 的默认流程
+        if jinja_env is not None:
+            return super().build_xml(context, jinja_env)
+
+        self.current_rendering_part = self.docx._part
+        fragments = context.get(ROW_FRAGMENTS_KEY)
+        if fragments is None or self._frame_template is None:
+            return self.finish_xml(self._body_template.render(context))
+
+        # 拆分渲染：行片段已在分块时完成后处理，这里只渲染并处理行循环之外的部分，再将片段原样插入占位处
+        markers = [f"<!--{ROW_FRAGMENTS_KEY}{index}-->" for index in range(len(fragments))]
+        dst_xml = self.finish_xml(self._frame_template.render(context, **{ROW_FRAGMENTS_KEY: markers}))
+        for marker, fragment in zip(markers, fragments):
+            dst_xml = dst_xml.replace(marker, fragment, 1)
+        return dst_xml
+
+    def finish_xml(self, dst_xml):
+        """渲染结果的后处理，与 DocxTemplate.render_xml_part 保持一致"""
+        dst_xml = re.sub(r"\n<w:p([ >])", r"<w:p\1", dst_xml)
+        dst_xml = (
+            dst_xml.replace("{_{", "{{")
+            .replace("}_}", "}}")
+            .replace("{_%", "{%")
+            .replace("%_}", "%}")
+        )
+        return self.resolve_listing(dst_xml)
+
+
+class CompiledTemplate:
+    """单个模板文件的缓存项：文件内容与编译后的正文模板"""
+
+    def __init__(self, path, mtime, blob, body_template, frame_template=None, row_templates=(), document=None):
+        self.path = path
+        self.mtime = mtime
+        self.blob = blob
+        self.document = document  # 解析好的 python-docx 文档包，渲染时只复制会被修改的部件
+        self.body_template = body_template
+        self.frame_template = frame_template  # 行循环替换为片段占位后的正文模板
+        self.row_templates = list(row_templates)  # 每个行循环的循环体模板，按出现顺序
+        self.digest = hashlib.sha1(blob).hexdigest()  # 模板内容哈希，用于判断报告是否需要重新生成
+
+    @property
+    def splittable(self):
+        """能否将表格行分块渲染后再合并（行循环互不嵌套、循环体不使用 loop 变量）"""
+        return self.frame_template is not None
+
+    @classmethod
+    def load(cls, path):
+        """读取并编译模板文件
+
+        Args:
+            path: 模板路径
+
+        Returns:
+            CompiledTemplate 实例
+        """
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "rb") as f:
+            blob = f.read()
+
+        doc = DocxTemplate(io.BytesIO(blob))
+        doc.init_docx()
+        src_xml = doc.patch_xml(doc.get_xml())
+        src_xml = re.sub(r"<w:p([ >])", r"\n<w:p\1", src_xml)
+        frame_template, row_templates = cls._split_rows(src_xml)
+        return cls(path, mtime, blob, Template(src_xml), frame_template, row_templates, doc.docx)
+
+    @staticmethod
+    def _split_rows(src_xml):
+        """将正文中的行循环拆出为独立的循环体模板
+
+        Returns:
+            (片段占位后的正文模板, [循环体模板, ...])；没有行循环或无法安全拆分时为 (None, [])
+        """
+        bodies = _ROWS_LOOP.findall(src_xml)
+        if not bodies or any("{%" in body or "loop." in body for body in bodies):
+            return None, []
+        index = iter(range(len(bodies)))
+        frame_xml = _ROWS_LOOP.sub(lambda _: f"{{{{ {ROW_FRAGMENTS_KEY}[{next(index)}] }}}}", src_xml)
+        # 合并时只提供批次首行的字段，行循环之外仍用到 rows 的模板不能拆分
+        if "rows" in meta.find_undeclared_variables(Environment().parse(frame_xml)):
+            return None, []
+        return Template(frame_xml), [Template(body) for body in bodies]
+
+    def render_rows(self, context):
+        """只渲染各行循环的循环体（分块渲染时在工作进程中调用）
+
+        Args:
+            context: 渲染上下文，rows 为本块的行
+
+        Returns:
+            [已完成后处理的行循环 XML 片段, ...]，与 row_templates 一一对应
+        """
+        doc = self.new_document()
+        return [doc.finish_xml("".join(template.render(context, row=row) for row in context["rows"]))
+                for template in self.row_templates]
+
+    def new_document(self):
+        """创建一个全新的可渲染文档：复用已解析的文档包，不再逐份报告解压并解析 .docx"""
+        doc = _CompiledDocxTemplate(io.BytesIO(self.blob), self.body_template, self.frame_template)
+        if self.document is not None:
+            doc.docx = self.copy_document()
+        return doc
+
+    def copy_document(self):
+        """复制已解析的文档包，只深拷贝渲染时会被修改的部件（见 _RENDERED_CONTENT_TYPES）"""
+        shared = {id(part): part for part in self.document.part.package.iter_parts()
+                  if part.content_type not in _RENDERED_CONTENT_TYPES}
+        return copy.deepcopy(self.document, shared)
+
+
+class TemplateRegistry:
+    """模板注册表：扫描一次模板目录，按样品名称缓存编译结果（LRU，有上限）"""
+
+    def __init__(self, templates_dir=TEMPLATES_DIR, max_size=16):
+        """初始化模板注册表
+
+        Args:
+            templates_dir: 模板目录
+            max_size: 最多缓存的模板数量
+        """
+        self.templates_dir = templates_dir
+        self.max_size = max_size
+        self._paths = None
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()  # 可重入：get 持锁时还会调用 get_path/scan
+
+    def scan(self):
+        """扫描模板目录，建立 样品名称 -> 模板路径 的映射"""
+        paths = {}
+        if os.path.isdir(self.templates_dir):
+            for entry in os.scandir(self.templates_dir):
+                name, ext = os.path.splitext(entry.name)
+                if ext.lower() == ".docx" and not name.startswith("~$"):
+                    paths[name] = os.path.join(self.templates_dir, entry.name)
+        with self._lock:
+            self._paths = paths
+        return paths
+
+    def sample_names(self):
+        """返回所有可用模板对应的样品名称"""
+        with self._lock:
+            if self._paths is None:
+                self.scan()
+            return sorted(self._paths)
+
+    def get_path(self, sample_name):
+        """根据样品名称获取模板路径
+
+        Args:
+            sample_name: 样品名称
+
+        Returns:
+            模板路径
+        """
+        with self._lock:
+            if self._paths is None or sample_name not in self._paths:
+                # 未命中时重新扫描一次，以发现新增的模板文件
+                self.scan()
+            path = self._paths.get(sample_name)
+        if path is None:
+            template_path = self.templates_dir + sample_name + ".docx"
+            raise FileNotFoundError(f"模板文件 {template_path} 不存在")
+        return path
+
+    def get(self, sample_name):
+        """获取编译后的模板，文件修改时间变化时自动重新编译
+
+        检查修改时间与重新编译在同一把锁内完成，多个线程同时请求时只编译一次，
+        也不会用旧的修改时间覆盖较新的缓存项。
+
+        Args:
+            sample_name: 样品名称
+
+        Returns:
+            CompiledTemplate 实例
+        """
+        with self._lock:
+            path = self.get_path(sample_name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                self._paths.pop(sample_name, None)
+                self._cache.pop(sample_name, None)
+                raise FileNotFoundError(f"模板文件 {path} 不存在")
+
+            compiled = self._cache.get(sample_name)
+            if compiled is None or compiled.mtime != mtime:
+                with span("template.compile"):
+                    compiled = CompiledTemplate.load(path)
+                self._cache[sample_name] = compiled
+            self._cache.move_to_end(sample_name)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+            return compiled
+
+    def new_document(self, sample_name):
+        """为一次渲染创建模板文档副本
+
+        Args:
+            sample_name: 样品名称
+
+        Returns:
+            可直接 render/save 的 DocxTemplate
+        """
+        return self.get(sample_name).new_document()
+
+    def clear(self):
+        """清空缓存与扫描结果"""
+        with self._lock:
+            self._cache.clear()
+            self._paths = None
+
+
+# 进程内共享的默认注册表（每个工作进程各自持有一份）
+default_registry = TemplateRegistry()